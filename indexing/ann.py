@@ -0,0 +1,175 @@
+# indexing/ann.py
+# ---------------------------------------------------------
+# Shared FAISS index construction for every builder.
+#
+# Index type is a FAISS factory string, recorded in the index meta as
+# "index_factory" so loaders can check what they are reading:
+#   "Flat"            exact brute force (default, previous behaviour)
+#   "IVF1024,Flat"    inverted lists, exact vectors     (knob: nprobe)
+#   "IVF1024,PQ32"    inverted lists, product quantized (knob: nprobe)
+#   "HNSW32"          graph index                       (knob: efSearch)
+#   "SQ8", "IVF1024,SQfp16", "HNSW32,SQ8" ...  scalar-quantized codes
+#                     (built from an emb_storage option, see indexing/quantize.py)
+#
+# All indexes use inner product on L2-normalized vectors (= cosine).
+# build_index(..., id_map=True) wraps the index in IndexIDMap2 so chunks can
+# be removed / re-added by id (incremental rebuilds, indexing/incremental.py).
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+DEFAULT_INDEX_FACTORY = "Flat"
+
+# Max vectors used to train IVF / PQ quantizers (FAISS wants ~40-256 per centroid)
+DEFAULT_TRAIN_SIZE = 100_000
+
+
+def min_train_points(factory: str) -> int:
+    """Smallest corpus a factory string can be trained on (IVF lists / PQ codebooks)."""
+    need = 1
+    m = re.search(r"IVF(\d+)", factory)
+    if m:
+        need = max(need, int(m.group(1)))
+    m = re.search(r"PQ\d+(?:x(\d+))?", factory)
+    if m:
+        need = max(need, 2 ** int(m.group(1) or 8))
+    return need
+
+
+def build_index(
+    vectors: np.ndarray,
+    factory: str = DEFAULT_INDEX_FACTORY,
+    train_size: int = DEFAULT_TRAIN_SIZE,
+    seed: int = 0,
+    id_map: bool = False,
+    ids: Optional[np.ndarray] = None,
+) -> faiss.Index:
+    """
+    Build an inner-product FAISS index from (N, d) float32 L2-normalized vectors.
+    Trains the index first when the factory needs it (IVF / PQ).
+    With id_map=True, vector i gets id i (or ids[i]) inside an IndexIDMap2.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n, dim = vectors.shape
+
+    need = min_train_points(factory)
+    if n < need:
+        raise ValueError(
+            f"Index factory '{factory}' needs at least {need} vectors to train, got {n}. "
+            f"Use a smaller nlist / PQ size or '{DEFAULT_INDEX_FACTORY}'."
+        )
+
+    index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        train = vectors
+        if n > train_size:
+            rng = np.random.default_rng(seed)
+            train = vectors[np.sort(rng.choice(n, size=train_size, replace=False))]
+        index.train(train)
+
+    if id_map:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(vectors, np.arange(n, dtype="int64") if ids is None else np.asarray(ids, dtype="int64"))
+    else:
+        index.add(vectors)
+    return index
+
+
+def new_index(dim: int, factory: str = DEFAULT_INDEX_FACTORY, id_map: bool = False) -> faiss.Index:
+    """Empty (possibly untrained) index, for builds that train / add in batches."""
+    index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+    return faiss.IndexIDMap2(index) if id_map else index
+
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """The index under an IDMap wrapper (or the index itself)."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def is_id_mapped(index: faiss.Index) -> bool:
+    return isinstance(faiss.downcast_index(index), (faiss.IndexIDMap, faiss.IndexIDMap2))
+
+
+def index_kind(index: faiss.Index) -> str:
+    """'ivf', 'hnsw' or 'flat' (anything without search-time knobs)."""
+    try:
+        faiss.extract_index_ivf(index)
+        return "ivf"
+    except Exception:
+        pass
+    if isinstance(base_index(index), faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def search_params(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+):
+    """
+    Per-call search parameters (thread-safe, the index is not mutated).
+    Knobs that do not apply to this index type are ignored.
+    """
+    kind = index_kind(index)
+    if kind == "ivf" and nprobe is not None:
+        return faiss.SearchParametersIVF(nprobe=int(nprobe))
+    if kind == "hnsw" and ef_search is not None:
+        return faiss.SearchParametersHNSW(efSearch=int(ef_search))
+    return None
+
+
+def search(
+    index: faiss.Index,
+    queries: np.ndarray,
+    k: int,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """index.search with optional per-call nprobe / efSearch. Missing hits come back as id -1."""
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    params = search_params(index, nprobe=nprobe, ef_search=ef_search)
+    if params is None:
+        return index.search(queries, k)
+    return index.search(queries, k, params=params)
+
+
+def embedding_meta(vectors: np.ndarray, chunk_rows: int = 65536) -> Dict[str, Any]:
+    """
+    Shape / dtype / L2-norm facts about an embedding matrix, recorded at build
+    time so loaders can check integrity without scanning the matrix. Works on
+    memmaps chunk by chunk (bounded memory).
+    """
+    n = int(vectors.shape[0])
+    norm_min, norm_max, norm_sum = float("inf"), 0.0, 0.0
+    for start in range(0, n, chunk_rows):
+        norms = np.linalg.norm(np.asarray(vectors[start : start + chunk_rows], dtype="float32"), axis=1)
+        norm_min = min(norm_min, float(norms.min()))
+        norm_max = max(norm_max, float(norms.max()))
+        norm_sum += float(norms.sum())
+    return {
+        "emb_dtype": str(vectors.dtype),
+        "emb_shape": [n, int(vectors.shape[1])],
+        "norm_mean": round(norm_sum / n, 6) if n else 0.0,
+        "norm_min": round(norm_min, 6) if n else 0.0,
+        "norm_max": round(norm_max, 6),
+    }
+
+
+def index_meta(factory: str, index: faiss.Index) -> Dict[str, Any]:
+    """Fields every builder records next to its own meta keys."""
+    return {
+        "index_factory": factory,
+        "index_type": type(base_index(index)).__name__,
+        "id_map": is_id_mapped(index),
+        "metric": "inner_product",
+    }
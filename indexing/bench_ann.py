@@ -0,0 +1,135 @@
+# indexing/bench_ann.py
+# ---------------------------------------------------------
+# Recall/latency benchmark for FAISS index types.
+#
+# For each factory string (and each nprobe / efSearch setting) reports:
+#   - recall@k against the exact Flat index
+#   - p50 / p95 single-query latency (how the retrievers call FAISS)
+#   - build time and serialized index size
+#
+# Queries are held-out rows of the embedding matrix, so they are not in
+# the index being searched.
+#
+# Usage (from repo root):
+#   python -m indexing.bench_ann --emb legacy_day01_112/data/doc_embeddings_v1.npy
+#   python -m indexing.bench_ann --synthetic 300000 --dim 384 --k 10
+#   python -m indexing.bench_ann --emb ... --factories "Flat" "IVF1024,Flat" "HNSW32"
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import faiss
+import numpy as np
+
+from indexing import ann
+
+
+def load_vectors(args) -> np.ndarray:
+    if args.emb:
+        x = np.load(Path(args.emb)).astype("float32")
+    else:
+        rng = np.random.default_rng(args.seed)
+        # clustered synthetic data (closer to real embeddings than iid noise)
+        centers = rng.standard_normal((max(1, args.synthetic // 500), args.dim)).astype("float32")
+        assign = rng.integers(0, len(centers), size=args.synthetic)
+        x = centers[assign] + 0.35 * rng.standard_normal((args.synthetic, args.dim)).astype("float32")
+    faiss.normalize_L2(x)
+    return x
+
+
+def default_factories(n: int) -> List[str]:
+    nlist = int(max(16, min(65536, 4 * np.sqrt(n))))
+    nlist = 1 << int(np.log2(nlist))
+    out = ["Flat", f"IVF{nlist},Flat", "HNSW32"]
+    if n >= 256 * 8:
+        out.insert(2, f"IVF{nlist},PQ16")
+    return out
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / float(truth.size)
+
+
+def time_queries(index, queries: np.ndarray, k: int, nprobe: Optional[int], ef_search: Optional[int]):
+    lat = np.empty(len(queries), dtype=np.float64)
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        _, I = ann.search(index, queries[i : i + 1], k, nprobe=nprobe, ef_search=ef_search)
+        lat[i] = (time.perf_counter() - t0) * 1000
+        found[i] = I[0]
+    return found, lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Recall@k and p50/p95 latency of FAISS index types vs Flat.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--emb", help="path to an (N, d) .npy embedding matrix")
+    src.add_argument("--synthetic", type=int, help="generate N clustered random vectors")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--n-queries", type=int, default=200)
+    ap.add_argument("--factories", nargs="*", default=None)
+    ap.add_argument("--nprobe", type=int, nargs="*", default=[1, 4, 16, 64])
+    ap.add_argument("--ef-search", type=int, nargs="*", default=[16, 64, 128])
+    ap.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads (1 = per-request serving)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+
+    x = load_vectors(args)
+    rng = np.random.default_rng(args.seed)
+    n_q = min(args.n_queries, max(1, len(x) // 10))
+    q_idx = rng.choice(len(x), size=n_q, replace=False)
+    mask = np.ones(len(x), dtype=bool)
+    mask[q_idx] = False
+    base, queries = x[mask], x[q_idx]
+
+    k = min(args.k, len(base))
+    factories = args.factories or default_factories(len(base))
+
+    print(f"[Bench] base={len(base)} queries={n_q} dim={base.shape[1]} k={k} threads={args.threads}")
+
+    flat = ann.build_index(base, "Flat")
+    _, truth = flat.search(queries, k)
+
+    header = f"{'factory':<20} {'knob':<12} {'recall@' + str(k):>9} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8} {'size MB':>8}"
+    print(header)
+    print("-" * len(header))
+
+    for factory in factories:
+        t0 = time.perf_counter()
+        try:
+            index = ann.build_index(base, factory)
+        except ValueError as e:
+            print(f"{factory:<20} skipped: {e}")
+            continue
+        build_s = time.perf_counter() - t0
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        kind = ann.index_kind(index)
+        if kind == "ivf":
+            settings = [(f"nprobe={p}", p, None) for p in args.nprobe]
+        elif kind == "hnsw":
+            settings = [(f"efSearch={e}", None, e) for e in args.ef_search]
+        else:
+            settings = [("-", None, None)]
+
+        for label, nprobe, ef in settings:
+            found, lat = time_queries(index, queries, k, nprobe, ef)
+            print(
+                f"{factory:<20} {label:<12} {recall_at_k(found, truth):9.3f} "
+                f"{np.percentile(lat, 50):8.3f} {np.percentile(lat, 95):8.3f} "
+                f"{build_s:8.2f} {size_mb:8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# indexing/bench_encoders.py
+# ---------------------------------------------------------
+# Parity + latency of the query encoder backends (indexing/encoders.py)
+# against the PyTorch SentenceTransformer.
+#
+# Parity (per eval query, torch vector vs backend vector):
+#   - cosine: min / mean            -> FAIL if min < --min-cosine
+#   - with --emb: top-k overlap of the exact dense search on the document
+#     embeddings (what retrieval actually sees)
+# Latency: single-query p50 / p95 (how the retrievers call it) and one
+# batched call over all queries.
+#
+# Exit code 1 when any backend fails parity, so it can gate a config change.
+#
+# Usage (from repo root):
+#   python -m indexing.bench_encoders
+#   python -m indexing.bench_encoders --backends onnx-int8 --emb legacy_day01_112/data/doc_embeddings_v1.npy
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import List
+
+import faiss
+import numpy as np
+
+from indexing import encoders
+from indexing.bench_quant import load_eval_queries
+
+DEFAULT_QUERY_FILES = [
+    "legacy_day01_112/eval/eval_dataset.json",
+    "legacy_day01_112/eval/golden_answerable.json",
+    "legacy_day01_112/eval/golden_unanswerable.json",
+]
+MIN_COSINE = 0.99  # parity gate: every query's backend vector vs the torch vector
+
+
+def time_single(encoder, queries: List[str], repeat: int) -> np.ndarray:
+    encoder.encode(queries[:1])  # warm-up (session / graph init)
+    lat = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            encoder.encode([q])
+            lat.append((time.perf_counter() - t0) * 1000)
+    return np.asarray(lat)
+
+
+def topk_overlap(emb: np.ndarray, a: np.ndarray, b: np.ndarray, k: int) -> float:
+    top_a = np.argsort(-(emb @ a.T), axis=0)[:k].T
+    top_b = np.argsort(-(emb @ b.T), axis=0)[:k].T
+    return float(np.mean([len(set(x) & set(y)) / k for x, y in zip(top_a, top_b)]))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Query encoder backends vs PyTorch: cosine parity + latency.")
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--backends", nargs="*", default=["onnx", "onnx-int8"])
+    ap.add_argument("--queries", nargs="*", default=DEFAULT_QUERY_FILES, help="eval dataset JSON files")
+    ap.add_argument("--emb", default=None, help="document embeddings .npy for top-k overlap")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--min-cosine", type=float, default=MIN_COSINE)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--threads", type=int, default=1, help="intra-op threads (torch + ONNX Runtime)")
+    args = ap.parse_args()
+
+    import torch
+
+    torch.set_num_threads(args.threads)
+    faiss.omp_set_num_threads(args.threads)
+
+    queries = load_eval_queries(args.queries)
+    emb = np.load(args.emb, mmap_mode="r") if args.emb else None
+    k = min(args.k, len(emb)) if emb is not None else args.k
+
+    ref = encoders.load_query_encoder("torch", args.model)
+    ref_vecs = ref.encode(queries)
+    print(f"[Bench] {len(queries)} eval queries | model={args.model} | threads={args.threads}")
+
+    header = (
+        f"{'backend':<10} {'cos min':>8} {'cos mean':>9} {'top' + str(k) + ' ovl':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'batch ms':>9} {'parity':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    failed = False
+    for backend in ["torch"] + list(args.backends):
+        enc = ref if backend == "torch" else encoders.load_query_encoder(backend, args.model, threads=args.threads)
+        vecs = enc.encode(queries)
+        cos = np.sum(vecs * ref_vecs, axis=1)
+        overlap = f"{topk_overlap(emb, ref_vecs, vecs, k):9.3f}" if emb is not None else f"{'-':>9}"
+
+        lat = time_single(enc, queries, args.repeat)
+        t0 = time.perf_counter()
+        enc.encode(queries)
+        batch_ms = (time.perf_counter() - t0) * 1000
+
+        ok = float(cos.min()) >= args.min_cosine
+        failed |= not ok
+        print(
+            f"{backend:<10} {cos.min():8.4f} {cos.mean():9.4f} {overlap} "
+            f"{np.percentile(lat, 50):8.2f} {np.percentile(lat, 95):8.2f} {batch_ms:9.1f} {'PASS' if ok else 'FAIL':>7}"
+        )
+
+    if failed:
+        print(f"[Bench] Parity FAILED: some backend has a query with cosine < {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
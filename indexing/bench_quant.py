@@ -0,0 +1,128 @@
+# indexing/bench_quant.py
+# ---------------------------------------------------------
+# float32 vs float16 vs int8 storage (indexing/quantize.py).
+#
+# For each storage type (on top of one index factory) reports:
+#   - memory: serialized FAISS index + embedding file (incl. int8 scale)
+#   - p50 / p95 single-query FAISS latency
+#   - recall@k against the exact float32 Flat search
+#   - max |score error| of the stored matrix (what dense_scores_all sees)
+#
+# Queries come from our eval datasets (encoded with the retriever's model)
+# when --queries is given, else from held-out rows of the matrix.
+#
+# Usage (from repo root):
+#   python -m indexing.bench_quant --emb legacy_day01_112/data/doc_embeddings_v1.npy \
+#       --queries legacy_day01_112/eval/eval_dataset.json \
+#                 legacy_day01_112/eval/golden_answerable.json \
+#                 legacy_day01_112/eval/golden_unanswerable.json
+#   python -m indexing.bench_quant --synthetic 200000 --dim 384 --factory "IVF1024,Flat"
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import faiss
+import numpy as np
+
+from indexing import ann, quantize
+from indexing.bench_ann import load_vectors, recall_at_k, time_queries
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def load_eval_queries(paths: List[str]) -> List[str]:
+    queries = []
+    for p in paths:
+        rows = json.loads(Path(p).read_text(encoding="utf-8"))
+        queries.extend(r["query"] for r in rows if r.get("query"))
+    return queries
+
+
+def encode_queries(queries: List[str], model_name: str) -> np.ndarray:
+    from sentence_transformers import SentenceTransformer
+
+    q = SentenceTransformer(model_name).encode(queries, convert_to_numpy=True).astype("float32")
+    faiss.normalize_L2(q)
+    return q
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Memory / latency / recall of float16 and int8 storage vs float32.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--emb", help="path to an (N, d) float32 .npy embedding matrix")
+    src.add_argument("--synthetic", type=int, help="generate N clustered random vectors")
+    ap.add_argument("--queries", nargs="*", default=None, help="eval dataset JSON files (rows with a 'query')")
+    ap.add_argument("--model", default=MODEL_NAME, help="encoder for --queries")
+    ap.add_argument("--factory", default=ann.DEFAULT_INDEX_FACTORY, help="base factory, e.g. Flat, IVF1024,Flat, HNSW32")
+    ap.add_argument("--storage", nargs="*", default=list(quantize.STORAGE_TYPES))
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--n-queries", type=int, default=200)
+    ap.add_argument("--nprobe", type=int, default=None)
+    ap.add_argument("--ef-search", type=int, default=None)
+    ap.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads (1 = per-request serving)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+
+    x = load_vectors(args)
+    if args.queries:
+        texts = load_eval_queries(args.queries)
+        base, queries = x, encode_queries(texts, args.model)
+        q_src = f"{len(texts)} eval queries"
+    else:
+        rng = np.random.default_rng(args.seed)
+        n_q = min(args.n_queries, max(1, len(x) // 10))
+        q_idx = rng.choice(len(x), size=n_q, replace=False)
+        mask = np.ones(len(x), dtype=bool)
+        mask[q_idx] = False
+        base, queries = x[mask], x[q_idx]
+        q_src = f"{n_q} held-out rows"
+
+    k = min(args.k, len(base))
+    print(f"[Bench] base={len(base)} dim={base.shape[1]} queries={q_src} k={k} factory={args.factory}")
+
+    _, truth = ann.build_index(base, "Flat").search(queries, k)
+    exact_scores = base @ queries.T
+
+    header = (
+        f"{'storage':<8} {'faiss factory':<18} {'index MB':>9} {'emb MB':>8} {'recall@' + str(k):>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'max |ds|':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in args.storage:
+            factory = quantize.storage_factory(args.factory, storage)
+            try:
+                index = ann.build_index(base, factory)
+            except ValueError as e:
+                print(f"{storage:<8} skipped: {e}")
+                continue
+            index_mb = faiss.serialize_index(index).nbytes / 1e6
+
+            emb_path = Path(tmp) / f"emb_{storage}.npy"
+            quantize.save_embeddings(emb_path, base, storage)
+            stored = quantize.load_embeddings(emb_path, storage)
+            emb_mb = (emb_path.stat().st_size + (quantize.scale_path(emb_path).stat().st_size if storage == "int8" else 0)) / 1e6
+            score_err = float(np.abs((stored @ queries.T) - exact_scores).max())
+
+            found, lat = time_queries(index, queries, k, args.nprobe, args.ef_search)
+            print(
+                f"{storage:<8} {factory:<18} {index_mb:9.1f} {emb_mb:8.1f} {recall_at_k(found, truth):9.3f} "
+                f"{np.percentile(lat, 50):8.3f} {np.percentile(lat, 95):8.3f} {score_err:9.5f}"
+            )
+            del stored
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,25 @@
 import faiss
 import numpy as np
 import json
+import sys
 from pathlib import Path
 
+# Ensure repo root is on sys.path so the shared indexing package is importable
+# when running this file directly (python indexing/build_index.py)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from indexing import ann  # noqa: E402
+
 DATA_DIR = Path("ragcore_v2/data/processed")
 CORPUS_PATH = DATA_DIR / "corpus.json"
 EMB_PATH = DATA_DIR / "embeddings.npy"
 INDEX_PATH = DATA_DIR / "index.faiss"
+INDEX_META_PATH = DATA_DIR / "index_meta.json"
+
+# FAISS index type (factory string); see indexing/ann.py for options
+INDEX_FACTORY = ann.DEFAULT_INDEX_FACTORY
 
 
 def main():
@@ -28,14 +41,17 @@ def main():
     faiss.normalize_L2(embeddings)
 
     dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(embeddings)
+    index = ann.build_index(embeddings, INDEX_FACTORY)
 
     faiss.write_index(index, str(INDEX_PATH))
 
+    meta = {"dim": int(dim), "n_vectors": int(index.ntotal), **ann.index_meta(INDEX_FACTORY, index)}
+    INDEX_META_PATH.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
     print(f"✅ FAISS index built")
     print(f"   vectors : {index.ntotal}")
     print(f"   dim     : {dim}")
+    print(f"   factory : {INDEX_FACTORY}")
     print(f"   saved → {INDEX_PATH}")
 
 if __name__ == "__main__":
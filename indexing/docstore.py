@@ -0,0 +1,239 @@
+# indexing/docstore.py
+# ---------------------------------------------------------
+# Random-access binary docstore (replaces parsing docstore.jsonl at import)
+#
+# Layout (one directory, row id == FAISS id):
+#   docstore.json          header: format, n_rows, column kinds
+#   text.bin               all chunk texts, UTF-8, back to back
+#   text.offsets.npy       (N+1,) int64, row i = text.bin[off[i]:off[i+1]]
+#   <col>.bin/.offsets.npy string columns (e.g. "source", "id"), same scheme
+#   <col>.npy              int columns (e.g. "chunk_i"), -1 = missing
+#
+# Opening maps the files (O(1), no parsing); a lookup decodes one slice.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from .npy_append import NpyAppender
+
+FORMAT = "docstore-v1"
+HEADER_NAME = "docstore.json"
+
+# ragcore_v2 chunk rows: {"text", "source", "chunk_i"}
+DEFAULT_COLUMNS: Dict[str, str] = {"source": "str", "chunk_i": "int"}
+
+INT_NULL = -1
+
+
+class DocstoreWriter:
+    """
+    Streams rows to disk with flat memory (offsets and int columns are
+    appended to their .npy files as rows arrive). checkpoint() returns a
+    small state dict; DocstoreWriter(out_dir, resume=state) reopens the
+    files and drops rows written after that checkpoint.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        columns: Dict[str, str] | None = None,
+        resume: Dict[str, Any] | None = None,
+    ) -> None:
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.columns = dict(DEFAULT_COLUMNS if columns is None else columns)
+        for name, kind in self.columns.items():
+            if kind not in ("str", "int"):
+                raise ValueError(f"Column '{name}' has unknown kind '{kind}' (expected 'str' or 'int')")
+
+        self._str_cols = ["text"] + [c for c, k in self.columns.items() if k == "str"]
+        self._int_cols = [c for c, k in self.columns.items() if k == "int"]
+        self.n_rows = 0 if resume is None else int(resume["n_rows"])
+
+        self._blobs = {}
+        self._blob_bytes: Dict[str, int] = {}
+        self._offsets: Dict[str, NpyAppender] = {}
+        for c in self._str_cols:
+            bin_path = self.out_dir / f"{c}.bin"
+            off_path = self.out_dir / f"{c}.offsets.npy"
+            if resume is None:
+                self._blobs[c] = bin_path.open("wb")
+                self._blob_bytes[c] = 0
+                self._offsets[c] = NpyAppender(off_path, np.int64)
+                self._offsets[c].append(np.zeros(1, dtype=np.int64))
+            else:
+                self._blob_bytes[c] = int(resume["blob_bytes"][c])
+                f = bin_path.open("r+b")
+                f.truncate(self._blob_bytes[c])
+                f.seek(0, os.SEEK_END)
+                self._blobs[c] = f
+                self._offsets[c] = NpyAppender(off_path, np.int64, resume_rows=self.n_rows + 1)
+        self._ints = {
+            c: NpyAppender(self.out_dir / f"{c}.npy", np.int64, resume_rows=None if resume is None else self.n_rows)
+            for c in self._int_cols
+        }
+
+    def add(self, row: Dict[str, Any]) -> int:
+        """Append one row, returns its row id."""
+        for c in self._str_cols:
+            value = row.get(c)
+            data = ("" if value is None else str(value)).encode("utf-8")
+            self._blobs[c].write(data)
+            self._blob_bytes[c] += len(data)
+            self._offsets[c].append(np.asarray([self._blob_bytes[c]], dtype=np.int64))
+        for c in self._int_cols:
+            value = row.get(c)
+            self._ints[c].append(np.asarray([INT_NULL if value is None else int(value)], dtype=np.int64))
+        self.n_rows += 1
+        return self.n_rows - 1
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Sync everything written so far; the returned state can be passed back as resume=."""
+        for f in self._blobs.values():
+            f.flush()
+            os.fsync(f.fileno())
+        for a in list(self._offsets.values()) + list(self._ints.values()):
+            a.flush()
+        return {"n_rows": self.n_rows, "blob_bytes": dict(self._blob_bytes)}
+
+    def _close_files(self) -> None:
+        for f in self._blobs.values():
+            f.close()
+        for a in list(self._offsets.values()) + list(self._ints.values()):
+            a.close()
+
+    def abort(self) -> None:
+        """Close every file without writing the header: the store stays unopenable, a checkpoint stays resumable."""
+        self._close_files()
+
+    def close(self) -> Path:
+        self._close_files()
+
+        header = {"format": FORMAT, "n_rows": self.n_rows, "columns": {"text": "str", **self.columns}}
+        (self.out_dir / HEADER_NAME).write_text(json.dumps(header, indent=2), encoding="utf-8")
+        return self.out_dir
+
+    def __enter__(self) -> "DocstoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_docstore(out_dir: Path, rows: Iterable[Dict[str, Any]], columns: Dict[str, str] | None = None) -> Path:
+    with DocstoreWriter(out_dir, columns=columns) as w:
+        for row in rows:
+            w.add(row)
+    return Path(out_dir)
+
+
+def exists(path: Path) -> bool:
+    return (Path(path) / HEADER_NAME).exists()
+
+
+class _Blob:
+    """Memory-mapped string column."""
+
+    def __init__(self, bin_path: Path, offsets_path: Path) -> None:
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        self._f = bin_path.open("rb")
+        size = bin_path.stat().st_size
+        # mmap cannot map an empty file
+        self._buf = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __getitem__(self, i: int) -> str:
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self._buf[lo:hi].decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._f.close()
+
+
+class DocstoreColumn(Sequence):
+    """Lazy, read-only view of one column (drop-in for a list of values)."""
+
+    def __init__(self, store: "Docstore", name: str) -> None:
+        self._store = store
+        self._name = name
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._store.value(j, self._name) for j in range(*i.indices(len(self)))]
+        return self._store.value(int(i), self._name)
+
+
+class Docstore:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        header_path = self.path / HEADER_NAME
+        if not header_path.exists():
+            raise FileNotFoundError(f"Missing docstore header: {header_path}")
+        header = json.loads(header_path.read_text(encoding="utf-8"))
+        if header.get("format") != FORMAT:
+            raise ValueError(f"Unsupported docstore format {header.get('format')!r} in {self.path}")
+
+        self.n_rows = int(header["n_rows"])
+        self.columns: Dict[str, str] = header["columns"]
+        self._blobs: Dict[str, _Blob] = {}
+        self._ints: Dict[str, np.ndarray] = {}
+        for name, kind in self.columns.items():
+            if kind == "str":
+                self._blobs[name] = _Blob(self.path / f"{name}.bin", self.path / f"{name}.offsets.npy")
+            else:
+                self._ints[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    @classmethod
+    def open(cls, path: Path) -> "Docstore":
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def _check(self, i: int) -> None:
+        if not 0 <= i < self.n_rows:
+            raise IndexError(f"docstore row {i} out of range (n_rows={self.n_rows})")
+
+    def value(self, i: int, column: str) -> Any:
+        self._check(i)
+        if column in self._blobs:
+            return self._blobs[column][i]
+        v = int(self._ints[column][i])
+        return None if v == INT_NULL else v
+
+    def text(self, i: int) -> str:
+        return self.value(i, "text")
+
+    def get(self, i: int) -> Dict[str, Any]:
+        """Row i as a dict, same shape as a docstore.jsonl row."""
+        return {name: self.value(i, name) for name in self.columns}
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return self.get(int(i))
+
+    def get_many(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        return [self.get(int(i)) for i in ids]
+
+    def column(self, name: str) -> DocstoreColumn:
+        if name not in self.columns:
+            raise KeyError(f"docstore has no column '{name}' (columns: {list(self.columns)})")
+        return DocstoreColumn(self, name)
+
+    def close(self) -> None:
+        for b in self._blobs.values():
+            b.close()
@@ -0,0 +1,235 @@
+# indexing/embedding_cache.py
+# ---------------------------------------------------------
+# Content-addressed, persistent embedding cache shared by all builders.
+#
+# Key : (model name, normalize flag, sha256 of chunk text)
+#
+# Layout (one directory per model + normalize flag):
+#   <root>/<model slug>__norm<0|1>/
+#       shard_00000.npy ...  (n, d) float32, immutable once written
+#       index.npz            sorted sha256 keys + (shard, row) per key
+#
+# A build hashes its chunks, reads known vectors from the memory-mapped
+# shards and encodes only unseen texts, which land in one new shard.
+# Re-chunking or bumping INDEX_VERSION therefore only pays for new text.
+#
+# Concurrent builders: a shard id is reserved by creating its file with
+# O_EXCL and index.npz is replaced atomically, so two builds never write
+# the same shard. The last index write wins; entries it drops are simply
+# re-encoded by a later build.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from indexing.incremental import HASH_DTYPE, chunk_hashes
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "embeddings"
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_")
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        model_name: str,
+        normalized: bool = True,
+        root: Path = DEFAULT_CACHE_DIR,
+        autoflush: bool = True,
+    ) -> None:
+        """
+        autoflush=False keeps new vectors in memory until flush() (one shard +
+        one index write per flush) - for streaming builds that add many batches.
+        """
+        self.model_name = model_name
+        self.normalized = bool(normalized)
+        self.dir = Path(root) / f"{_slug(model_name)}__norm{int(self.normalized)}"
+        self.index_path = self.dir / "index.npz"
+
+        self.autoflush = bool(autoflush)
+        self._shards: Dict[int, np.ndarray] = {}
+        self._pending: Dict[bytes, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self._keys, self._locs = self._read_index()
+
+    # -----------------------------------------------------
+    # Index file: sorted keys + int64 locs (shard << 32 | row)
+    # -----------------------------------------------------
+
+    def _read_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.index_path.exists():
+            return np.zeros(0, dtype=HASH_DTYPE), np.zeros(0, dtype=np.int64)
+        with np.load(self.index_path, allow_pickle=False) as z:
+            return z["keys"].astype(HASH_DTYPE), z["locs"].astype(np.int64)
+
+    def _write_index(self) -> None:
+        fd, tmp = tempfile.mkstemp(prefix="index.", suffix=".tmp.npz", dir=self.dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, keys=self._keys, locs=self._locs)
+            os.replace(tmp, self.index_path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _new_shard(self) -> Tuple[int, BinaryIO]:
+        """Reserve the next free shard id (O_EXCL create: no other builder can get the same one)."""
+        shard_id = len(list(self.dir.glob("shard_*.npy")))
+        while True:
+            try:
+                fd = os.open(self.dir / f"shard_{shard_id:05d}.npy", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                shard_id += 1
+                continue
+            return shard_id, os.fdopen(fd, "wb")
+
+    def _shard(self, shard_id: int) -> np.ndarray:
+        arr = self._shards.get(shard_id)
+        if arr is None:
+            arr = np.load(self.dir / f"shard_{shard_id:05d}.npy", mmap_mode="r")
+            self._shards[shard_id] = arr
+        return arr
+
+    def __len__(self) -> int:
+        return int(self._keys.size)
+
+    # -----------------------------------------------------
+    # Lookup / store
+    # -----------------------------------------------------
+
+    def lookup(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(found mask, locs) for each hash; locs are only meaningful where found."""
+        hashes = np.asarray(hashes, dtype=HASH_DTYPE)
+        if self._keys.size == 0:
+            return np.zeros(hashes.size, dtype=bool), np.zeros(hashes.size, dtype=np.int64)
+        pos = np.searchsorted(self._keys, hashes)
+        pos_c = np.minimum(pos, self._keys.size - 1)
+        found = (pos < self._keys.size) & (self._keys[pos_c] == hashes)
+        return found, self._locs[pos_c]
+
+    def vectors(self, locs: np.ndarray) -> np.ndarray:
+        """Gather cached vectors, one shard at a time."""
+        locs = np.asarray(locs, dtype=np.int64)
+        shard_ids, rows = locs >> 32, locs & 0xFFFFFFFF
+        dim = int(self._shard(int(shard_ids[0])).shape[1]) if locs.size else 0
+        out = np.empty((locs.size, dim), dtype="float32")
+        for sid in np.unique(shard_ids):
+            sel = shard_ids == sid
+            out[sel] = self._shard(int(sid))[rows[sel]]
+        return out
+
+    def add(self, hashes: np.ndarray, vectors: np.ndarray) -> None:
+        """Store new vectors (immediately, or at the next flush() when autoflush is off)."""
+        hashes = np.asarray(hashes, dtype=HASH_DTYPE)
+        if self.autoflush:
+            self._publish(hashes, vectors)
+            return
+        for h, v in zip(hashes, np.asarray(vectors, dtype="float32")):
+            self._pending[bytes(h)] = v
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        keys = np.asarray(list(self._pending.keys()), dtype=HASH_DTYPE)
+        self._publish(keys, np.stack(list(self._pending.values())))
+        self._pending.clear()
+
+    def _publish(self, hashes: np.ndarray, vectors: np.ndarray) -> None:
+        """Persist vectors as one immutable shard, then publish them in the index."""
+        if hashes.size == 0:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        # pick up entries other builders published since we opened the cache
+        self._keys, self._locs = self._read_index()
+        found, _ = self.lookup(hashes)
+        hashes, vectors = hashes[~found], np.asarray(vectors, dtype="float32")[~found]
+        if hashes.size == 0:
+            return
+
+        shard_id, f = self._new_shard()
+        with f:
+            np.save(f, np.ascontiguousarray(vectors))
+
+        locs = (np.int64(shard_id) << 32) | np.arange(hashes.size, dtype=np.int64)
+        keys = np.concatenate([self._keys, hashes])
+        all_locs = np.concatenate([self._locs, locs])
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._locs = keys[order], all_locs[order]
+        self._write_index()
+
+    def encode(self, texts: Sequence[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        (N, d) float32 vectors for texts. Cached texts are read from the shards;
+        unseen texts (deduplicated) go to encode() in one call and are stored.
+        encode() must honour this cache's normalize flag.
+        """
+        texts = list(texts)
+        hashes = chunk_hashes(texts)
+        found, locs = self.lookup(hashes)
+        self.hits += int(found.sum())
+
+        if self._pending:
+            pending = [self._pending.get(bytes(h)) for h in hashes]
+            in_pending = np.asarray([v is not None for v in pending]) & ~found
+        else:
+            in_pending = np.zeros(len(texts), dtype=bool)
+        self.hits += int(in_pending.sum())
+
+        miss = np.flatnonzero(~found & ~in_pending)
+        if miss.size:
+            uniq, first, inverse = np.unique(hashes[miss], return_index=True, return_inverse=True)
+            self.misses += int(uniq.size)
+            new_vecs = np.asarray(encode([texts[miss[i]] for i in first]), dtype="float32")
+            self.add(uniq, new_vecs)
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+
+        cached = self.vectors(locs[found]) if found.any() else None
+        if cached is not None:
+            dim = cached.shape[1]
+        elif in_pending.any():
+            dim = pending[int(np.flatnonzero(in_pending)[0])].shape[0]
+        else:
+            dim = new_vecs.shape[1]
+        out = np.empty((len(texts), dim), dtype="float32")
+        if cached is not None:
+            out[found] = cached
+        if in_pending.any():
+            out[in_pending] = np.stack([pending[i] for i in np.flatnonzero(in_pending)])
+        if miss.size:
+            out[miss] = new_vecs[inverse]
+        return out
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "dir": str(self.dir),
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def cached_encode(
+    texts: Sequence[str],
+    model_name: str,
+    encode: Callable[[List[str]], np.ndarray],
+    normalized: bool = True,
+    root: Path = DEFAULT_CACHE_DIR,
+) -> np.ndarray:
+    """One-shot helper for builders: encode texts through the on-disk cache."""
+    cache = EmbeddingCache(model_name, normalized=normalized, root=root)
+    vecs = cache.encode(texts, encode)
+    s = cache.stats()
+    print(f"[EmbCache] {len(texts)} texts | cached={s['hits']} encoded={s['misses']} | {s['dir']}")
+    return vecs
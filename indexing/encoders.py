@@ -0,0 +1,243 @@
+# indexing/encoders.py
+# ---------------------------------------------------------
+# Query encoder backends for the dense path.
+#
+#   "torch"      SentenceTransformer.encode (default)
+#   "onnx"       ONNX Runtime, fp32 export of the same transformer
+#   "onnx-int8"  ONNX Runtime, dynamically int8-quantized weights
+#
+# Only QUERIES go through the selected backend. Document vectors (and
+# therefore the index, embeddings and caches on disk) are always built by
+# the torch model, so switching backends never changes the index format.
+#
+# The ONNX pipeline reproduces all-MiniLM-L6-v2's SentenceTransformer:
+#   tokenize -> BERT last_hidden_state -> masked mean pool -> L2 normalize
+# Exported models live under DEFAULT_ONNX_DIR/<model slug>/ and are created
+# on first use (or up front: python -m indexing.encoders --int8).
+# Check parity / latency with indexing/bench_encoders.py before switching.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_BACKEND = "torch"
+
+DEFAULT_ONNX_DIR = Path(__file__).resolve().parent.parent / ".cache" / "onnx"
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's max_seq_length
+ONNX_OPSET = 14
+
+
+def _l2_normalize(x: np.ndarray, eps: float = 1e-12) -> np.ndarray:
+    x = np.asarray(x, dtype="float32")
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), eps, None)
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_")
+
+
+def onnx_dir_for(model_name: str, root: Path = DEFAULT_ONNX_DIR) -> Path:
+    return Path(root) / _slug(model_name)
+
+
+# ---------------------------------------------------------
+# Backends: encode(texts) -> (N, d) float32, L2-normalized
+# ---------------------------------------------------------
+
+class TorchQueryEncoder:
+    backend = "torch"
+
+    def __init__(self, model) -> None:
+        self.model = model  # a loaded SentenceTransformer (shared with document encoding)
+
+    @property
+    def dim(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return _l2_normalize(self.model.encode(list(texts), convert_to_numpy=True))
+
+
+class OnnxQueryEncoder:
+    """all-MiniLM-style (mean pooled BERT) query encoder on ONNX Runtime."""
+
+    def __init__(
+        self,
+        model_name: str,
+        int8: bool = False,
+        root: Path = DEFAULT_ONNX_DIR,
+        threads: Optional[int] = None,
+        max_length: int = MAX_SEQ_LENGTH,
+    ) -> None:
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx query encoders need onnxruntime (pip install onnxruntime).") from e
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.backend = "onnx-int8" if int8 else "onnx"
+        self.max_length = int(max_length)
+
+        path = onnx_model_path(model_name, int8=int8, root=root)
+        if not path.exists():
+            export_onnx(model_name, root=root, int8=int8)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(path.parent))
+        self.dim = int(self.session.get_outputs()[0].shape[-1])
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        enc = self.tokenizer(
+            list(texts),
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        feeds = {name: enc[name].astype(np.int64) for name in self._input_names}
+        hidden = self.session.run(None, feeds)[0]                 # (N, L, d)
+        mask = enc["attention_mask"][:, :, None].astype("float32")
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return _l2_normalize(pooled)
+
+
+def load_query_encoder(
+    backend: str,
+    model_name: str,
+    model=None,
+    root: Path = DEFAULT_ONNX_DIR,
+    threads: Optional[int] = None,
+):
+    """Encoder for `backend`. "torch" wraps an already-loaded SentenceTransformer (model=...)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown query encoder '{backend}' (expected one of {BACKENDS})")
+    if backend == "torch":
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(model_name)
+        return TorchQueryEncoder(model)
+    return OnnxQueryEncoder(model_name, int8=backend == "onnx-int8", root=root, threads=threads)
+
+
+def cache_key(model_name: str, backend: str) -> str:
+    """
+    Query-cache namespace: torch keeps the plain model name (existing entries
+    stay valid); ONNX vectors differ slightly, so they get their own.
+    """
+    return model_name if backend == "torch" else f"{model_name}|{backend}"
+
+
+# ---------------------------------------------------------
+# Export
+# ---------------------------------------------------------
+
+def onnx_model_path(model_name: str, int8: bool = False, root: Path = DEFAULT_ONNX_DIR) -> Path:
+    return onnx_dir_for(model_name, root) / ("model.int8.onnx" if int8 else "model.onnx")
+
+
+def named_inputs_module(model, names: Sequence[str], output: str = "last_hidden_state"):
+    """Wrap a HF model so positional export inputs are passed by name (forward() order varies by version)."""
+    import torch
+
+    class _Export(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return getattr(self.model(**dict(zip(names, inputs)), return_dict=True), output)
+
+    return _Export().eval()
+
+
+def export_model_onnx(model, tokenizer, path: Path, output: str = "last_hidden_state", pair: bool = False) -> None:
+    """
+    Export a loaded HF model to `path` (via a temp file). `output` names the
+    model output to keep ("last_hidden_state", "logits"); pair=True traces
+    with a (query, text) pair so segment ids are exercised.
+    """
+    import torch
+
+    texts = (["what is the leave policy"], ["Employees get paid leave every year."]) if pair else (["what is the leave policy"],)
+    sample = tokenizer(*texts, return_tensors="pt")
+    names: List[str] = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "seq"} for n in names}
+    dynamic[output] = {0: "batch", 1: "seq"} if output == "last_hidden_state" else {0: "batch"}
+    tmp = path.with_name(path.name + ".tmp")
+    # the TorchScript exporter (newer torch defaults to the dynamo one)
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            named_inputs_module(model, names, output),
+            tuple(sample[n] for n in names),
+            str(tmp),
+            input_names=names,
+            output_names=[output],
+            dynamic_axes=dynamic,
+            opset_version=ONNX_OPSET,
+            **legacy,
+        )
+    tmp.replace(path)
+
+
+def quantize_onnx(fp32_path: Path, int8_path: Path) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print(f"[Encoders] Quantizing {fp32_path.name} -> {int8_path.name} (dynamic int8)...")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+
+def export_onnx(model_name: str, root: Path = DEFAULT_ONNX_DIR, int8: bool = False) -> Path:
+    """
+    Export the transformer under a SentenceTransformer to ONNX (+ its tokenizer),
+    and with int8=True a dynamically quantized copy. Returns the requested model path.
+    """
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir = onnx_dir_for(model_name, root)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = onnx_model_path(model_name, int8=False, root=root)
+
+    if not fp32_path.exists():
+        print(f"[Encoders] Exporting {model_name} to {fp32_path} ...")
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+        export_model_onnx(model, tokenizer, fp32_path)
+        tokenizer.save_pretrained(str(out_dir))
+
+    if not int8:
+        return fp32_path
+
+    int8_path = onnx_model_path(model_name, int8=True, root=root)
+    if not int8_path.exists():
+        quantize_onnx(fp32_path, int8_path)
+    return int8_path
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Export a query encoder to ONNX (optionally int8).")
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--int8", action="store_true", help="also write the int8-quantized model")
+    ap.add_argument("--out", type=Path, default=DEFAULT_ONNX_DIR)
+    args = ap.parse_args()
+    path = export_onnx(args.model, root=args.out, int8=args.int8)
+    print(f"[Encoders] Ready: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# indexing/incremental.py
+# ---------------------------------------------------------
+# Incremental index updates: re-embed only new / changed chunks.
+#
+# Every build stores, per chunk (row order), a sha256 of its text and a
+# stable chunk id; the FAISS index is an IndexIDMap2 keyed by those ids.
+# On the next build the new corpus is matched against the old one by hash:
+#   - text present before          -> keeps its id (wherever its row moved)
+#                                     and its vector stays in the index
+#   - text never seen before       -> new id, vector added
+#   - old text gone                -> its id is removed from the index
+# Inserting one chunk therefore touches one vector, not every later row.
+# Readers map FAISS ids back to rows with id_to_row().
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from indexing import ann
+
+HASH_DTYPE = "S64"  # sha256 hex digest
+ID_DTYPE = np.int64
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def chunk_hashes(texts: Sequence[str]) -> np.ndarray:
+    return np.asarray([content_hash(t) for t in texts], dtype=HASH_DTYPE)
+
+
+def save_hashes(path: Path, hashes: np.ndarray) -> None:
+    save_npy_atomic(path, np.asarray(hashes, dtype=HASH_DTYPE))
+
+
+def load_hashes(path: Path) -> np.ndarray | None:
+    path = Path(path)
+    if not path.exists():
+        return None
+    return np.load(path).astype(HASH_DTYPE)
+
+
+def save_ids(path: Path, ids: np.ndarray) -> None:
+    save_npy_atomic(path, np.asarray(ids, dtype=ID_DTYPE))
+
+
+def load_ids(path: Path) -> np.ndarray | None:
+    """Stable chunk ids (row order); None for builds from before ids were stored (id == row)."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return np.load(path).astype(ID_DTYPE)
+
+
+def id_to_row(ids: np.ndarray) -> np.ndarray:
+    """Dense lookup: lookup[faiss_id] = row, -1 for ids no longer in use."""
+    ids = np.asarray(ids, dtype=ID_DTYPE)
+    lookup = np.full(int(ids.max()) + 1 if ids.size else 0, -1, dtype=ID_DTYPE)
+    lookup[ids] = np.arange(ids.size, dtype=ID_DTYPE)
+    return lookup
+
+
+def save_npy_atomic(path: Path, arr: np.ndarray) -> None:
+    """np.save via a temp file + rename, so readers that memory-mapped the old file keep a valid mapping."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+@dataclass(frozen=True)
+class ChunkDiff:
+    n_old: int
+    n_new: int
+    reuse_from: np.ndarray   # (n_new,) old row holding the same text, -1 = must encode
+    ids: np.ndarray          # (n_new,) stable chunk id per new row
+    patch_rows: np.ndarray   # new rows whose vector must be added (under ids[row])
+    remove_ids: np.ndarray   # ids to drop from the index
+
+    @property
+    def encode_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.reuse_from < 0)
+
+    @property
+    def is_noop(self) -> bool:
+        return self.patch_rows.size == 0 and self.remove_ids.size == 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.n_old} -> {self.n_new} chunks | encode={self.encode_rows.size} "
+            f"reuse={int((self.reuse_from >= 0).sum())} add={self.patch_rows.size} remove={self.remove_ids.size}"
+        )
+
+
+def _occurrence(hashes: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """k for the k-th row (in row order) carrying its hash; order = stable argsort of hashes."""
+    sorted_h = hashes[order]
+    first = np.searchsorted(sorted_h, sorted_h, side="left")
+    k = np.empty(hashes.size, dtype=np.int64)
+    k[order] = np.arange(hashes.size, dtype=np.int64) - first
+    return k
+
+
+def diff_chunks(old_hashes: np.ndarray, new_hashes: np.ndarray, old_ids: np.ndarray | None = None) -> ChunkDiff:
+    """
+    Match new chunks to old ones by content hash. old_ids are the ids the old
+    rows were indexed under (None: id == row, builds from before ids were stored).
+    Duplicate texts pair up in row order: the k-th copy keeps the k-th old copy's id.
+    """
+    old_hashes = np.asarray(old_hashes, dtype=HASH_DTYPE)
+    new_hashes = np.asarray(new_hashes, dtype=HASH_DTYPE)
+    n_old, n_new = old_hashes.size, new_hashes.size
+    old_ids = np.arange(n_old, dtype=ID_DTYPE) if old_ids is None else np.asarray(old_ids, dtype=ID_DTYPE)
+    if old_ids.size != n_old:
+        raise ValueError(f"{old_ids.size} chunk ids for {n_old} chunk hashes")
+
+    # old rows sorted by (hash, row): copies of one text are contiguous, in row order
+    order = np.argsort(old_hashes, kind="stable")
+    sorted_old = old_hashes[order]
+    lo = np.searchsorted(sorted_old, new_hashes, side="left")
+    hi = np.searchsorted(sorted_old, new_hashes, side="right")
+    found = hi > lo
+
+    # vectors: any old copy of the text will do
+    reuse_from = np.full(n_new, -1, dtype=np.int64)
+    reuse_from[found] = order[lo[found]]
+
+    # ids: the k-th new copy takes the k-th old copy, extra copies get fresh ids
+    pos = lo + _occurrence(new_hashes, np.argsort(new_hashes, kind="stable"))
+    kept = pos < hi
+    matched_old = order[pos[kept]]
+
+    ids = np.empty(n_new, dtype=ID_DTYPE)
+    ids[kept] = old_ids[matched_old]
+    patch_rows = np.flatnonzero(~kept).astype(np.int64)
+    next_id = int(old_ids.max()) + 1 if n_old else 0
+    ids[patch_rows] = np.arange(next_id, next_id + patch_rows.size, dtype=ID_DTYPE)
+
+    still_used = np.zeros(n_old, dtype=bool)
+    still_used[matched_old] = True
+    remove_ids = old_ids[~still_used]
+    return ChunkDiff(n_old, n_new, reuse_from, ids, patch_rows, remove_ids)
+
+
+def assemble_embeddings(
+    diff: ChunkDiff,
+    old_emb: np.ndarray,
+    texts: Sequence[str],
+    encode: Callable[[List[str]], np.ndarray],
+) -> np.ndarray:
+    """
+    (n_new, d) float32 matrix; everything not copied is encoded in one call.
+    Reused rows are copied from old_emb only when it stores float32: copying
+    dequantized float16 / int8 rows would quantize them again on every update,
+    so those texts go to encode() as well (the builders' encode() serves them
+    at full precision from the embedding cache, indexing/embedding_cache.py).
+    """
+    dim = int(old_emb.shape[1])
+    emb = np.empty((diff.n_new, dim), dtype="float32")
+
+    copy = diff.reuse_from >= 0
+    if np.dtype(old_emb.dtype) != np.float32:
+        copy[:] = False
+    reuse = np.flatnonzero(copy)
+    if reuse.size:
+        emb[reuse] = old_emb[diff.reuse_from[reuse]]
+
+    todo = np.flatnonzero(~copy)
+    if todo.size:
+        emb[todo] = np.asarray(encode([texts[i] for i in todo]), dtype="float32")
+    return emb
+
+
+def patch_index(
+    index: faiss.Index,
+    emb: np.ndarray,
+    diff: ChunkDiff,
+    factory: str,
+) -> Tuple[faiss.Index, str]:
+    """
+    Apply the diff to an ID-mapped index in place. Indexes that cannot
+    remove ids (HNSW, or an older artifact without an IDMap) are rebuilt
+    from emb instead, which still needs no encoding.
+    Returns (index, "patched" | "rebuilt").
+    """
+    if ann.is_id_mapped(index) and ann.index_kind(index) != "hnsw":
+        if diff.remove_ids.size:
+            index.remove_ids(diff.remove_ids)
+        if diff.patch_rows.size:
+            index.add_with_ids(np.ascontiguousarray(emb[diff.patch_rows]), diff.ids[diff.patch_rows])
+        return index, "patched"
+    return ann.build_index(emb, factory, id_map=True, ids=diff.ids), "rebuilt"
@@ -1,24 +1,86 @@
 import json
 from pathlib import Path
 import faiss
+import numpy as np
+
+from indexing import incremental, quantize
+from indexing.docstore import Docstore, exists as docstore_exists, write_docstore
 
 FAISS_DIR = Path("ragcore_v2/data/indexes")
 INDEX_PATH = FAISS_DIR / "faiss.index"
 META_PATH = FAISS_DIR / "faiss_meta.json"
-DOCSTORE_PATH = FAISS_DIR / "docstore.jsonl"
+EMB_PATH = FAISS_DIR / "embeddings.npy"
+IDS_PATH = FAISS_DIR / "chunk_ids.npy"
+DOCSTORE_DIR = FAISS_DIR / "docstore"
+LEGACY_DOCSTORE_PATH = FAISS_DIR / "docstore.jsonl"
+
+
+def _convert_jsonl_docstore() -> None:
+    """One-time upgrade of an older build that only has docstore.jsonl."""
+    print(f"[Index] Converting {LEGACY_DOCSTORE_PATH} -> {DOCSTORE_DIR} (binary docstore)")
+
+    def rows():
+        with LEGACY_DOCSTORE_PATH.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    write_docstore(DOCSTORE_DIR, rows())
 
 
 def load_faiss_bundle():
+    """
+    Returns (faiss_index, meta, docstore). The docstore is memory-mapped
+    (indexing/docstore.py): opening it is O(1), rows decode on access.
+    """
     if not INDEX_PATH.exists():
         raise RuntimeError("Missing faiss.index. Run: python ragcore_v2/src/build_faiss_v2.py")
 
     if not META_PATH.exists():
         raise RuntimeError("Missing faiss_meta.json. Run: python ragcore_v2/src/build_faiss_v2.py")
 
-    if not DOCSTORE_PATH.exists():
-        raise RuntimeError("Missing docstore.jsonl. Run: python ragcore_v2/src/build_faiss_v2.py")
+    if not docstore_exists(DOCSTORE_DIR):
+        if not LEGACY_DOCSTORE_PATH.exists():
+            raise RuntimeError("Missing docstore/. Run: python ragcore_v2/src/build_faiss_v2.py")
+        _convert_jsonl_docstore()
 
-    index = faiss.read_index(str(INDEX_PATH))
     meta = json.loads(META_PATH.read_text(encoding="utf-8"))
+    storage = meta.get("emb_storage", quantize.DEFAULT_STORAGE)
+    if storage not in quantize.STORAGE_TYPES:
+        raise RuntimeError(
+            f"Index was built with unknown emb_storage '{storage}'. "
+            "Rebuild: python ragcore_v2/src/build_faiss_v2.py"
+        )
+    # SQfp16 / SQ8 indexes (meta["index_factory"]) deserialize like any other index
+    index = faiss.read_index(str(INDEX_PATH))
+    docstore = Docstore.open(DOCSTORE_DIR)
+
+    if len(docstore) != index.ntotal:
+        raise RuntimeError(
+            f"Docstore rows ({len(docstore)}) != FAISS vectors ({index.ntotal}). "
+            "Rebuild: python ragcore_v2/src/build_faiss_v2.py"
+        )
+
+    return index, meta, docstore
+
+
+def load_row_of_id(n_rows: int) -> np.ndarray:
+    """
+    FAISS id -> docstore row (incremental builds keep the ids of unchanged
+    chunks, so ids and rows drift apart). Builds without chunk_ids.npy use id == row.
+    """
+    ids = incremental.load_ids(IDS_PATH)
+    if ids is None:
+        ids = np.arange(n_rows)
+    if ids.size != n_rows:
+        raise RuntimeError(
+            f"chunk_ids.npy rows ({ids.size}) != docstore rows ({n_rows}). "
+            "Rebuild: python ragcore_v2/src/build_faiss_v2.py"
+        )
+    return incremental.id_to_row(ids)
+
 
-    return index, meta, DOCSTORE_PATH
+def load_embeddings(meta: dict):
+    """Memory-mapped embeddings.npy, read according to meta["emb_storage"] (float32 / float16 / int8)."""
+    return quantize.load_embeddings(EMB_PATH, meta.get("emb_storage", quantize.DEFAULT_STORAGE))
@@ -0,0 +1,95 @@
+# indexing/npy_append.py
+# ---------------------------------------------------------
+# Append-only .npy writer for streaming builds.
+#
+# The file is a regular .npy whose header is padded to a fixed size, so
+# the shape can be rewritten in place as rows are appended. After every
+# flush() the file is a valid .npy (np.load(..., mmap_mode="r") works),
+# which is what checkpoint / resume relies on.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import ast
+import os
+import struct
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+_MAGIC = b"\x93NUMPY\x01\x00"
+HEADER_BYTES = 128  # total header size (multiple of 64, as numpy writes it)
+
+
+def _header(dtype: np.dtype, shape: Tuple[int, ...]) -> bytes:
+    d = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.lib.format.dtype_to_descr(dtype), tuple(shape))
+    body_len = HEADER_BYTES - len(_MAGIC) - 2
+    if len(d) + 1 > body_len:
+        raise ValueError(f"npy header too long for shape {shape}")
+    return _MAGIC + struct.pack("<H", body_len) + d.encode("latin1") + b" " * (body_len - len(d) - 1) + b"\n"
+
+
+def _read_header(path: Path) -> Tuple[np.dtype, Tuple[int, ...]]:
+    with Path(path).open("rb") as f:
+        head = f.read(HEADER_BYTES)
+    if not head.startswith(_MAGIC) or struct.unpack("<H", head[8:10])[0] != HEADER_BYTES - 10:
+        raise ValueError(f"{path} was not written by NpyAppender")
+    d = ast.literal_eval(head[10:].decode("latin1").strip())
+    return np.dtype(d["descr"]), tuple(d["shape"])
+
+
+class NpyAppender:
+    def __init__(self, path: Path, dtype, row_shape: Tuple[int, ...] = (), resume_rows: int | None = None) -> None:
+        """
+        Open path for appending rows of row_shape. resume_rows=None starts a
+        new file; resume_rows=n reopens an existing one and drops anything
+        written after row n (the last checkpoint).
+        """
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(int(x) for x in row_shape)
+        self._row_bytes = int(self.dtype.itemsize * int(np.prod(self.row_shape, dtype=np.int64)))
+
+        if resume_rows is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._f = self.path.open("w+b")
+            self.rows = 0
+            self._f.write(_header(self.dtype, self.shape))
+        else:
+            dtype_on_disk, shape_on_disk = _read_header(self.path)
+            if dtype_on_disk != self.dtype or tuple(shape_on_disk[1:]) != self.row_shape:
+                raise ValueError(f"{self.path}: on-disk {dtype_on_disk}{shape_on_disk} does not match {self.dtype}{self.row_shape}")
+            self._f = self.path.open("r+b")
+            self.rows = int(resume_rows)
+            self._f.truncate(HEADER_BYTES + self.rows * self._row_bytes)
+            self._f.seek(0, os.SEEK_END)
+            self._write_header()
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return (self.rows,) + self.row_shape
+
+    def append(self, arr) -> None:
+        arr = np.ascontiguousarray(arr, dtype=self.dtype)
+        if arr.shape[1:] != self.row_shape:
+            raise ValueError(f"{self.path}: expected rows of shape {self.row_shape}, got {arr.shape[1:]}")
+        self._f.write(arr.tobytes())
+        self.rows += int(arr.shape[0])
+
+    def _write_header(self) -> None:
+        pos = self._f.tell()
+        self._f.seek(0)
+        self._f.write(_header(self.dtype, self.shape))
+        self._f.seek(pos)
+
+    def flush(self) -> None:
+        """Publish the current row count in the header and sync to disk."""
+        self._write_header()
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
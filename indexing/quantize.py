@@ -0,0 +1,175 @@
+# indexing/quantize.py
+# ---------------------------------------------------------
+# Quantized embedding storage: float32 (default), float16, int8.
+#
+# One option ("emb_storage", recorded in the index meta) drives both:
+#   - the FAISS codes: "Flat" -> "SQfp16" / "SQ8", "IVF1024,Flat" ->
+#     "IVF1024,SQfp16" / "IVF1024,SQ8", "HNSW32" -> "HNSW32,SQ8" ...
+#     (see storage_factory; PQ factories are already compressed, unchanged)
+#   - the embedding file next to the index:
+#       float32   <name>.npy  (N, d) float32
+#       float16   <name>.npy  (N, d) float16
+#       int8      <name>.npy  (N, d) int8 codes
+#                 <name>.scale.npy (d,) float32, x ~= code * scale
+#                 (symmetric, per dimension: scale = max|x| / 127)
+#
+# load_embeddings(path, storage) returns something that reads like the
+# float32 matrix (shape, row indexing / slicing -> float32, @ query) and
+# stays memory-mapped.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+DEFAULT_STORAGE = "float32"
+
+_SQ_CODES = {"float16": "SQfp16", "int8": "SQ8"}
+_CHUNK_ROWS = 65536
+
+
+def check_storage(storage: str) -> str:
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown embedding storage '{storage}' (expected one of {STORAGE_TYPES})")
+    return storage
+
+
+def storage_factory(factory: str, storage: str = DEFAULT_STORAGE) -> str:
+    """FAISS factory string storing vectors as `storage` (float32: unchanged)."""
+    check_storage(storage)
+    if storage == "float32":
+        return factory
+    code = _SQ_CODES[storage]
+    parts = factory.split(",")
+    if parts[-1] == "Flat":
+        parts[-1] = code                      # "Flat", "IVF1024,Flat", "HNSW32,Flat"
+    elif re.fullmatch(r"HNSW\d+", parts[-1]):
+        parts.append(code)                    # "HNSW32" -> "HNSW32,SQ8"
+    # anything else (PQ / SQ codes) already picks its own encoding
+    return ",".join(parts)
+
+
+def scale_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.stem + ".scale.npy")
+
+
+# ---------------------------------------------------------
+# Writing (chunked, so a memory-mapped float32 input is never fully loaded)
+# ---------------------------------------------------------
+
+def int8_scale(vectors: np.ndarray) -> np.ndarray:
+    """Per-dimension symmetric scale (max|x| / 127), zero dims get scale 1."""
+    amax = np.zeros(int(vectors.shape[1]), dtype="float32")
+    for lo in range(0, int(vectors.shape[0]), _CHUNK_ROWS):
+        amax = np.maximum(amax, np.abs(np.asarray(vectors[lo : lo + _CHUNK_ROWS], dtype="float32")).max(axis=0))
+    return np.where(amax > 0, amax / 127.0, 1.0).astype("float32")
+
+
+def quantize_int8(vectors: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    x = np.asarray(vectors, dtype="float32") / scale
+    return np.clip(np.rint(x), -127, 127).astype(np.int8)
+
+
+def _write_npy_tmp(path: Path, vectors: np.ndarray, dtype, convert) -> Path:
+    """Write <path>.tmp chunk by chunk; the caller renames it into place."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=tuple(vectors.shape))
+    for lo in range(0, int(vectors.shape[0]), _CHUNK_ROWS):
+        out[lo : lo + _CHUNK_ROWS] = convert(vectors[lo : lo + _CHUNK_ROWS])
+    out.flush()
+    del out
+    return tmp
+
+
+def save_embeddings(path: Path, vectors: np.ndarray, storage: str = DEFAULT_STORAGE) -> None:
+    """
+    Write (N, d) float32 vectors in `storage` format, via temp files + rename
+    (readers that memory-mapped the old files keep a valid mapping). int8:
+    both temp files are written first, then the scale is renamed in and the
+    codes last, so the codes rename publishes the pair.
+    """
+    check_storage(storage)
+    path = Path(path)
+    if storage == "int8":
+        scale = int8_scale(vectors)
+        codes_tmp = _write_npy_tmp(path, vectors, np.int8, lambda rows: quantize_int8(rows, scale))
+        scale_tmp = scale_path(path).with_name(scale_path(path).name + ".tmp")
+        with scale_tmp.open("wb") as f:
+            np.save(f, scale)
+        os.replace(scale_tmp, scale_path(path))
+        os.replace(codes_tmp, path)
+        return
+    os.replace(_write_npy_tmp(path, vectors, storage, lambda rows: np.asarray(rows, dtype=storage)), path)
+    scale_path(path).unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------
+# Reading
+# ---------------------------------------------------------
+
+class Int8Embeddings:
+    """Memory-mapped int8 codes + per-dimension scale, read as float32."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.codes = np.load(self.path, mmap_mode="r")
+        self.scale = np.load(scale_path(self.path)).astype("float32")
+        if self.codes.dtype != np.int8 or self.codes.ndim != 2 or self.scale.shape != (self.codes.shape[1],):
+            raise ValueError(f"{self.path} is not an int8 embedding file with a matching scale")
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def dtype(self):
+        return self.codes.dtype
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def __getitem__(self, rows) -> np.ndarray:
+        return self.codes[rows].astype("float32") * self.scale
+
+    def __matmul__(self, q: np.ndarray) -> np.ndarray:
+        """Scores against a (d,) or (d, m) query: codes @ (scale * q), chunk by chunk."""
+        qs = np.asarray(q, dtype="float32")
+        qs = qs * (self.scale if qs.ndim == 1 else self.scale[:, None])
+        out = np.empty((len(self),) + qs.shape[1:], dtype="float32")
+        for lo in range(0, len(self), _CHUNK_ROWS):
+            out[lo : lo + _CHUNK_ROWS] = self.codes[lo : lo + _CHUNK_ROWS].astype("float32") @ qs
+        return out
+
+    def __array__(self, dtype=None):
+        out = self[:]
+        return out if dtype is None else out.astype(dtype)
+
+    def nbytes_on_disk(self) -> int:
+        return self.path.stat().st_size + scale_path(self.path).stat().st_size
+
+
+def load_embeddings(path: Path, storage: str = DEFAULT_STORAGE):
+    """Memory-mapped reader for an embedding file written by save_embeddings."""
+    check_storage(storage)
+    if storage == "int8":
+        return Int8Embeddings(path)
+    emb = np.load(path, mmap_mode="r")
+    if emb.dtype != np.dtype(storage):
+        raise ValueError(f"{path} holds {emb.dtype}, index meta says {storage}")
+    return emb
+
+
+def storage_meta(storage: str) -> Dict[str, Any]:
+    return {"emb_storage": check_storage(storage)}
@@ -0,0 +1,142 @@
+# indexing/query_cache.py
+# ---------------------------------------------------------
+# In-process LRU cache of normalized query embeddings.
+#
+# Key   : (model name, normalized query text)
+# Value : (d,) float32 L2-normalized vector
+#
+# One shared instance (shared_cache()) serves every retriever in the
+# process: legacy dense_search / dense_scores_all and ragcore_v2's
+# embed_query. Keys carry the model name, so retrievers on different
+# models never see each other's vectors.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_MAX_SIZE = 1024
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key form of a query: stripped, inner whitespace collapsed.
+    Case is kept, since a cased encoder would embed "HR" and "hr" differently.
+    """
+    return " ".join((text or "").split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query vectors with hit / miss / eviction counters."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.max_size = int(max_size)
+        self._data: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, model_name: str, query: str) -> Optional[np.ndarray]:
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, model_name: str, query: str, vec: np.ndarray) -> None:
+        if self.max_size <= 0:
+            return
+        key = (model_name, normalize_query(query))
+        vec = np.array(vec, dtype="float32").reshape(-1)
+        vec.setflags(write=False)  # shared between callers
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            self._evict()
+
+    def get_or_encode(
+        self,
+        model_name: str,
+        queries: Sequence[str],
+        encode: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        (N, d) float32 vectors for queries. Misses (deduplicated by key) go
+        to encode() in one call, which must return L2-normalized (M, d) rows.
+        The returned array is a fresh copy the caller may modify in place.
+        """
+        queries = list(queries)
+        found: List[Optional[np.ndarray]] = [self.get(model_name, q) for q in queries]
+
+        todo: Dict[str, List[int]] = {}
+        for i, vec in enumerate(found):
+            if vec is None:
+                todo.setdefault(normalize_query(queries[i]), []).append(i)
+
+        if todo:
+            # encode the first spelling seen for each key
+            texts = [queries[rows[0]] for rows in todo.values()]
+            encoded = np.asarray(encode(texts), dtype="float32").reshape(len(texts), -1)
+            for (rows, vec) in zip(todo.values(), encoded):
+                self.put(model_name, queries[rows[0]], vec)
+                for i in rows:
+                    found[i] = vec
+
+        if not found:
+            return np.zeros((0, 0), dtype="float32")
+        return np.stack(found).astype("float32")
+
+    def resize(self, max_size: int) -> None:
+        with self._lock:
+            self.max_size = int(max_size)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _evict(self) -> None:
+        # caller holds the lock
+        while len(self._data) > max(self.max_size, 0):
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+_shared: QueryEmbeddingCache | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache(max_size: int | None = None) -> QueryEmbeddingCache:
+    """Process-wide cache. Passing max_size resizes it (0 disables caching)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = QueryEmbeddingCache(DEFAULT_MAX_SIZE if max_size is None else max_size)
+        elif max_size is not None and max_size != _shared.max_size:
+            _shared.resize(max_size)
+        return _shared
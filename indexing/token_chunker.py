@@ -0,0 +1,132 @@
+# indexing/token_chunker.py
+# ---------------------------------------------------------
+# Token-window chunking without the encode -> decode round trip.
+#
+# The fast (Rust) tokenizer returns a (start, end) character span per
+# token. A window of tokens [i, j) is then just
+#     text[offsets[i][0] : offsets[j - 1][1]]
+# i.e. a slice of the ORIGINAL text: casing, accents and whitespace are
+# kept exactly, and no decode() is needed.
+#
+# Documents are tokenized in batches (one Rust call per batch) and, with
+# workers > 1, batches are spread over a process pool. Output order always
+# matches input order.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Deque, Iterable, Iterator, List, Sequence, Tuple
+
+TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_TOKENS = 250
+OVERLAP = 80
+BATCH_SIZE = 64  # documents per tokenizer call (and per worker task)
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(name: str = TOKENIZER_NAME):
+    from transformers import AutoTokenizer
+
+    tok = AutoTokenizer.from_pretrained(name, use_fast=True)
+    if not tok.is_fast:
+        raise ValueError(f"Tokenizer '{name}' has no fast implementation (offset mapping needs one).")
+    return tok
+
+
+def token_spans(offsets: Sequence[Tuple[int, int]], max_tokens: int = MAX_TOKENS, overlap: int = OVERLAP) -> List[Tuple[int, int]]:
+    """Character spans of the sliding token windows (same windows as sliding_window_chunk)."""
+    if overlap >= max_tokens:
+        raise ValueError(f"overlap ({overlap}) must be smaller than max_tokens ({max_tokens})")
+    step = max_tokens - overlap
+    n = len(offsets)
+    spans = []
+    for start in range(0, n, step):
+        end = min(start + max_tokens, n)
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+    return spans
+
+
+def chunk_batch(
+    texts: Sequence[str],
+    max_tokens: int = MAX_TOKENS,
+    overlap: int = OVERLAP,
+    tokenizer_name: str = TOKENIZER_NAME,
+) -> List[List[str]]:
+    """Chunks for each text, from one batched tokenizer call."""
+    texts = list(texts)
+    if not texts:
+        return []
+    enc = get_tokenizer(tokenizer_name)(
+        texts,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+        verbose=False,  # no "sequence longer than model max" warning, we window it ourselves
+    )
+    out = []
+    for text, offsets in zip(texts, enc["offset_mapping"]):
+        chunks = [text[lo:hi].strip() for lo, hi in token_spans(offsets, max_tokens, overlap)]
+        out.append([c for c in chunks if c])
+    return out
+
+
+def init_worker() -> None:
+    # the pool already gives one process per core; nested Rust threads only contend
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+def _chunk_task(args) -> List[List[str]]:
+    return chunk_batch(*args)
+
+
+def _batches(texts: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for t in texts:
+        batch.append(t)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_chunked(
+    texts: Iterable[str],
+    max_tokens: int = MAX_TOKENS,
+    overlap: int = OVERLAP,
+    tokenizer_name: str = TOKENIZER_NAME,
+    workers: int = 1,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[List[str]]:
+    """Yield the chunk list of each input text, in input order."""
+    tasks = ((b, max_tokens, overlap, tokenizer_name) for b in _batches(texts, batch_size))
+    if workers <= 1:
+        for task in tasks:
+            yield from _chunk_task(task)
+        return
+
+    # at most 2 batches per worker in flight, so a streamed input stays streamed
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        pending: Deque = deque()
+        for task in tasks:
+            pending.append(pool.submit(_chunk_task, task))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def chunk_texts(
+    texts: Iterable[str],
+    max_tokens: int = MAX_TOKENS,
+    overlap: int = OVERLAP,
+    tokenizer_name: str = TOKENIZER_NAME,
+    workers: int = 1,
+    batch_size: int = BATCH_SIZE,
+) -> List[List[str]]:
+    return list(iter_chunked(texts, max_tokens, overlap, tokenizer_name, workers, batch_size))
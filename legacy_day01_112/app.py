@@ -1,29 +1,151 @@
 # app.py
 # app.py
 
-from fastapi import FastAPI
-from pydantic import BaseModel
-
-from retriever import answer_query  # import from retriever.py
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
 
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 
-app = FastAPI(title="Dummy-Book RAG API")
+from retriever import answer_query  # import from retriever.py
+from retriever import query_cache_stats, rerank_batcher_stats, rerank_cache_stats
+from run_query import run_query, run_query_batch
+from warmup import WARMUP_ON_STARTUP, Warmup
+
+# run_query is CPU-bound (encoder, FAISS, BM25, cross-encoder): it runs on a
+# bounded thread pool so the event loop keeps serving /health, /ready, ...
+QUERY_WORKERS = 4  # pipeline runs in parallel (torch / ORT release the GIL)
+QUERY_MAX_INFLIGHT = 32  # running + queued; beyond this /query/run answers 503
+QUERY_BATCH_MAX = 256  # queries per /query/batch request (one pool slot per batch)
+
+
+class QueryPool:
+    """Thread pool + admission limit for the pipeline endpoints."""
+
+    def __init__(self, workers: int = QUERY_WORKERS, max_inflight: int = QUERY_MAX_INFLIGHT) -> None:
+        if workers < 1 or max_inflight < workers:
+            raise ValueError("need workers >= 1 and max_inflight >= workers")
+        self.workers = int(workers)
+        self.max_inflight = int(max_inflight)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="query")
+        # a slot is released by the executor future's done-callback (worker
+        # thread), not by the awaiting request: a cancelled request whose
+        # pipeline is still running keeps its slot until the thread finishes
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            admitted = self.inflight < self.max_inflight
+            if admitted:
+                self.inflight += 1
+            else:
+                self.rejected += 1
+        if not admitted:
+            raise HTTPException(status_code=503, detail="Too many queries in flight", headers={"Retry-After": "1"})
+        try:
+            fut = self.executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(None)
+            raise
+        fut.add_done_callback(self._release)
+        return await asyncio.wrap_future(fut)
+
+    def _release(self, fut: Optional[Future]) -> None:
+        with self._lock:
+            self.inflight -= 1
+            if fut is not None and not fut.cancelled():
+                self.completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_inflight": self.max_inflight,
+                "inflight": self.inflight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+warmup = Warmup()
+query_pool = QueryPool()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models + run every route in the background; /ready flips when done
+    if WARMUP_ON_STARTUP:
+        warmup.start()
+    yield
+    query_pool.shutdown()
+
+
+app = FastAPI(title="Dummy-Book RAG API", lifespan=lifespan)
 
 
 class QueryRequest(BaseModel):
     query: str
 
 
+class RunQueryRequest(BaseModel):
+    """run_query arguments (same defaults)."""
+
+    query: str = Field(..., min_length=1)
+    top_k: int = Field(5, ge=1, le=50)
+    alpha: float = Field(0.2, ge=0.0, le=1.0)
+    use_reranker: bool = True
+    cascade: Optional[bool] = None  # None = engine default (RERANK_CASCADE)
+
+
+class BatchQueryRequest(BaseModel):
+    queries: List[RunQueryRequest] = Field(..., min_length=1, max_length=QUERY_BATCH_MAX)
+
+
 @app.get("/health")
 def health():
     """Simple health check endpoint."""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness check: 200 once the startup warm-up (model loads + one pass
+    through every run_query route) has finished, 503 until then or if it
+    failed. The body carries the warm-up timings (see warmup.py).
+    """
+    status = warmup.status()
+    if not WARMUP_ON_STARTUP:
+        status.update(ready=True, state="disabled")
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+def metrics():
+    """Reranker micro-batching (batch size, queue wait) and cache counters."""
+    return {
+        "rerank_batcher": rerank_batcher_stats(),
+        "rerank_cache": rerank_cache_stats(),
+        "query_cache": query_cache_stats(),
+        "query_pool": query_pool.stats(),
+    }
+
+
 @app.post("/query")
 def query(req: QueryRequest):
     """
-    RAG query endpoint.
+    RAG query endpoint (debug: formatted string from answer_query; see /query/run).
 
     Request JSON:
         { "query": "your question here" }
@@ -35,5 +157,50 @@ def query(req: QueryRequest):
     return {"answer": result}
 
 
+@app.post("/query/run")
+async def query_run(req: RunQueryRequest):
+    """
+    Production query endpoint: router -> retrieval (+ rerank) -> gates ->
+    answer builder (run_query.py), on the bounded query pool.
+
+    Request JSON:
+        { "query": "...", "top_k": 5, "alpha": 0.2, "use_reranker": true, "cascade": null }
 
+    Response JSON: the run_query envelope
+        { "query", "route", "decision": "ANSWER" | "ABSTAIN", "answer", "results", ... }
 
+    503 (Retry-After) when QUERY_MAX_INFLIGHT queries are already running / queued.
+    """
+    query = req.query.strip()
+    if not query:
+        raise HTTPException(status_code=422, detail="Empty query")
+    return await query_pool.run(
+        run_query,
+        query,
+        top_k=req.top_k,
+        alpha=req.alpha,
+        use_reranker=req.use_reranker,
+        cascade=req.cascade,
+    )
+
+
+@app.post("/query/batch")
+async def query_batch(req: BatchQueryRequest):
+    """
+    Batch query endpoint: run_query for up to QUERY_BATCH_MAX queries with
+    shared batched encoding, FAISS search, BM25 scoring and reranking
+    (run_query_batch), as one job on the query pool.
+
+    Request JSON:
+        { "queries": [ { "query": "...", "top_k": 5, "alpha": 0.2, "use_reranker": true }, ... ] }
+
+    Response JSON: one run_query envelope per query, in request order
+        { "count": N, "envelopes": [ { "query", "route", "decision", ... }, ... ] }
+    """
+    requests = [r.model_dump() for r in req.queries]
+    for i, r in enumerate(requests):
+        r["query"] = r["query"].strip()
+        if not r["query"]:
+            raise HTTPException(status_code=422, detail=f"Empty query at index {i}")
+    envelopes = await query_pool.run(run_query_batch, requests)
+    return {"count": len(envelopes), "envelopes": envelopes}
@@ -0,0 +1,242 @@
+# bm25_index.py
+# ---------------------------------------------------------
+# Okapi BM25 inverted index (replaces the TF-IDF "BM25_MATRIX")
+#
+# Layout (all numpy, CSR-style by term):
+#   terms      : (V,)   sorted vocabulary
+#   offsets    : (V+1,) postings of term t live in [offsets[t], offsets[t+1])
+#   doc_ids    : (P,)   int32 doc rows, ascending inside each term
+#   impacts    : (P,)   float32 precomputed BM25 contribution of (term, doc)
+#   max_impact : (V,)   float32 upper bound per term (for MaxScore pruning)
+#
+# Query time touches only the postings of the query terms. Top-k uses
+# MaxScore: terms are processed by descending upper bound; once the
+# remaining upper bounds cannot beat the current k-th score, the rest
+# of the lists are only probed for existing candidates.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+import re
+
+import numpy as np
+
+# Same token rule as sklearn's default (words of 2+ chars), lowercased
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class BM25Index:
+    def __init__(
+        self,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        impacts: np.ndarray,
+        max_impact: np.ndarray,
+        n_docs: int,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        avgdl: float = 0.0,
+        corpus_hash: str | None = None,
+    ) -> None:
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.max_impact = max_impact
+        self.n_docs = int(n_docs)
+        self.k1 = float(k1)
+        self.b = float(b)
+        self.avgdl = float(avgdl)
+        self.corpus_hash = corpus_hash
+        self.vocab: Dict[str, int] = {str(t): i for i, t in enumerate(terms)}
+
+    # -----------------------------------------------------
+    # Build / persist
+    # -----------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        documents: Sequence[str],
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        corpus_hash: str | None = None,
+    ) -> "BM25Index":
+        n_docs = len(documents)
+        tfs = [Counter(tokenize(d)) for d in documents]
+        doc_len = np.array([sum(c.values()) for c in tfs], dtype=np.float32)
+        avgdl = float(doc_len.mean()) if n_docs and doc_len.sum() > 0 else 1.0
+
+        terms = np.array(sorted({t for c in tfs for t in c}), dtype=str)
+        vocab = {str(t): i for i, t in enumerate(terms)}
+
+        rows: List[int] = []
+        cols: List[int] = []
+        tf_vals: List[int] = []
+        for doc_i, c in enumerate(tfs):
+            for t, tf in c.items():
+                rows.append(vocab[t])
+                cols.append(doc_i)
+                tf_vals.append(tf)
+
+        row_arr = np.asarray(rows, dtype=np.int64)
+        col_arr = np.asarray(cols, dtype=np.int32)
+        tf_arr = np.asarray(tf_vals, dtype=np.float32)
+
+        # group postings by term, doc ids ascending inside each term
+        order = np.lexsort((col_arr, row_arr))
+        row_arr, col_arr, tf_arr = row_arr[order], col_arr[order], tf_arr[order]
+
+        df = np.bincount(row_arr, minlength=len(terms)).astype(np.float32)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(df.astype(np.int64), out=offsets[1:])
+
+        # Lucene-style idf (always > 0, which MaxScore relies on)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1.0 - b + b * doc_len[col_arr] / avgdl)
+        impacts = (idf[row_arr] * tf_arr * (k1 + 1.0) / (tf_arr + norm)).astype(np.float32)
+
+        if len(terms):
+            max_impact = np.maximum.reduceat(impacts, offsets[:-1]).astype(np.float32)
+        else:
+            max_impact = np.zeros(0, dtype=np.float32)
+
+        return cls(terms, offsets, col_arr, impacts, max_impact, n_docs, k1, b, avgdl, corpus_hash)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            np.savez(
+                f,
+                terms=self.terms,
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                impacts=self.impacts,
+                max_impact=self.max_impact,
+                params=np.array([self.n_docs, self.k1, self.b, self.avgdl], dtype=np.float64),
+                corpus_hash=np.array(self.corpus_hash or ""),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(Path(path), allow_pickle=False) as z:
+            n_docs, k1, b, avgdl = (float(x) for x in z["params"])
+            return cls(
+                terms=z["terms"],
+                offsets=z["offsets"],
+                doc_ids=z["doc_ids"],
+                impacts=z["impacts"],
+                max_impact=z["max_impact"],
+                n_docs=int(n_docs),
+                k1=k1,
+                b=b,
+                avgdl=avgdl,
+                corpus_hash=str(z["corpus_hash"]) or None,
+            )
+
+    # -----------------------------------------------------
+    # Query
+    # -----------------------------------------------------
+
+    def _query_terms(self, query: str) -> List[int]:
+        seen = []
+        for tok in tokenize(query):
+            t = self.vocab.get(tok)
+            if t is not None and t not in seen:
+                seen.append(t)
+        return seen
+
+    def _postings(self, t: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = self.offsets[t], self.offsets[t + 1]
+        return self.doc_ids[lo:hi], self.impacts[lo:hi]
+
+    def score_all(self, query: str) -> np.ndarray:
+        """Exhaustive (N_docs,) score vector, for debug paths that need every doc."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for t in self._query_terms(query):
+            ids, imp = self._postings(t)
+            scores[ids] += imp
+        return scores
+
+    def search(self, query: str, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact BM25 top-k with MaxScore pruning.
+        Returns (doc_rows, scores), best first, always min(top_k, n_docs) rows:
+        when fewer docs match, the rest is zero-filled with non-matching rows
+        (lowest row first), like the old dense lexical scorer. Those zeros are
+        part of the hybrid candidate set and its min-max normalization.
+        """
+        if top_k <= 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        terms = self._query_terms(query)
+        if not terms:
+            return self._zero_fill(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), top_k)
+
+        terms_arr = np.asarray(terms, dtype=np.int64)
+        order = terms_arr[np.argsort(-self.max_impact[terms_arr], kind="stable")]
+        ub = self.max_impact[order].astype(np.float64)
+        rest_ub = np.concatenate([np.cumsum(ub[::-1])[::-1], [0.0]])  # rest_ub[m] = sum(ub[m:])
+
+        cand_ids = np.zeros(0, dtype=np.int32)
+        cand_scores = np.zeros(0, dtype=np.float64)
+
+        # 1) Essential lists: union their postings into the candidate set
+        m = 0
+        while m < len(order):
+            if cand_ids.size >= top_k:
+                theta = np.partition(cand_scores, cand_scores.size - top_k)[cand_scores.size - top_k]
+                if rest_ub[m] < theta:
+                    break
+            ids_t, imp_t = self._postings(int(order[m]))
+            if cand_ids.size == 0:
+                # postings are already unique and sorted by doc row
+                cand_ids, cand_scores = ids_t, imp_t.astype(np.float64)
+                m += 1
+                continue
+            all_ids = np.concatenate([cand_ids, ids_t])
+            all_scores = np.concatenate([cand_scores, imp_t.astype(np.float64)])
+            cand_ids, inv = np.unique(all_ids, return_inverse=True)
+            cand_scores = np.bincount(inv, weights=all_scores, minlength=cand_ids.size)
+            m += 1
+
+        # 2) Non-essential lists: no new doc can reach top-k, only probe candidates
+        if m < len(order):
+            theta = np.partition(cand_scores, cand_scores.size - top_k)[cand_scores.size - top_k]
+            keep = cand_scores + rest_ub[m] >= theta
+            cand_ids, cand_scores = cand_ids[keep], cand_scores[keep]
+            for t in order[m:]:
+                ids_t, imp_t = self._postings(int(t))
+                pos = np.minimum(np.searchsorted(ids_t, cand_ids), ids_t.size - 1)
+                hit = ids_t[pos] == cand_ids
+                cand_scores[hit] += imp_t[pos[hit]]
+
+        # 3) Final top-k (ties broken by doc row for stable output)
+        if cand_ids.size > top_k:
+            theta = np.partition(cand_scores, cand_scores.size - top_k)[cand_scores.size - top_k]
+            sel = cand_scores >= theta
+            cand_ids, cand_scores = cand_ids[sel], cand_scores[sel]
+        rank = np.lexsort((cand_ids, -cand_scores))[:top_k]
+        return self._zero_fill(cand_ids[rank], cand_scores[rank].astype(np.float32), top_k)
+
+    def _zero_fill(self, rows: np.ndarray, scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        need = min(top_k, self.n_docs) - rows.size
+        if need <= 0:
+            return rows, scores
+        # the first rows.size + need rows hold at least `need` rows not already returned
+        fill = np.setdiff1d(np.arange(rows.size + need, dtype=np.int32), rows, assume_unique=True)[:need]
+        return np.concatenate([rows.astype(np.int32), fill]), np.concatenate([scores, np.zeros(need, dtype=np.float32)])
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 5) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [self.search(q, top_k=top_k) for q in queries]
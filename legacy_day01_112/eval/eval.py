@@ -30,7 +30,7 @@ else:
 # ---------------------------------------------------------
 # Imports (now local modules can be imported reliably)
 # ---------------------------------------------------------
-from retriever import hybrid_then_rerank  # Day 56 pipeline
+from retriever import hybrid_then_rerank_batch  # Day 56 pipeline
 from metrics import hit_at_k, recall_at_k, mean_rank  # eval/metrics.py
 from gating import gate_results  # eval/gating.py
 
@@ -50,9 +50,10 @@ def load_dataset(path: Path) -> List[Dict[str, Any]]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def run_one(query: str) -> List[Dict[str, Any]]:
-    return hybrid_then_rerank(
-        query,
+def run_batch(queries: List[str]) -> List[List[Dict[str, Any]]]:
+    """hybrid_then_rerank for every query, with one encode/search/predict for the whole dataset."""
+    return hybrid_then_rerank_batch(
+        queries,
         retrieve_k=RETRIEVE_K,
         final_k=FINAL_K,
         alpha=ALPHA,
@@ -79,6 +80,10 @@ def main() -> None:
     false_pass = 0
     should_abstain = 0
 
+    # Retrieve everything up front in one batch (rows without a query fail below)
+    queries = [(row.get("query") or "").strip() for row in data]
+    batched = iter(run_batch([q for q in queries if q]))
+
     for row in data:
         qid = row.get("id", "NA")
         query = (row.get("query") or "").strip()
@@ -96,7 +101,7 @@ def main() -> None:
         if qtype != "unanswerable" and not expected:
             raise ValueError(f"Row {qid} missing expected_ids (type={qtype})")
 
-        results = run_one(query)
+        results = next(batched)
         retrieved_ids = [r.get("id") for r in results if r.get("id") is not None]
 
         # ----------------------------
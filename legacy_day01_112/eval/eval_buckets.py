@@ -21,7 +21,7 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List
 
-from retriever import hybrid_then_rerank
+from retriever import hybrid_then_rerank_batch
 from metrics import hit_at_k
 from gating import gate_results
 from failure_buckets import (
@@ -53,8 +53,8 @@ def load_dataset() -> List[Dict[str, Any]]:
     return json.loads(DATASET_PATH.read_text(encoding="utf-8"))
 
 
-def retrieve(query: str):
-    return hybrid_then_rerank(query, retrieve_k=RETRIEVE_K, final_k=FINAL_K, alpha=ALPHA)
+def retrieve_batch(queries: List[str]):
+    return hybrid_then_rerank_batch(queries, retrieve_k=RETRIEVE_K, final_k=FINAL_K, alpha=ALPHA)
 
 
 def assign_bucket(item: Dict[str, Any], *, retrieved_ids: List[str], gate: Dict[str, Any], hit: Any) -> str:
@@ -99,14 +99,15 @@ def main() -> None:
     rows: List[Dict[str, Any]] = []
     bucket_counts: Dict[str, int] = {}
 
-    for item in data:
+    all_results = retrieve_batch([(item.get("query") or "").strip() for item in data])
+
+    for item, results in zip(data, all_results):
         qid = item.get("id", "NA")
         query = (item.get("query") or "").strip()
         qtype = item.get("type", "normal")
         expected = item.get("expected_ids") or []
         expected_outcome = item.get("expected_outcome")
 
-        results = retrieve(query)
         retrieved_ids = [r.get("id") for r in results if r.get("id") is not None]
 
         gate = gate_results(
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import sys
+import json
+import time
+from pathlib import Path
+from collections import Counter
+
+# ---------------------------------------------------------
+# Path fix: locate repo root (where retriever.py exists)
+# ---------------------------------------------------------
+_this = Path(__file__).resolve()
+for parent in [_this.parent] + list(_this.parents):
+    if (parent / "retriever.py").exists():
+        sys.path.insert(0, str(parent))
+        break
+else:
+    raise RuntimeError("Could not locate repo root")
+
+from run_query import run_query
+
+# ---------------------------------------------------------
+# Rerank cascade vs always-rerank on the same datasets.
+#
+# Every query runs through run_query twice (cascade=False, cascade=True).
+# Reports per mode: decision accuracy, overall accuracy (decision + gold
+# text in the top chunk), false pass / false abstain, mean latency; for the
+# cascade: fraction of queries that skipped the cross-encoder, per band,
+# and the queries whose decision changed.
+#
+# Thresholds come from the engine (CASCADE_* in retriever.py).
+# ---------------------------------------------------------
+
+DATASETS = [
+    (Path("eval/eval_dataset.json"), None),
+    (Path("eval/golden_answerable.json"), "ANSWER"),
+    (Path("eval/golden_unanswerable.json"), "ABSTAIN"),
+]
+OUT_PATH = Path("eval/cascade_results.json")
+
+
+def load_rows():
+    rows = []
+    for path, expected in DATASETS:
+        if not path.exists():
+            continue
+        for row in json.loads(path.read_text(encoding="utf-8")):
+            if not (row.get("query") or "").strip():
+                continue
+            rows.append({
+                "id": row.get("id", "NA"),
+                "query": row["query"].strip(),
+                "expected": expected or row.get("expected"),
+                "gold_contains": row.get("gold_contains", []),
+            })
+    return rows
+
+
+def contains_any(text: str, needles):
+    t = (text or "").lower()
+    return any(n.lower() in t for n in needles)
+
+
+def run_mode(rows, cascade: bool):
+    counts = Counter()
+    per_row = []
+    latencies = []
+
+    for row in rows:
+        t0 = time.perf_counter()
+        out = run_query(row["query"], cascade=cascade)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        decision = out.get("decision")
+        top_text = out["results"][0].get("text", "") if out.get("results") else ""
+
+        decision_ok = decision == row["expected"]
+        content_ok = True
+        if row["expected"] == "ANSWER" and row["gold_contains"]:
+            content_ok = contains_any(top_text, row["gold_contains"])
+
+        band = (out.get("cascade") or {}).get("band", "no_rerank")
+        counts["total"] += 1
+        counts["decision_ok"] += int(decision_ok)
+        counts["row_ok"] += int(decision_ok and content_ok)
+        counts["rerank_skipped"] += int(bool(out.get("rerank_skipped")))
+        counts[f"band:{band}"] += 1
+        if row["expected"] == "ABSTAIN" and decision == "ANSWER":
+            counts["false_pass"] += 1
+        if row["expected"] == "ANSWER" and decision == "ABSTAIN":
+            counts["false_abstain"] += 1
+
+        per_row.append({"decision": decision, "band": band, "rerank_skipped": bool(out.get("rerank_skipped"))})
+
+    total = max(1, counts["total"])
+    summary = {
+        "total": counts["total"],
+        "decision_accuracy": round(counts["decision_ok"] / total, 4),
+        "overall_accuracy": round(counts["row_ok"] / total, 4),
+        "false_pass": counts["false_pass"],
+        "false_abstain": counts["false_abstain"],
+        "rerank_skip_rate": round(counts["rerank_skipped"] / total, 4),
+        "bands": {k.split(":", 1)[1]: v for k, v in counts.items() if k.startswith("band:")},
+        "avg_latency_ms": round(sum(latencies) / total, 2),
+    }
+    return summary, per_row
+
+
+def main():
+    rows = load_rows()
+
+    base, base_rows = run_mode(rows, cascade=False)
+    casc, casc_rows = run_mode(rows, cascade=True)
+
+    changed = [
+        {
+            "id": row["id"],
+            "query": row["query"],
+            "expected": row["expected"],
+            "always_rerank": b["decision"],
+            "cascade": c["decision"],
+            "band": c["band"],
+        }
+        for row, b, c in zip(rows, base_rows, casc_rows)
+        if b["decision"] != c["decision"]
+    ]
+
+    report = {
+        "always_rerank": base,
+        "cascade": casc,
+        "delta": {
+            "decision_accuracy": round(casc["decision_accuracy"] - base["decision_accuracy"], 4),
+            "overall_accuracy": round(casc["overall_accuracy"] - base["overall_accuracy"], 4),
+            "avg_latency_ms": round(casc["avg_latency_ms"] - base["avg_latency_ms"], 2),
+        },
+        "decision_changed": changed,
+    }
+
+    OUT_PATH.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print("\n=== Rerank cascade vs always-rerank ===")
+    print(f"Queries: {base['total']}")
+    print(f"Rerank skipped: {casc['rerank_skip_rate']:.1%}  bands={casc['bands']}")
+    for name in ("decision_accuracy", "overall_accuracy"):
+        print(f"{name}: {base[name]:.4f} -> {casc[name]:.4f} (delta {report['delta'][name]:+.4f})")
+    print(f"false_pass: {base['false_pass']} -> {casc['false_pass']} | false_abstain: {base['false_abstain']} -> {casc['false_abstain']}")
+    print(f"avg latency ms: {base['avg_latency_ms']} -> {casc['avg_latency_ms']}")
+    print(f"Decisions changed: {len(changed)}")
+    print(f"Wrote: {OUT_PATH}\n")
+
+
+if __name__ == "__main__":
+    main()
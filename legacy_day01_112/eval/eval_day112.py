@@ -59,6 +59,7 @@ def main():
         counts["total"] += 1
         counts["decision_ok"] += int(decision_ok)
         counts["row_ok"] += int(row_ok)
+        counts["rerank_skipped"] += int(bool(out.get("rerank_skipped")))
 
         if row["expected"] == "ABSTAIN" and decision == "ANSWER":
             counts["false_pass"] += 1
@@ -71,6 +72,7 @@ def main():
             "expected": row["expected"],
             "predicted": decision,
             "passed_gate": passed_gate,
+            "rerank_skipped": bool(out.get("rerank_skipped")),
             "row_ok": row_ok,
             "answer_snippet": retrieved_text[:160],
         })
@@ -81,6 +83,7 @@ def main():
         "overall_accuracy": counts["row_ok"] / counts["total"],
         "false_pass": counts["false_pass"],
         "false_abstain": counts["false_abstain"],
+        "rerank_skip_rate": counts["rerank_skipped"] / counts["total"],
         "results": results,
     }
 
@@ -4,7 +4,7 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List
 
-from retriever import hybrid_then_rerank
+from retriever import hybrid_then_rerank_batch
 from gating import gate_results
 
 DATASET_PATH = Path("eval/eval_dataset.json")
@@ -26,8 +26,8 @@ def load_dataset(path: Path) -> List[Dict[str, Any]]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def run_one(query: str):
-    return hybrid_then_rerank(query, retrieve_k=RETRIEVE_K, final_k=FINAL_K, alpha=ALPHA)
+def run_batch(queries: List[str]):
+    return hybrid_then_rerank_batch(queries, retrieve_k=RETRIEVE_K, final_k=FINAL_K, alpha=ALPHA)
 
 
 def main() -> None:
@@ -44,6 +44,10 @@ def main() -> None:
 
     reason_counts: Dict[str, int] = {}
 
+    # One batched retrieval pass for every non-empty query, consumed in order below
+    queries = [(item.get("query") or "").strip() for item in data]
+    batched = iter(run_batch([q for q in queries if q]))
+
     for item in data:
         qid = item.get("id", "NA")
         query = (item.get("query") or "").strip()
@@ -53,7 +57,7 @@ def main() -> None:
         if not query:
             continue
 
-        results = run_one(query)
+        results = next(batched)
         retrieved_ids = [r.get("id") for r in results if r.get("id") is not None]
 
         gate = gate_results(
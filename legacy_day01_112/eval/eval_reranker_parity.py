@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import sys
+import copy
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# ---------------------------------------------------------
+# Path fix: locate repo root (where retriever.py exists)
+# ---------------------------------------------------------
+_this = Path(__file__).resolve()
+for parent in [_this.parent] + list(_this.parents):
+    if (parent / "retriever.py").exists():
+        sys.path.insert(0, str(parent))
+        break
+else:
+    raise RuntimeError("Could not locate repo root")
+
+from retriever import RetrieverEngine
+from run_query import RERANK_MIN_MARGIN
+from gating import gate_results
+from eval_gate import MIN_SCORE, MIN_GAP, ANCHOR_TERMS, FINAL_K, RETRIEVE_K, ALPHA
+
+# ---------------------------------------------------------
+# Reranker backend parity (rerank_onnx.py) against the torch CrossEncoder.
+#
+# Replays the eval datasets: one set of hybrid candidates per query, scored
+# by every backend (score cache off). Per backend vs torch:
+#   - score agreement: Pearson / Spearman over all pairs, per-query
+#     Spearman, max |score diff|
+#   - top-k overlap (k = FINAL_K) and top-1 agreement
+#   - gate decisions on the reranked top-k:
+#       margin gate  top1 - top2 >= RERANK_MIN_MARGIN   (run_query)
+#       gate_results MIN_SCORE / MIN_GAP / anchors      (eval_gate knobs)
+#     every query whose pass/fail differs is listed
+#   - mean rerank latency per query
+#
+# Exit code 1 when any gate decision flips, so a faster backend can not
+# silently change abstain behavior.
+# ---------------------------------------------------------
+
+DATASETS = [
+    Path("eval/eval_dataset.json"),
+    Path("eval/golden_answerable.json"),
+    Path("eval/golden_unanswerable.json"),
+]
+OUT_PATH = Path("eval/reranker_parity.json")
+
+
+def load_rows() -> List[Dict[str, Any]]:
+    rows = []
+    for path in DATASETS:
+        if not path.exists():
+            continue
+        for item in json.loads(path.read_text(encoding="utf-8")):
+            query = (item.get("query") or "").strip()
+            if query:
+                rows.append({"id": item.get("id", "NA"), "query": query, "type": item.get("type", "normal")})
+    return rows
+
+
+def _ranks(x: np.ndarray) -> np.ndarray:
+    r = np.empty(len(x), dtype=np.float64)
+    r[np.argsort(x, kind="stable")] = np.arange(len(x))
+    return r
+
+
+def pearson(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2 or a.std() == 0 or b.std() == 0:
+        return 1.0 if np.allclose(a, b) else 0.0
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    return pearson(_ranks(a), _ranks(b))
+
+
+def gates(row: Dict[str, Any], ranked: List[Dict]) -> Dict[str, Any]:
+    top = ranked[:FINAL_K]
+    margin = float(top[0]["score"] - top[1]["score"]) if len(top) > 1 else None
+    gate = gate_results(
+        top,
+        min_score=MIN_SCORE,
+        min_gap=MIN_GAP,
+        anchor_terms=ANCHOR_TERMS,
+        require_anchor=(row["type"] == "unanswerable"),
+    )
+    return {
+        "margin": margin,
+        "margin_pass": margin is None or margin >= RERANK_MIN_MARGIN,
+        "gate_pass": bool(gate["pass"]),
+        "gate_reason": gate["reason"],
+    }
+
+
+def rerank_all(engine: RetrieverEngine, rows, candidates) -> Dict[str, Any]:
+    engine.warm(with_reranker=True)
+    engine.rerank_with_cross_encoder(rows[0]["query"], copy.deepcopy(candidates[0][:2]))  # warm-up
+
+    out = {"scores": [], "ranked": [], "ms": []}
+    for row, cands in zip(rows, candidates):
+        cands = copy.deepcopy(cands)
+        t0 = time.perf_counter()
+        ranked = engine.rerank_with_cross_encoder(row["query"], cands, top_k=len(cands))
+        out["ms"].append((time.perf_counter() - t0) * 1000)
+        out["scores"].append(np.asarray([c["score_rerank"] for c in cands], dtype=np.float64))  # candidate order
+        out["ranked"].append(ranked)
+    return out
+
+
+def compare(rows, ref: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, Any]:
+    all_ref = np.concatenate(ref["scores"])
+    all_cur = np.concatenate(cur["scores"])
+    per_query = [spearman(a, b) for a, b in zip(ref["scores"], cur["scores"]) if len(a) > 1]
+
+    overlap, top1, flips = [], 0, []
+    for row, r_ranked, c_ranked in zip(rows, ref["ranked"], cur["ranked"]):
+        r_ids = [x["id"] for x in r_ranked[:FINAL_K]]
+        c_ids = [x["id"] for x in c_ranked[:FINAL_K]]
+        overlap.append(len(set(r_ids) & set(c_ids)) / max(1, len(r_ids)))
+        top1 += int(r_ids[:1] == c_ids[:1])
+
+        g_ref, g_cur = gates(row, r_ranked), gates(row, c_ranked)
+        for gate in ("margin_pass", "gate_pass"):
+            if g_ref[gate] != g_cur[gate]:
+                flips.append({
+                    "id": row["id"],
+                    "query": row["query"],
+                    "gate": gate,
+                    "torch": g_ref,
+                    "backend": g_cur,
+                })
+
+    n = max(1, len(rows))
+    return {
+        "pairs": int(all_ref.size),
+        "pearson": round(pearson(all_ref, all_cur), 5),
+        "spearman": round(spearman(all_ref, all_cur), 5),
+        "spearman_per_query_min": round(min(per_query), 5) if per_query else None,
+        "spearman_per_query_mean": round(float(np.mean(per_query)), 5) if per_query else None,
+        "max_abs_diff": round(float(np.abs(all_ref - all_cur).max()), 5) if all_ref.size else 0.0,
+        f"top{FINAL_K}_overlap": round(float(np.mean(overlap)), 4) if overlap else None,
+        "top1_agreement": round(top1 / n, 4),
+        "margin_gate_flips": sum(f["gate"] == "margin_pass" for f in flips),
+        "gate_results_flips": sum(f["gate"] == "gate_pass" for f in flips),
+        "rerank_ms_mean": round(float(np.mean(cur["ms"])), 2),
+        "flips": flips,
+    }
+
+
+def make_engine(backend: str, threads: int | None) -> RetrieverEngine:
+    return RetrieverEngine(
+        reranker_backend=backend,
+        reranker_threads=threads,
+        rerank_cache_size=0,
+        rerank_cache_persist=False,
+        rerank_batching=False,
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Reranker backend parity: scores, top-k and gate decisions vs torch.")
+    ap.add_argument("--backends", nargs="*", default=["onnx", "onnx-int8"])
+    ap.add_argument("--threads", type=int, default=None, help="ONNX Runtime intra-op threads")
+    args = ap.parse_args()
+
+    rows = load_rows()
+    ref_engine = make_engine("torch", None)
+    candidates = [ref_engine.hybrid_search(r["query"], top_k=RETRIEVE_K, alpha=ALPHA) for r in rows]
+    keep = [i for i, c in enumerate(candidates) if c]
+    rows, candidates = [rows[i] for i in keep], [candidates[i] for i in keep]
+
+    ref = rerank_all(ref_engine, rows, candidates)
+    report: Dict[str, Any] = {
+        "queries": len(rows),
+        "knobs": {
+            "RERANK_MIN_MARGIN": RERANK_MIN_MARGIN,
+            "MIN_SCORE": MIN_SCORE,
+            "MIN_GAP": MIN_GAP,
+            "RETRIEVE_K": RETRIEVE_K,
+            "FINAL_K": FINAL_K,
+            "ALPHA": ALPHA,
+        },
+        "torch": {"rerank_ms_mean": round(float(np.mean(ref["ms"])), 2)},
+        "backends": {},
+    }
+    for backend in args.backends:
+        report["backends"][backend] = compare(rows, ref, rerank_all(make_engine(backend, args.threads), rows, candidates))
+
+    OUT_PATH.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print("\n=== Reranker parity vs torch ===")
+    print(f"Queries: {len(rows)} | torch rerank ms/query: {report['torch']['rerank_ms_mean']}")
+    failed = False
+    for backend, r in report["backends"].items():
+        n_flips = r["margin_gate_flips"] + r["gate_results_flips"]
+        failed |= n_flips > 0
+        print(
+            f"{backend:<10} pearson={r['pearson']:.4f} spearman={r['spearman']:.4f} "
+            f"(per-query min {r['spearman_per_query_min']}) max|d|={r['max_abs_diff']:.4f} | "
+            f"top{FINAL_K} overlap={r[f'top{FINAL_K}_overlap']} top1={r['top1_agreement']} | "
+            f"flips: margin={r['margin_gate_flips']} gate_results={r['gate_results_flips']} | "
+            f"ms/query={r['rerank_ms_mean']}"
+        )
+        for f in r["flips"]:
+            print(f"  FLIP [{f['gate']}] {f['id']}: {f['query']} | torch={f['torch']} | {backend}={f['backend']}")
+    print(f"Wrote: {OUT_PATH}\n")
+
+    if failed:
+        print("[Parity] Gate decisions changed: do not switch RERANKER_BACKEND without re-tuning the gates.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # alpha_tuner.py
 
 import numpy as np
-from retriever import hybrid_search, DEFAULT_ALPHA
+from retriever import hybrid_search, hybrid_search_batch, DEFAULT_ALPHA
 
 # ------------------------------
 # 1. Tuning set (same as now)
@@ -44,8 +44,10 @@ def evaluate_alpha(alpha: float, top_k: int = 5):
     total_relevant = 0
     rr_sum = 0.0
 
-    for query, relevant_ids in TUNING_SET:
-        results = hybrid_search(query, top_k=top_k, alpha=alpha)
+    # one batched retrieval for the whole tuning set
+    all_results = hybrid_search_batch([q for q, _ in TUNING_SET], top_k=top_k, alpha=alpha)
+
+    for (query, relevant_ids), results in zip(TUNING_SET, all_results):
         retrieved_ids = [doc["id"] for doc in results]
 
         # hit-rate part
@@ -0,0 +1,121 @@
+# bench_batch.py
+# ------------------------------------------------------------
+# Throughput: one-query-at-a-time vs batched retrieval
+#   hybrid_search        vs hybrid_search_batch
+#   hybrid_then_rerank   vs hybrid_then_rerank_batch
+#   run_query            vs run_query_batch        (POST /query vs /query/batch)
+#
+# Queries come from eval/eval_dataset.json (repeated to --n queries).
+# Looped runs go first and fill the query / rerank caches; --no-cache turns
+# them off so both sides compute everything.
+#
+# Usage (from legacy_day01_112/):
+#   python experiments/bench_batch.py --n 200
+#   python experiments/bench_batch.py --n 100 --no-cache
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import io
+import contextlib
+import json
+import sys
+import time
+from pathlib import Path
+
+# ---------------------------------------------------------
+# Path fix: find repo root (folder that contains retriever.py)
+# ---------------------------------------------------------
+_this = Path(__file__).resolve()
+for parent in [_this.parent] + list(_this.parents):
+    if (parent / "retriever.py").exists():
+        sys.path.insert(0, str(parent))
+        REPO_ROOT = parent
+        break
+else:
+    raise RuntimeError(
+        "Could not locate repo root. Expected to find retriever.py in a parent directory."
+    )
+
+import retriever  # noqa: E402
+import run_query  # noqa: E402
+
+DATASET_PATH = REPO_ROOT / "eval" / "eval_dataset.json"
+
+
+def load_queries(n: int) -> list[str]:
+    data = json.loads(DATASET_PATH.read_text(encoding="utf-8"))
+    base = [(row.get("query") or "").strip() for row in data]
+    base = [q for q in base if q]
+    return [base[i % len(base)] for i in range(n)]
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare looped vs batched retrieval throughput.")
+    ap.add_argument("--n", type=int, default=100, help="number of queries")
+    ap.add_argument("--retrieve-k", type=int, default=20)
+    ap.add_argument("--final-k", type=int, default=5)
+    ap.add_argument("--no-rerank", action="store_true")
+    ap.add_argument("--no-cache", action="store_true", help="query-embedding and rerank score caches off")
+    args = ap.parse_args()
+
+    queries = load_queries(args.n)
+    if args.no_cache:
+        retriever.set_engine(
+            retriever.RetrieverEngine(query_cache_size=0, rerank_cache_size=0, rerank_cache_persist=False)
+        )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        retriever.warm(with_reranker=not args.no_rerank)
+
+    cases = [
+        (
+            "hybrid_search",
+            lambda: [retriever.hybrid_search(q, top_k=args.retrieve_k) for q in queries],
+            lambda: retriever.hybrid_search_batch(queries, top_k=args.retrieve_k),
+        ),
+    ]
+    if not args.no_rerank:
+        cases.append(
+            (
+                "hybrid_then_rerank",
+                lambda: [
+                    retriever.hybrid_then_rerank(q, retrieve_k=args.retrieve_k, final_k=args.final_k)
+                    for q in queries
+                ],
+                lambda: retriever.hybrid_then_rerank_batch(
+                    queries, retrieve_k=args.retrieve_k, final_k=args.final_k
+                ),
+            )
+        )
+    requests = [{"query": q, "top_k": args.final_k, "use_reranker": not args.no_rerank} for q in queries]
+    cases.append(
+        (
+            "run_query",
+            lambda: [
+                run_query.run_query(q, top_k=args.final_k, use_reranker=not args.no_rerank) for q in queries
+            ],
+            lambda: run_query.run_query_batch(requests),
+        )
+    )
+
+    print(f"\n[Bench] n={len(queries)} retrieve_k={args.retrieve_k} final_k={args.final_k}")
+    for name, looped, batched in cases:
+        with contextlib.redirect_stdout(io.StringIO()):  # run_query's gate debug prints
+            t_loop = _timed(looped)
+            t_batch = _timed(batched)
+        print(
+            f"  {name:<20} loop={len(queries) / t_loop:8.1f} q/s | "
+            f"batch={len(queries) / t_batch:8.1f} q/s | speedup={t_loop / t_batch:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# bench_rerank_tokens.py
+# ------------------------------------------------------------
+# Tokenization share of rerank latency: raw text pairs vs the
+# pre-tokenized chunk cache (rerank_tokens.py).
+#
+# For each eval query the hybrid candidates (retrieve_k) are scored by:
+#   before  CrossEncoder.predict([query, text] ...)   tokenizes query + every chunk
+#   after   rerank_tokens.predict(...)                 tokenizes the query only
+# and the tokenization part of each path is timed on its own:
+#   before  tokenizer(queries, texts, padding, truncation="longest_first")
+#   after   query tokenization + PairEncoder.features (id assembly)
+#
+# Reports p50 / p95 total and tokenization ms per query, the tokenization
+# share, and the max |score diff| between both paths (expected ~0).
+# The rerank score cache is bypassed, every pair is scored.
+#
+# Usage (from legacy_day01_112/):
+#   python experiments/bench_rerank_tokens.py
+#   python experiments/bench_rerank_tokens.py --retrieve-k 50 --repeat 5
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# ---------------------------------------------------------
+# Path fix: find repo root (folder that contains retriever.py)
+# ---------------------------------------------------------
+_this = Path(__file__).resolve()
+for parent in [_this.parent] + list(_this.parents):
+    if (parent / "retriever.py").exists():
+        sys.path.insert(0, str(parent))
+        REPO_ROOT = parent
+        break
+else:
+    raise RuntimeError(
+        "Could not locate repo root. Expected to find retriever.py in a parent directory."
+    )
+
+import retriever  # noqa: E402
+import rerank_tokens  # noqa: E402
+
+DATASET_PATH = REPO_ROOT / "eval" / "eval_dataset.json"
+
+
+def load_queries() -> list[str]:
+    data = json.loads(DATASET_PATH.read_text(encoding="utf-8"))
+    return [q for q in ((row.get("query") or "").strip() for row in data) if q]
+
+
+def _ms(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Tokenization share of rerank latency, raw pairs vs cached chunk tokens.")
+    ap.add_argument("--retrieve-k", type=int, default=20)
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    args = ap.parse_args()
+
+    import torch
+
+    torch.set_num_threads(args.threads)
+
+    engine = retriever.get_engine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.warm(with_reranker=True)
+    reranker = engine.get_reranker()
+    encoder, cache = engine.rerank_token_cache()
+    if cache is None:
+        raise SystemExit("[Bench] No chunk token cache (RERANK_PRETOKENIZED off or unsupported reranker).")
+    tokenizer, max_length = encoder.tokenizer, encoder.max_length
+
+    queries = load_queries()
+    cands = engine.hybrid_search_batch(queries, top_k=args.retrieve_k)
+    jobs = [
+        (q, [[q, c["text"], engine.chunk_row(c)] for c in cs])
+        for q, cs in zip(queries, cands)
+        if cs
+    ]
+
+    rows = {"before": {"total": [], "tok": []}, "after": {"total": [], "tok": []}}
+    max_diff = 0.0
+    for _ in range(args.repeat):
+        for q, pairs in jobs:
+            texts = [p[1] for p in pairs]
+            rows["before"]["tok"].append(_ms(lambda: tokenizer(
+                [q] * len(texts), texts, padding=True, truncation="longest_first",
+                max_length=max_length, return_tensors="pt",
+            )))
+            rows["after"]["tok"].append(_ms(lambda: encoder.features(
+                encoder.tokenize([q]) * len(pairs),
+                [cache.chunk_ids(p[2]) for p in pairs],
+                [cache.lengths[p[2]] for p in pairs],
+            )))
+
+            t0 = time.perf_counter()
+            before = reranker.predict([p[:2] for p in pairs], batch_size=args.batch_size)
+            rows["before"]["total"].append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            after = rerank_tokens.predict(reranker, encoder, cache, pairs, batch_size=args.batch_size)
+            rows["after"]["total"].append((time.perf_counter() - t0) * 1000)
+            max_diff = max(max_diff, float(np.abs(np.asarray(before, dtype=np.float64) - after).max()))
+
+    n_pairs = sum(len(p) for _, p in jobs)
+    print(
+        f"\n[Bench] {len(jobs)} queries x {args.repeat} | {n_pairs} pairs per pass | "
+        f"max_length={max_length} | cached tokens={cache.ids.size} for {cache.n_docs} chunks"
+    )
+    header = f"{'path':<8} {'total p50':>10} {'total p95':>10} {'tok p50':>9} {'tok p95':>9} {'tok share':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in rows.items():
+        total, tok = np.asarray(r["total"]), np.asarray(r["tok"])
+        print(
+            f"{name:<8} {np.percentile(total, 50):10.2f} {np.percentile(total, 95):10.2f} "
+            f"{np.percentile(tok, 50):9.3f} {np.percentile(tok, 95):9.3f} {tok.sum() / total.sum():10.1%}"
+        )
+    print(f"max |score diff| after vs before: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench_startup.py
+# ------------------------------------------------------------
+# Startup benchmark for retriever.py
+# - time-to-import        (import retriever)
+# - time-to-first-query   (first hybrid_then_rerank, pays lazy loads)
+# - steady-state query    (second call, everything warm)
+#
+# Each run happens in a fresh interpreter so import caches do not leak
+# between runs.
+#
+# Usage (from legacy_day01_112/):
+#   python experiments/bench_startup.py
+#   python experiments/bench_startup.py --runs 5 --warm
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# ---------------------------------------------------------
+# Path fix: find repo root (folder that contains retriever.py)
+# ---------------------------------------------------------
+_this = Path(__file__).resolve()
+for parent in [_this.parent] + list(_this.parents):
+    if (parent / "retriever.py").exists():
+        REPO_ROOT = parent
+        break
+else:
+    raise RuntimeError(
+        "Could not locate repo root. Expected to find retriever.py in a parent directory."
+    )
+
+QUERY = "probation leave policy"
+
+_CHILD = r"""
+import json, sys, time, io, contextlib
+sys.path.insert(0, {root!r})
+
+t0 = time.perf_counter()
+import retriever
+t_import = (time.perf_counter() - t0) * 1000
+
+with contextlib.redirect_stdout(io.StringIO()):
+    t_warm = None
+    if {warm!r}:
+        t0 = time.perf_counter()
+        retriever.warm(with_reranker=True)
+        t_warm = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    retriever.hybrid_then_rerank({query!r}, retrieve_k=20, final_k=5)
+    t_first = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    retriever.hybrid_then_rerank({query!r}, retrieve_k=20, final_k=5)
+    t_second = (time.perf_counter() - t0) * 1000
+
+print(json.dumps({{
+    "import_ms": t_import,
+    "warm_ms": t_warm,
+    "first_query_ms": t_first,
+    "second_query_ms": t_second,
+    "load_ms": retriever.get_engine().load_ms,
+}}))
+"""
+
+
+def run_once(warm: bool) -> dict:
+    code = _CHILD.format(root=str(REPO_ROOT), warm=warm, query=QUERY)
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(REPO_ROOT),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _fmt(xs):
+    xs = [x for x in xs if x is not None]
+    if not xs:
+        return "-"
+    return f"{statistics.median(xs):9.1f}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Measure retriever time-to-import and time-to-first-query.")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--warm", action="store_true", help="call retriever.warm() before the first query")
+    args = ap.parse_args()
+
+    rows = [run_once(args.warm) for _ in range(args.runs)]
+
+    print(f"\n[Bench] runs={args.runs} warm={args.warm} query={QUERY!r} (median ms)")
+    print(f"  import         : {_fmt([r['import_ms'] for r in rows])}")
+    print(f"  warm()         : {_fmt([r['warm_ms'] for r in rows])}")
+    print(f"  first query    : {_fmt([r['first_query_ms'] for r in rows])}")
+    print(f"  second query   : {_fmt([r['second_query_ms'] for r in rows])}")
+
+    load_keys = sorted({k for r in rows for k in r["load_ms"]})
+    for k in load_keys:
+        print(f"    load[{k:<8}] : {_fmt([r['load_ms'].get(k) for r in rows])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 from pathlib import Path
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Tuple
+import argparse
 import json
 from pypdf import PdfReader
 import re
@@ -8,6 +12,9 @@ DATA_DIR = Path("data")
 PDF_PATH = DATA_DIR / "policy.pdf"
 CORPUS_PATH = DATA_DIR / "corpus_chunks.json"
 
+CHUNK_SIZE = 100        # characters per chunk
+PAGES_PER_TASK = 16     # pages one worker extracts per task
+
 
 def clean_text(text: str) -> str:
     # Remove extra whitespace and newlines
@@ -18,42 +25,181 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 
-def main():
-    if not PDF_PATH.exists():
-        raise FileNotFoundError(f"PDF not found at {PDF_PATH}")
-
-    reader = PdfReader(str(PDF_PATH))
-    all_text = ""
-
-    # 1. Extract text from all pages
-    for page in reader.pages:
-        page_text = page.extract_text() or ""
-        all_text += page_text + "\n"
-
-    all_text = clean_text(all_text)
-
-    # 2. Chunk into ~350-character pieces
-    chunk_size = 100
-    chunks = []
-
-    for i in range(0, len(all_text), chunk_size):
-        chunk_text = all_text[i : i + chunk_size].strip()
+# ---------------------------------------------------------
+# Page extraction (one task = a page range of one PDF)
+# ---------------------------------------------------------
+
+def _extract_pages(task: Tuple[str, int, int]) -> List[Tuple[int, str]]:
+    path, lo, hi = task
+    reader = PdfReader(path)
+    return [(i + 1, reader.pages[i].extract_text() or "") for i in range(lo, hi)]
+
+
+def _page_tasks(pdf_paths: List[Path]) -> Iterator[Tuple[str, int, int]]:
+    for pdf in pdf_paths:
+        n_pages = len(PdfReader(str(pdf)).pages)
+        for lo in range(0, n_pages, PAGES_PER_TASK):
+            yield str(pdf), lo, min(n_pages, lo + PAGES_PER_TASK)
+
+
+def iter_pages(pdf_paths: List[Path], workers: int = 1) -> Iterator[Tuple[Path, int, str]]:
+    """
+    Yield (pdf, page_no, text) in document order. With workers > 1 pages are
+    extracted in a process pool; results are still consumed in order.
+    """
+    tasks = _page_tasks(pdf_paths)
+    if workers <= 1:
+        for task in tasks:
+            for page_no, text in _extract_pages(task):
+                yield Path(task[0]), page_no, text
+        return
+
+    # at most 2 page ranges per worker in flight: extracted text waiting for
+    # the chunker stays bounded, however many pages the PDFs have
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Tuple[str, Future]] = deque()
+        for task in tasks:
+            pending.append((task[0], pool.submit(_extract_pages, task)))
+            if len(pending) >= 2 * workers:
+                path, fut = pending.popleft()
+                for page_no, text in fut.result():
+                    yield Path(path), page_no, text
+        while pending:
+            path, fut = pending.popleft()
+            for page_no, text in fut.result():
+                yield Path(path), page_no, text
+
+
+# ---------------------------------------------------------
+# Streaming chunker: fixed windows over the cleaned text of a document,
+# fed page by page (no document-sized string is ever built)
+# ---------------------------------------------------------
+
+class StreamingChunker:
+    """
+    Same chunks as clean_text("\\n".join(pages)) cut every chunk_size chars,
+    plus the page range each chunk came from.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+        self._segs: Deque[List] = deque()  # [text, page_no, read_pos]
+        self._buffered = 0
+        self._started = False
+
+    def feed(self, text: str, page_no: int) -> Iterator[Dict]:
+        piece = clean_text(text)
+        if not piece:
+            return
+        if self._started:
+            piece = " " + piece  # the page break collapses to one space
+        self._started = True
+        self._segs.append([piece, page_no, 0])
+        self._buffered += len(piece)
+
+        while self._buffered >= self.chunk_size:
+            chunk = self._take(self.chunk_size)
+            if chunk is not None:
+                yield chunk
+
+    def flush(self) -> Iterator[Dict]:
+        if self._buffered:
+            chunk = self._take(self._buffered)
+            if chunk is not None:
+                yield chunk
+        self._started = False
+
+    def _take(self, n: int) -> Dict | None:
+        parts = []
+        pages = []
+        self._buffered -= n
+        while n > 0:
+            seg = self._segs[0]
+            text, page_no, pos = seg
+            part = text[pos : pos + n]
+            parts.append(part)
+            pages.append(page_no)
+            n -= len(part)
+            if pos + len(part) >= len(text):
+                self._segs.popleft()
+            else:
+                seg[2] = pos + len(part)
+
+        chunk_text = "".join(parts).strip()
         if not chunk_text:
-            continue
+            return None
+        return {"text": chunk_text, "page": pages[0], "page_end": pages[-1]}
+
+
+def iter_chunks(pdf_paths: List[Path], chunk_size: int = CHUNK_SIZE, workers: int = 1) -> Iterator[Dict]:
+    """corpus_chunks.json rows ({"id", "text"} + source / page metadata), one PDF after another."""
+    next_id = 0
+    chunker = StreamingChunker(chunk_size)
+    current = None
+
+    def numbered(chunks, pdf):
+        nonlocal next_id
+        for c in chunks:
+            yield {"id": next_id, "text": c["text"], "source": pdf.name, "page": c["page"], "page_end": c["page_end"]}
+            next_id += 1
+
+    for pdf, page_no, text in iter_pages(pdf_paths, workers=workers):
+        if pdf != current:
+            if current is not None:
+                yield from numbered(chunker.flush(), current)
+            current = pdf
+        yield from numbered(chunker.feed(text, page_no), pdf)
+    if current is not None:
+        yield from numbered(chunker.flush(), current)
+
+
+def find_pdfs(inputs: List[Path]) -> List[Path]:
+    pdfs: List[Path] = []
+    for p in inputs:
+        if p.is_dir():
+            pdfs.extend(sorted(p.rglob("*.pdf")))
+        elif p.exists():
+            pdfs.append(p)
+        else:
+            raise FileNotFoundError(f"PDF not found at {p}")
+    return pdfs
+
+
+def write_chunks(chunks: Iterable[Dict], out_path: Path) -> int:
+    """Stream chunks to .jsonl (one per line) or .json (a JSON array, same as before)."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with out_path.open("w", encoding="utf-8") as f:
+        if out_path.suffix == ".jsonl":
+            for c in chunks:
+                f.write(json.dumps(c, ensure_ascii=False) + "\n")
+                n += 1
+            return n
+
+        f.write("[")
+        for c in chunks:
+            f.write(("," if n else "") + "\n  " + json.dumps(c, ensure_ascii=False))
+            n += 1
+        f.write("\n]\n")
+    return n
 
-        chunks.append({
-            "id": len(chunks),
-            "text": chunk_text,
-        })
 
-    print(f"Created {len(chunks)} chunks")
+def main():
+    ap = argparse.ArgumentParser(description="Extract + chunk PDFs into corpus_chunks.json (or .jsonl).")
+    ap.add_argument("inputs", nargs="*", type=Path, help=f"PDF files and/or directories (default: {PDF_PATH})")
+    ap.add_argument("--out", type=Path, default=CORPUS_PATH, help="output .json or .jsonl")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--workers", type=int, default=1, help="page-extraction processes")
+    args = ap.parse_args()
+
+    pdfs = find_pdfs(args.inputs or [PDF_PATH])
+    if not pdfs:
+        raise FileNotFoundError(f"No PDFs found in {[str(p) for p in args.inputs]}")
 
-    # 3. Save to data/corpus_chunks.json (same format as before)
-    CORPUS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with CORPUS_PATH.open("w", encoding="utf-8") as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
+    n = write_chunks(iter_chunks(pdfs, chunk_size=args.chunk_size, workers=args.workers), args.out)
 
-    print(f"Wrote chunks to {CORPUS_PATH}")
+    print(f"Created {n} chunks from {len(pdfs)} PDF(s)")
+    print(f"Wrote chunks to {args.out}")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,12 @@
-from transformers import AutoTokenizer
+import sys
+from pathlib import Path
 
-TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+# Shared token chunker (indexing/token_chunker.py) lives at the repo root
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from indexing import token_chunker  # noqa: E402
+
+TOKENIZER_NAME = token_chunker.TOKENIZER_NAME
+tokenizer = token_chunker.get_tokenizer(TOKENIZER_NAME)
 
 def tokenize(text):
     return tokenizer.encode(text, add_special_tokens=False)
@@ -10,6 +15,18 @@ def detokenize(token_ids):
     return tokenizer.decode(token_ids)
 
 def sliding_window_chunk(text, max_tokens=250, overlap=80):
+    """
+    Token windows sliced from the original text via the offset mapping
+    (no decode, so casing and whitespace survive).
+    """
+    return token_chunker.chunk_batch([text], max_tokens, overlap, TOKENIZER_NAME)[0]
+
+def sliding_window_chunk_many(texts, max_tokens=250, overlap=80, workers=1):
+    """Batched (and optionally multi-process) sliding_window_chunk, one chunk list per text."""
+    return token_chunker.chunk_texts(texts, max_tokens, overlap, TOKENIZER_NAME, workers=workers)
+
+def sliding_window_chunk_decoded(text, max_tokens=250, overlap=80):
+    """Old encode -> decode version, kept for comparison."""
     token_ids = tokenize(text)
     chunks = []
 
@@ -1,11 +1,13 @@
 from pathlib import Path
 import json
-from chunker import sliding_window_chunk
+from chunker import sliding_window_chunk_many
 
 # 👉 Use existing corpus_chunks.json as input AND output for now
 INPUT_PATH = Path("data/corpus_chunks.json")
 OUTPUT_PATH = Path("data/corpus_chunks.json")
 
+WORKERS = 1  # tokenizer processes
+
 
 def build_chunks():
     with INPUT_PATH.open() as f:
@@ -14,10 +16,11 @@ def build_chunks():
     chunks = []
     cid = 0
 
-    for d in docs:
-        text = d["text"]
-        doc_chunks = sliding_window_chunk(text, max_tokens=250, overlap=80)
+    all_chunks = sliding_window_chunk_many(
+        [d["text"] for d in docs], max_tokens=250, overlap=80, workers=WORKERS
+    )
 
+    for doc_chunks in all_chunks:
         for ch in doc_chunks:
             chunks.append({
                 "id": f"c{cid}",
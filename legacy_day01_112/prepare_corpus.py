@@ -4,16 +4,23 @@
 # - Load chunked corpus from data/corpus_chunks.json
 # - Create sentence embeddings
 # - L2-normalize embeddings
-# - Build FAISS IndexFlatIP
+# - Build FAISS index (IndexFlatIP by default, see INDEX_FACTORY)
 # - Persist embeddings, index, and metadata
 # ------------------------------------------------------------
 
 from pathlib import Path
 import json
+import sys
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 
+# Shared index tooling (indexing/ann.py) lives at the repo root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from indexing import ann  # noqa: E402
+from indexing import quantize  # noqa: E402
+from indexing.embedding_cache import cached_encode  # noqa: E402
+
 # ----------------------------
 # Paths & constants
 # ----------------------------
@@ -25,6 +32,8 @@ META_PATH = DATA_DIR / "index_meta.json"
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 INDEX_VERSION = "v1"
+INDEX_FACTORY = ann.DEFAULT_INDEX_FACTORY  # e.g. "IVF1024,Flat", "IVF1024,PQ32", "HNSW32"
+EMB_STORAGE = quantize.DEFAULT_STORAGE     # "float32", "float16" or "int8" (indexing/quantize.py)
 
 
 # ----------------------------
@@ -62,39 +71,40 @@ def main() -> None:
     model = SentenceTransformer(MODEL_NAME)
 
     # ----------------------------
-    # Encode
+    # Encode + normalize (critical for IP similarity)
+    # Texts already in the shared embedding cache are not re-encoded.
     # ----------------------------
     print("[Prep] Encoding documents...")
-    embeddings = model.encode(
-        texts,
-        batch_size=32,
-        show_progress_bar=True,
-        convert_to_numpy=True,
-    )
+
+    def encode(batch):
+        vecs = model.encode(
+            batch,
+            batch_size=32,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+        )
+        return l2_normalize(vecs)
+
+    embeddings = cached_encode(texts, MODEL_NAME, encode, normalized=True)
 
     dim = embeddings.shape[1]
     print(f"[Prep] Embedding dimension: {dim}")
-
-    # ----------------------------
-    # Normalize (critical for IP similarity)
-    # ----------------------------
-    embeddings = l2_normalize(embeddings)
     print("[Prep] Normalized embeddings (L2).")
 
     # ----------------------------
     # Build FAISS index
     # ----------------------------
-    index = faiss.IndexFlatIP(dim)
-    index.add(embeddings)
+    factory = quantize.storage_factory(INDEX_FACTORY, EMB_STORAGE)
+    index = ann.build_index(embeddings, factory)
 
-    print(f"[Prep] FAISS index built with {index.ntotal} vectors.")
+    print(f"[Prep] FAISS index ({factory}) built with {index.ntotal} vectors.")
 
     # ----------------------------
     # Persist artifacts
     # ----------------------------
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    np.save(EMBEDDINGS_PATH, embeddings)
+    quantize.save_embeddings(EMBEDDINGS_PATH, embeddings, EMB_STORAGE)
     faiss.write_index(index, str(INDEX_PATH))
 
     meta = {
@@ -103,6 +113,9 @@ def main() -> None:
         "n_docs": int(n_docs),
         "normalized": True,
         "index_version": INDEX_VERSION,
+        **ann.index_meta(factory, index),
+        **quantize.storage_meta(EMB_STORAGE),
+        **ann.embedding_meta(quantize.load_embeddings(EMBEDDINGS_PATH, EMB_STORAGE)),
     }
 
     with META_PATH.open("w", encoding="utf-8") as f:
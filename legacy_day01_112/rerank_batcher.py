@@ -0,0 +1,251 @@
+# rerank_batcher.py
+# ---------------------------------------------------------
+# In-process micro-batching for the cross-encoder.
+#
+# Concurrent callers (request threads running hybrid_then_rerank) submit
+# their (query, text) pairs and block. One worker thread:
+#   1) takes the first waiting request; if no other request is queued it
+#      runs alone right away (a serial caller never pays max_wait_ms),
+#   2) otherwise keeps collecting requests until max_wait_ms has passed
+#      since that first request or max_batch pairs are collected,
+#   3) sorts all pairs by length (so each internal predict batch pads to
+#      similar lengths), runs ONE predict call,
+#   4) scatters the scores back to each caller in its original order.
+# Any failure in 3) / 4) is raised in every caller of that batch; the
+# worker keeps serving the next one.
+#
+# The queue is bounded (max_queue requests); when it is full, submit()
+# waits up to queue_timeout_s and then raises RerankQueueFull. A caller
+# whose batch has not finished after result_timeout_s gets RerankTimeout;
+# its request is marked cancelled and dropped if it has not run yet.
+# stats() exports batch size / wait time / predict time for /metrics.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_MAX_WAIT_MS = 3.0
+DEFAULT_MAX_BATCH = 128       # pairs per predict call (a single larger request still runs whole)
+DEFAULT_MAX_QUEUE = 256       # waiting requests
+DEFAULT_BUCKET_SIZE = 32      # CrossEncoder.predict batch_size over the length-sorted pairs
+DEFAULT_QUEUE_TIMEOUT_S = 5.0
+DEFAULT_RESULT_TIMEOUT_S = 60.0  # queued + predict time before a caller gives up
+
+_WINDOW = 1024  # recent batches / requests kept for percentiles
+
+Pair = Sequence  # (query, text, ...) - extra fields are passed through to predict
+
+
+class RerankQueueFull(RuntimeError):
+    pass
+
+
+class RerankTimeout(RuntimeError):
+    pass
+
+
+class _Request:
+    __slots__ = ("pairs", "t_submit", "done", "scores", "error", "cancelled")
+
+    def __init__(self, pairs: List[Pair]) -> None:
+        self.pairs = pairs
+        self.t_submit = time.perf_counter()
+        self.done = threading.Event()
+        self.scores: Optional[List[float]] = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False  # caller gave up (RerankTimeout): skip the forward pass
+
+
+class RerankBatcher:
+    def __init__(
+        self,
+        predict: Callable[..., Sequence[float]],
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        bucket_size: int = DEFAULT_BUCKET_SIZE,
+        queue_timeout_s: float = DEFAULT_QUEUE_TIMEOUT_S,
+        result_timeout_s: float = DEFAULT_RESULT_TIMEOUT_S,
+    ) -> None:
+        """predict(pairs, batch_size=...) -> scores, e.g. CrossEncoder.predict (pairs start with query, text)."""
+        self._predict = predict
+        self.max_wait_ms = float(max_wait_ms)
+        self.max_batch = int(max_batch)
+        self.max_queue = int(max_queue)
+        self.bucket_size = int(bucket_size)
+        self.queue_timeout_s = float(queue_timeout_s)
+        self.result_timeout_s = float(result_timeout_s)
+
+        self._queue: "queue.Queue[_Request]" = queue.Queue(maxsize=self.max_queue)
+        self._carry: Optional[_Request] = None  # request that did not fit the previous batch
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.pairs = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self._batch_pairs: deque = deque(maxlen=_WINDOW)
+        self._batch_requests: deque = deque(maxlen=_WINDOW)
+        self._wait_ms: deque = deque(maxlen=_WINDOW)
+        self._predict_ms: deque = deque(maxlen=_WINDOW)
+
+    # -----------------------------------------------------
+    # Caller side
+    # -----------------------------------------------------
+
+    def submit(self, pairs: Sequence[Pair]) -> List[float]:
+        """Scores for pairs (blocks until the batch holding them has run)."""
+        pairs = [tuple(p) for p in pairs]
+        if not pairs:
+            return []
+        self._ensure_worker()
+
+        req = _Request(pairs)
+        try:
+            self._queue.put(req, timeout=self.queue_timeout_s)
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise RerankQueueFull(
+                f"Rerank queue full ({self.max_queue} waiting requests for {self.queue_timeout_s}s)"
+            ) from None
+
+        if not req.done.wait(self.result_timeout_s):
+            req.cancelled = True
+            with self._stats_lock:
+                self.timeouts += 1
+            raise RerankTimeout(f"Rerank batch did not finish within {self.result_timeout_s}s")
+        if req.error is not None:
+            raise req.error
+        return req.scores
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+                self._worker.start()
+
+    # -----------------------------------------------------
+    # Worker side
+    # -----------------------------------------------------
+
+    def _drop(self, req: _Request) -> bool:
+        """True (and counted) if the caller already gave up on req."""
+        if not req.cancelled:
+            return False
+        with self._stats_lock:
+            self.cancelled += 1
+        return True
+
+    def _collect(self) -> List[_Request]:
+        first, self._carry = self._carry, None
+        while first is None or self._drop(first):
+            first = self._queue.get()
+        batch, n_pairs = [first], len(first.pairs)
+        if self._queue.empty():
+            return batch  # nobody to batch with: do not hold a lone caller for max_wait_ms
+        deadline = first.t_submit + self.max_wait_ms / 1000.0
+
+        while n_pairs < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                req = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self._drop(req):
+                continue
+            if n_pairs + len(req.pairs) > self.max_batch:
+                self._carry = req  # starts the next batch
+                break
+            batch.append(req)
+            n_pairs += len(req.pairs)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._run_batch(batch)
+            except Exception as e:  # hand the failure to every caller of this batch still waiting
+                for req in batch:
+                    if not req.done.is_set():
+                        req.error = e
+                        req.done.set()
+
+    def _run_batch(self, batch: List[_Request]) -> None:
+        batch = [req for req in batch if not self._drop(req)]  # timed out while the batch was collected
+        if not batch:
+            return
+        t_start = time.perf_counter()
+
+        flat = [p for req in batch for p in req.pairs]
+        # length buckets: similar lengths end up in the same internal predict batch
+        order = np.argsort([len(p[0]) + len(p[1]) for p in flat], kind="stable")
+        scores = np.asarray(self._predict([list(flat[i]) for i in order], batch_size=self.bucket_size), dtype=np.float64)
+        if scores.shape != (len(flat),):
+            raise ValueError(f"predict returned {scores.shape} scores for {len(flat)} pairs")
+        out = np.empty(len(flat), dtype=np.float64)
+        out[order] = scores
+        predict_ms = (time.perf_counter() - t_start) * 1000
+
+        start = 0
+        for req in batch:
+            end = start + len(req.pairs)
+            req.scores = [float(s) for s in out[start:end]]
+            start = end
+            req.done.set()
+
+        with self._stats_lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.pairs += len(flat)
+            self._batch_pairs.append(len(flat))
+            self._batch_requests.append(len(batch))
+            self._wait_ms.extend((t_start - req.t_submit) * 1000 for req in batch)
+            self._predict_ms.append(predict_ms)
+
+    # -----------------------------------------------------
+    # Metrics
+    # -----------------------------------------------------
+
+    def stats(self) -> Dict[str, float]:
+        def pct(values, q: float) -> float:
+            return round(float(np.percentile(values, q)), 3) if values else 0.0
+
+        with self._stats_lock:
+            batch_pairs = list(self._batch_pairs)
+            batch_requests = list(self._batch_requests)
+            wait_ms = list(self._wait_ms)
+            predict_ms = list(self._predict_ms)
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "pairs": self.pairs,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "queue_depth": self._queue.qsize(),
+                "max_wait_ms": self.max_wait_ms,
+                "max_batch": self.max_batch,
+                "max_queue": self.max_queue,
+                "batch_pairs_mean": round(float(np.mean(batch_pairs)), 3) if batch_pairs else 0.0,
+                "batch_pairs_p95": pct(batch_pairs, 95),
+                "batch_requests_mean": round(float(np.mean(batch_requests)), 3) if batch_requests else 0.0,
+                "wait_ms_p50": pct(wait_ms, 50),
+                "wait_ms_p95": pct(wait_ms, 95),
+                "predict_ms_p50": pct(predict_ms, 50),
+                "predict_ms_p95": pct(predict_ms, 95),
+            }
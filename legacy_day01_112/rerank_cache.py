@@ -0,0 +1,241 @@
+# rerank_cache.py
+# ---------------------------------------------------------
+# Cross-encoder score cache
+#
+# Key   : (query, chunk id, sha256 of the chunk text) inside a namespace
+#         "<reranker model>|<index version>"
+# Value : raw CrossEncoder score (float)
+#
+# Tiers:
+#   1) in-memory LRU (per process)
+#   2) optional SQLite file (survives restarts / eval reruns), WAL mode.
+#      New scores are buffered and written in one transaction every
+#      DEFAULT_FLUSH_ROWS rows / DEFAULT_FLUSH_INTERVAL_S seconds (and on
+#      flush() / close() / exit); a crash loses at most that buffer.
+#
+# Changing RERANKER_MODEL_NAME or INDEX_VERSION changes the namespace; editing
+# a chunk (same id, same INDEX_VERSION, e.g. an incremental rebuild) changes
+# its content hash. Either way old scores are never served. Several
+# namespaces (models / backends) can share one SQLite file: prune() only
+# drops dead rows of this cache's own namespace.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_SIZE = 50_000
+DEFAULT_FLUSH_ROWS = 256        # buffered new scores per SQLite transaction
+DEFAULT_FLUSH_INTERVAL_S = 5.0  # ... or older than this at the next put_many
+LOOKUP_CHUNK = 300              # keys per SELECT (3 bound variables each, under SQLite's 999 limit)
+
+Pair = Tuple[str, str, str]  # (query, chunk id, chunk text sha256)
+
+
+def make_namespace(reranker_model_name: str, index_version: str) -> str:
+    return f"{reranker_model_name}|{index_version}"
+
+
+class RerankScoreCache:
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        db_path: Path | None = None,
+        flush_rows: int = DEFAULT_FLUSH_ROWS,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+    ) -> None:
+        self.namespace = namespace
+        self.max_size = int(max_size)
+        self.db_path = Path(db_path) if db_path is not None else None
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval_s = float(flush_interval_s)
+
+        self._mem: "OrderedDict[Pair, float]" = OrderedDict()
+        self._pending: Dict[Pair, float] = {}  # stored, not yet written to SQLite
+        self._pending_since = 0.0
+        # _lock guards the memory tier / pending buffer / counters, _db_lock the
+        # connection, so memory hits never wait on disk I/O. Order: _db_lock, then _lock.
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if self.db_path is not None:
+            atexit.register(self.flush)  # no-op once close() has flushed
+
+        self.hits_mem = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    # -----------------------------------------------------
+    # SQLite tier (opened on first use)
+    # -----------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection | None:
+        # caller holds _db_lock
+        if self.db_path is None:
+            return None
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            # readers never block the writer; commits skip the per-transaction fsync
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            # rows of the old (query, doc_id) table carry no content hash and can not be validated
+            db.execute("DROP TABLE IF EXISTS rerank_scores")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS rerank_scores_v2 ("
+                " ns TEXT NOT NULL, query TEXT NOT NULL, doc_id TEXT NOT NULL, text_hash TEXT NOT NULL,"
+                " score REAL NOT NULL, PRIMARY KEY (ns, query, doc_id, text_hash))"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _lookup(self, db: sqlite3.Connection, keys: Sequence[Pair]) -> Dict[Pair, float]:
+        # one SELECT per LOOKUP_CHUNK keys, matched on the primary key
+        found: Dict[Pair, float] = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start : start + LOOKUP_CHUNK]
+            rows = db.execute(
+                "SELECT query, doc_id, text_hash, score FROM rerank_scores_v2"
+                " WHERE ns = ? AND (query, doc_id, text_hash) IN (VALUES "
+                + ", ".join(["(?, ?, ?)"] * len(chunk))
+                + ")",
+                [self.namespace] + [v for key in chunk for v in key],
+            )
+            for q, doc_id, text_hash, score in rows:
+                found[(q, doc_id, text_hash)] = float(score)
+        return found
+
+    def flush(self) -> None:
+        """Write buffered scores to SQLite (one transaction)."""
+        with self._db_lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        # caller holds _db_lock
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+        db = self._conn()
+        db.executemany(
+            "INSERT OR REPLACE INTO rerank_scores_v2 VALUES (?, ?, ?, ?, ?)",
+            [(self.namespace, *key, s) for key, s in pending.items()],
+        )
+        db.commit()
+
+    # -----------------------------------------------------
+    # Lookup / store
+    # -----------------------------------------------------
+
+    def get_many(self, pairs: Sequence[Pair]) -> List[Optional[float]]:
+        """Cached score per pair, None for misses. Disk hits are promoted to memory."""
+        out: List[Optional[float]] = [None] * len(pairs)
+        disk_todo: List[int] = []
+        with self._lock:
+            for i, key in enumerate(pairs):
+                s = self._mem.get(key)
+                if s is not None:
+                    self._mem.move_to_end(key)
+                    out[i] = s
+                    self.hits_mem += 1
+                elif key in self._pending:
+                    out[i] = self._pending[key]
+                    self.hits_disk += 1
+                else:
+                    disk_todo.append(i)
+
+        found: Dict[Pair, float] = {}
+        if disk_todo and self.db_path is not None:
+            with self._db_lock:
+                found = self._lookup(self._conn(), list({pairs[i] for i in disk_todo}))
+
+        with self._lock:
+            for i in disk_todo:
+                s = found.get(pairs[i])
+                if s is None:
+                    self.misses += 1
+                else:
+                    out[i] = s
+                    self._remember(pairs[i], s)
+                    self.hits_disk += 1
+        return out
+
+    def put_many(self, pairs: Sequence[Pair], scores: Sequence[float]) -> None:
+        """Store scores in memory; SQLite writes are buffered (see flush())."""
+        if not pairs:
+            return
+        with self._lock:
+            for key, s in zip(pairs, scores):
+                self._remember(key, float(s))
+            if self.db_path is None:
+                return
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.update((key, float(s)) for key, s in zip(pairs, scores))
+            due = (
+                len(self._pending) >= self.flush_rows
+                or time.monotonic() - self._pending_since >= self.flush_interval_s
+            )
+        if due:
+            self.flush()
+
+    def prune(self, live: Iterable[Tuple[str, str]]) -> int:
+        """
+        Drop this namespace's persisted rows whose (chunk id, text hash) is not
+        in `live` (edited / removed chunks). Other namespaces are untouched.
+        Returns the number of rows deleted.
+        """
+        if self.db_path is None:
+            return 0
+        with self._db_lock:
+            self._flush_locked()
+            db = self._conn()
+            db.execute("CREATE TEMP TABLE IF NOT EXISTS live_chunks (doc_id TEXT NOT NULL, text_hash TEXT NOT NULL)")
+            db.execute("DELETE FROM live_chunks")
+            db.executemany("INSERT INTO live_chunks VALUES (?, ?)", ((str(d), str(h)) for d, h in live))
+            cur = db.execute(
+                "DELETE FROM rerank_scores_v2 WHERE ns = ? AND NOT EXISTS ("
+                " SELECT 1 FROM live_chunks l"
+                " WHERE l.doc_id = rerank_scores_v2.doc_id AND l.text_hash = rerank_scores_v2.text_hash)",
+                (self.namespace,),
+            )
+            db.execute("DELETE FROM live_chunks")
+            db.commit()
+            return int(cur.rowcount)
+
+    def _remember(self, key: Pair, score: float) -> None:
+        # caller holds _lock
+        if self.max_size <= 0:
+            return
+        self._mem[key] = score
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_size:
+            self._mem.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits_mem + self.hits_disk + self.misses
+            return {
+                "namespace": self.namespace,
+                "size_mem": len(self._mem),
+                "hits_mem": self.hits_mem,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": round((self.hits_mem + self.hits_disk) / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self.db_path is not None:
+                self._flush_locked()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
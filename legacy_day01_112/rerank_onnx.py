@@ -0,0 +1,175 @@
+# rerank_onnx.py
+# ---------------------------------------------------------
+# Reranker backends behind RetrieverEngine.get_reranker().
+#
+#   "torch"      sentence_transformers.CrossEncoder (default)
+#   "onnx"       ONNX Runtime, fp32 export of the same model
+#   "onnx-int8"  ONNX Runtime, dynamically int8-quantized weights
+#
+# OnnxCrossEncoder provides what the engine uses from CrossEncoder:
+# predict(pairs, batch_size=...), tokenizer and max_length, plus
+# score_features(features) for the pre-tokenized path (rerank_tokens.py).
+# Scores are logits -> the torch CrossEncoder's activation (Identity for
+# ms-marco, read at export time and kept in reranker.json), so the gate
+# thresholds (RERANK_MIN_MARGIN, gate_results) stay on the same scale.
+#
+# Exports live under indexing/encoders.DEFAULT_ONNX_DIR/<model slug>/ and
+# are created on first use (or up front: python rerank_onnx.py --int8).
+# int8 moves scores a little: replay the eval sets before switching
+#   python eval/eval_reranker_parity.py --backends onnx onnx-int8
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# Shared ONNX export tooling (indexing/encoders.py) lives at the repo root
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+from indexing import encoders  # noqa: E402
+
+BACKENDS = encoders.BACKENDS
+DEFAULT_BACKEND = encoders.DEFAULT_BACKEND
+
+INFO_FILE = "reranker.json"
+
+_ACTIVATIONS = {
+    "Identity": lambda x: x,
+    "Sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+
+def _activation_name(cross_encoder) -> str:
+    act = getattr(cross_encoder, "activation_fn", None) or getattr(cross_encoder, "default_activation_function", None)
+    name = type(act).__name__ if act is not None else "Identity"
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Unsupported reranker activation '{name}' (expected one of {sorted(_ACTIVATIONS)})")
+    return name
+
+
+def export_onnx(model_name: str, root: Path = encoders.DEFAULT_ONNX_DIR, int8: bool = False) -> Path:
+    """
+    Export the CrossEncoder's classification model (logits) + tokenizer to
+    ONNX, and with int8=True a dynamically quantized copy. Returns the
+    requested model path.
+    """
+    out_dir = encoders.onnx_dir_for(model_name, root)
+    fp32_path = encoders.onnx_model_path(model_name, int8=False, root=root)
+
+    if not fp32_path.exists():
+        from sentence_transformers import CrossEncoder
+
+        print(f"[Rerank] Exporting {model_name} to {fp32_path} ...")
+        ce = CrossEncoder(model_name, device="cpu")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        info = {
+            "model_name": model_name,
+            "activation": _activation_name(ce),
+            "max_length": int(ce.max_length or ce.tokenizer.model_max_length),
+        }
+        (out_dir / INFO_FILE).write_text(json.dumps(info, indent=2), encoding="utf-8")
+        ce.tokenizer.save_pretrained(str(out_dir))
+        encoders.export_model_onnx(ce.model.eval(), ce.tokenizer, fp32_path, output="logits", pair=True)
+
+    if not int8:
+        return fp32_path
+
+    int8_path = encoders.onnx_model_path(model_name, int8=True, root=root)
+    if not int8_path.exists():
+        encoders.quantize_onnx(fp32_path, int8_path)
+    return int8_path
+
+
+class OnnxCrossEncoder:
+    """Cross-encoder scores on ONNX Runtime, same inputs / outputs as the torch CrossEncoder."""
+
+    def __init__(
+        self,
+        model_name: str,
+        int8: bool = False,
+        root: Path = encoders.DEFAULT_ONNX_DIR,
+        threads: Optional[int] = None,
+    ) -> None:
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx reranker backends need onnxruntime (pip install onnxruntime).") from e
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.backend = "onnx-int8" if int8 else "onnx"
+
+        path = encoders.onnx_model_path(model_name, int8=int8, root=root)
+        info_path = path.parent / INFO_FILE
+        if not (path.exists() and info_path.exists()):
+            export_onnx(model_name, root=root, int8=int8)
+        info = json.loads(info_path.read_text(encoding="utf-8"))
+        self.max_length = int(info["max_length"])
+        self.activation = info["activation"]
+        self._activation = _ACTIVATIONS[self.activation]
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(path.parent))
+
+    def score_features(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        """(N,) scores for tokenized pairs (input_ids / attention_mask / token_type_ids)."""
+        feeds = {name: np.asarray(features[name], dtype=np.int64) for name in self._input_names}
+        logits = self.session.run(None, feeds)[0]
+        return self._activation(logits.astype(np.float32).reshape(len(logits), -1)[:, 0])
+
+    def predict(self, pairs: Sequence[Sequence[str]], batch_size: int = 32, **_) -> np.ndarray:
+        """CrossEncoder.predict for [query, text] pairs."""
+        if not len(pairs):
+            return np.zeros(0, dtype=np.float32)
+        order = np.argsort([-(len(p[0]) + len(p[1])) for p in pairs], kind="stable")
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for lo in range(0, len(pairs), batch_size):
+            idx = order[lo : lo + batch_size]
+            enc = self.tokenizer(
+                [pairs[i][0].strip() for i in idx],
+                [pairs[i][1].strip() for i in idx],
+                padding=True,
+                truncation="longest_first",
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            scores[idx] = self.score_features(enc)
+        return scores
+
+
+def load_reranker(backend: str, model_name: str, threads: Optional[int] = None):
+    """CrossEncoder for "torch", OnnxCrossEncoder for "onnx" / "onnx-int8"."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown reranker backend '{backend}' (expected one of {BACKENDS})")
+    if backend == "torch":
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(model_name)
+    return OnnxCrossEncoder(model_name, int8=backend == "onnx-int8", threads=threads)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Export the reranker to ONNX (optionally int8).")
+    ap.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    ap.add_argument("--int8", action="store_true", help="also write the int8-quantized model")
+    ap.add_argument("--out", type=Path, default=encoders.DEFAULT_ONNX_DIR)
+    args = ap.parse_args()
+    path = export_onnx(args.model, root=args.out, int8=args.int8)
+    print(f"[Rerank] Ready: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# rerank_tokens.py
+# ---------------------------------------------------------
+# Pre-tokenized chunks for the cross-encoder.
+#
+# CrossEncoder.predict([query, text]) re-tokenizes every candidate text on
+# every request, although the chunk set only changes with the index. This
+# module tokenizes every chunk once with the reranker's tokenizer (no
+# special tokens, truncated to the longest text part a pair can keep) and
+# persists the ids next to the other index artifacts:
+#
+#   data/rerank_tokens_<version>.npz
+#     offsets (N+1,) int64   chunk i = ids[offsets[i]:offsets[i+1]]
+#     ids     (T,)   int32
+#     lengths (N,)   int32   untruncated token count (decides pair truncation)
+#     + reranker model name, max_length, corpus hash (stale -> rebuild)
+#
+# Per request only the query is tokenized; PairEncoder.features() builds the
+# same input_ids / token_type_ids / attention_mask the tokenizer would for
+# (query, text) with truncation="longest_first", and predict() scores them
+# with the CrossEncoder's transformer + activation (or an ONNX backend's
+# score_features, see rerank_onnx.py).
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BUILD_BATCH_SIZE = 256
+
+_PROBE = ("query", "passage text")
+
+
+class PairEncoder:
+    """
+    (query ids, text ids) -> model inputs for one tokenizer + max_length.
+
+    The special-token layout of a pair ([CLS] q [SEP] t [SEP] for BERT,
+    <s> q </s></s> t </s> for RoBERTa, ...) is read once from the tokenizer
+    by encoding a probe pair, so no version-specific tokenizer internals are
+    needed.
+    """
+
+    def __init__(self, tokenizer, max_length: int) -> None:
+        self.tokenizer = tokenizer
+        self.max_length = int(max_length)
+        self.with_types = "token_type_ids" in tokenizer.model_input_names
+        self.pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+
+        q, t = (tokenizer(x, add_special_tokens=False)["input_ids"] for x in _PROBE)
+        full = tokenizer(*_PROBE)
+        ids = list(full["input_ids"])
+        types = list(full.get("token_type_ids") or [0] * len(ids))
+        qs = next(i for i in range(len(ids)) if ids[i : i + len(q)] == q)
+        ts = next(i for i in range(qs + len(q), len(ids)) if ids[i : i + len(t)] == t)
+        te = ts + len(t)
+        # (ids, token types) of the special tokens around each part
+        self.prefix = (ids[:qs], types[:qs])
+        self.middle = (ids[qs + len(q) : ts], types[qs + len(q) : ts])
+        self.suffix = (ids[te:], types[te:])
+        self.query_type, self.text_type = types[qs], types[ts]
+        # most text tokens any pair can keep
+        self.budget = self.max_length - (len(self.prefix[0]) + len(self.middle[0]) + len(self.suffix[0]))
+
+    def tokenize(self, texts: Sequence[str]) -> List[List[int]]:
+        return self.tokenizer([x.strip() for x in texts], add_special_tokens=False)["input_ids"]
+
+    def features(
+        self,
+        query_ids: Sequence[Sequence[int]],
+        text_ids: Sequence[Sequence[int]],
+        text_lengths: Sequence[int],
+    ) -> Dict[str, np.ndarray]:
+        """
+        Padded int64 inputs for aligned pairs, as tokenizer(q, t, truncation="longest_first")
+        builds them. text_ids may be pre-truncated; text_lengths are the untruncated counts.
+        """
+        rows, types = [], []
+        for q, t, n_text in zip(query_ids, text_ids, text_lengths):
+            n_q, n_t = truncate_pair(len(q), int(n_text), self.budget)
+            rows.append(self.prefix[0] + list(q[:n_q]) + self.middle[0] + [int(x) for x in t[:n_t]] + self.suffix[0])
+            types.append(
+                self.prefix[1] + [self.query_type] * n_q + self.middle[1] + [self.text_type] * n_t + self.suffix[1]
+            )
+
+        width = max(len(r) for r in rows)
+        input_ids = np.full((len(rows), width), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(rows), width), dtype=np.int64)
+        token_type_ids = np.zeros((len(rows), width), dtype=np.int64)
+        for i, (r, ty) in enumerate(zip(rows, types)):
+            input_ids[i, : len(r)] = r
+            attention_mask[i, : len(r)] = 1
+            token_type_ids[i, : len(r)] = ty
+
+        features = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if self.with_types:
+            features["token_type_ids"] = token_type_ids
+        return features
+
+
+class RerankTokenCache:
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        lengths: np.ndarray,
+        model_name: str,
+        max_length: int,
+        corpus_hash: str | None = None,
+    ) -> None:
+        self.offsets = offsets
+        self.ids = ids
+        self.lengths = lengths
+        self.model_name = model_name
+        self.max_length = int(max_length)
+        self.corpus_hash = corpus_hash
+
+    @property
+    def n_docs(self) -> int:
+        return int(self.offsets.size - 1)
+
+    def chunk_ids(self, row: int) -> np.ndarray:
+        return self.ids[self.offsets[row] : self.offsets[row + 1]]
+
+    def matches(self, model_name: str, max_length: int, corpus_hash: str | None, n_docs: int) -> bool:
+        return (
+            self.model_name == model_name
+            and self.max_length == int(max_length)
+            and self.corpus_hash == corpus_hash
+            and self.n_docs == int(n_docs)
+        )
+
+    # -----------------------------------------------------
+    # Build / persist
+    # -----------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        encoder: PairEncoder,
+        documents: Sequence[str],
+        model_name: str,
+        corpus_hash: str | None = None,
+        batch_size: int = BUILD_BATCH_SIZE,
+    ) -> "RerankTokenCache":
+        lengths = np.zeros(len(documents), dtype=np.int32)
+        parts: List[np.ndarray] = []
+        for lo in range(0, len(documents), batch_size):
+            for i, ids in enumerate(encoder.tokenize(documents[lo : lo + batch_size])):
+                lengths[lo + i] = len(ids)
+                parts.append(np.asarray(ids[: encoder.budget], dtype=np.int32))
+
+        offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+        np.cumsum([p.size for p in parts], out=offsets[1:])
+        ids = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+        return cls(offsets, ids, lengths, model_name, encoder.max_length, corpus_hash)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                offsets=self.offsets,
+                ids=self.ids,
+                lengths=self.lengths,
+                model_name=np.array(self.model_name),
+                max_length=np.array(self.max_length, dtype=np.int64),
+                corpus_hash=np.array(self.corpus_hash or ""),
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "RerankTokenCache":
+        with np.load(Path(path), allow_pickle=False) as z:
+            return cls(
+                offsets=z["offsets"],
+                ids=z["ids"],
+                lengths=z["lengths"],
+                model_name=str(z["model_name"]),
+                max_length=int(z["max_length"]),
+                corpus_hash=str(z["corpus_hash"]) or None,
+            )
+
+
+# ---------------------------------------------------------
+# Query time: (query ids, chunk ids) -> model inputs
+# ---------------------------------------------------------
+
+def truncate_pair(n_query: int, n_text: int, budget: int) -> Tuple[int, int]:
+    """Lengths kept by the tokenizer's "longest_first" truncation of a (query, text) pair."""
+    if n_query + n_text <= budget:
+        return n_query, n_text
+    short, long_ = sorted((n_query, n_text))
+    swap = n_query > n_text
+    long_ = short if short > budget else max(short, budget - short)
+    if short + long_ > budget:
+        short = budget // 2
+        long_ = short + budget % 2
+    return (long_, short) if swap else (short, long_)
+
+
+def _scorer(cross_encoder) -> Callable[[Dict[str, np.ndarray]], np.ndarray]:
+    """features -> (N,) scores: the backend's own score_features (ONNX), else the torch model + activation."""
+    if hasattr(cross_encoder, "score_features"):
+        return cross_encoder.score_features
+
+    import torch
+
+    model = cross_encoder.model.eval()
+    device = next(model.parameters()).device
+    activation = getattr(cross_encoder, "activation_fn", None) or getattr(
+        cross_encoder, "default_activation_function", None
+    )
+
+    def score(features: Dict[str, np.ndarray]) -> np.ndarray:
+        with torch.inference_mode():
+            logits = model(**{k: torch.from_numpy(v).to(device) for k, v in features.items()}, return_dict=True).logits
+            if activation is not None:
+                logits = activation(logits)
+            return logits.float().reshape(len(logits), -1)[:, 0].cpu().numpy()
+
+    return score
+
+
+def predict(
+    cross_encoder,
+    encoder: PairEncoder,
+    cache: RerankTokenCache,
+    pairs: Sequence[Tuple[str, str, Optional[int]]],
+    batch_size: int = 32,
+) -> List[float]:
+    """
+    CrossEncoder scores for (query, text, row) triples. Rows with cached
+    tokens skip text tokenization; row=None (text not in the cache) is
+    tokenized on the fly.
+    """
+    uniq = list(dict.fromkeys(p[0] for p in pairs))
+    q_ids = dict(zip(uniq, encoder.tokenize(uniq)))
+    t_ids = [cache.chunk_ids(row) if row is not None else None for _, _, row in pairs]
+    t_lens = [int(cache.lengths[row]) if row is not None else 0 for _, _, row in pairs]
+    missing = [i for i, ids in enumerate(t_ids) if ids is None]
+    if missing:
+        for i, ids in zip(missing, encoder.tokenize([pairs[i][1] for i in missing])):
+            t_ids[i], t_lens[i] = ids, len(ids)
+
+    # longest first, so each batch pads to similar lengths
+    order = np.argsort([-min(len(q_ids[p[0]]) + n, encoder.budget) for p, n in zip(pairs, t_lens)], kind="stable")
+
+    score = _scorer(cross_encoder)
+    scores = np.empty(len(pairs), dtype=np.float64)
+    for lo in range(0, len(pairs), batch_size):
+        idx = order[lo : lo + batch_size]
+        scores[idx] = score(
+            encoder.features([q_ids[pairs[i][0]] for i in idx], [t_ids[i] for i in idx], [t_lens[i] for i in idx])
+        )
+    return [float(s) for s in scores]
@@ -1,24 +1,44 @@
 # retriever.py – Day 56 version (dense + lexical + hybrid + reranker)
 
-from typing import List, Dict
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, List, Dict, Sequence, Tuple
 from pathlib import Path
 import json
 import hashlib
+import sys
+import threading
 
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer, CrossEncoder
-from sklearn.feature_extraction.text import TfidfVectorizer
 
 import time
 from trace_helpers import init_trace, add_timing, save_trace, clip_text
+from bm25_index import BM25Index, DEFAULT_K1, DEFAULT_B
+from rerank_cache import RerankScoreCache, make_namespace
+import rerank_cache
+from rerank_batcher import RerankBatcher
+import rerank_batcher
+from rerank_tokens import PairEncoder, RerankTokenCache
+import rerank_tokens
+import rerank_onnx
+
+# Shared index tooling (indexing/ann.py) lives at the repo root
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+from indexing import ann  # noqa: E402
+from indexing import embedding_cache, encoders, incremental, quantize, query_cache  # noqa: E402
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer, CrossEncoder
 
 # ---------------------------------------------------------
 # 1. Models, paths & corpus (Day 45 + 46)
 # ---------------------------------------------------------
 
 ARTIFACT_DIR = Path("data")
-ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Day 46: index versioning
 INDEX_VERSION = "v1"  # bump to "v2", "v3", ... when corpus/model changes
@@ -26,25 +46,80 @@ INDEX_VERSION = "v1"  # bump to "v2", "v3", ... when corpus/model changes
 EMB_PATH = ARTIFACT_DIR / f"doc_embeddings_{INDEX_VERSION}.npy"
 INDEX_PATH = ARTIFACT_DIR / f"faiss_index_{INDEX_VERSION}.bin"
 META_PATH = ARTIFACT_DIR / f"index_meta_{INDEX_VERSION}.json"
+HASHES_PATH = ARTIFACT_DIR / f"chunk_hashes_{INDEX_VERSION}.npy"  # per-chunk sha256, row order
+
+# On-disk embedding cache shared by all builders (indexing/embedding_cache.py); None disables it
+EMBEDDING_CACHE_DIR: Path | None = embedding_cache.DEFAULT_CACHE_DIR
+BM25_PATH = ARTIFACT_DIR / f"bm25_index_{INDEX_VERSION}.npz"
+
+# Load corpus (list of {"id", "text"} dicts)
+CORPUS_PATH = ARTIFACT_DIR / "corpus_chunks.json"
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-# Dense model
-model = SentenceTransformer(MODEL_NAME)
+# FAISS index type (factory string, see indexing/ann.py) + default search knobs.
+# Changing the factory triggers a rebuild on next load.
+INDEX_FACTORY = ann.DEFAULT_INDEX_FACTORY  # e.g. "IVF1024,Flat", "IVF1024,PQ32", "HNSW32"
+FAISS_NPROBE: int | None = None            # IVF lists probed per query
+FAISS_EF_SEARCH: int | None = None         # HNSW candidate list size
 
-# Day 56: Reranker model
-RERANKER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+# Vector storage for FAISS codes + the embedding file (see indexing/quantize.py):
+# "float32" (exact), "float16" (SQfp16, half the memory) or "int8" (SQ8, a quarter).
+# Changing it triggers a rebuild on next load (vectors come from the embedding cache).
+EMB_STORAGE = quantize.DEFAULT_STORAGE
 
-# Lazy-loaded reranker instance
-_reranker: CrossEncoder | None = None
+# Query-embedding LRU (shared with ragcore_v2, see indexing/query_cache.py); 0 disables it
+QUERY_CACHE_SIZE = query_cache.DEFAULT_MAX_SIZE
 
+# Query encoder backend (indexing/encoders.py): "torch", "onnx" or "onnx-int8".
+# Documents are always encoded by the torch model, so the index is unaffected.
+# Check parity first: python -m indexing.bench_encoders
+QUERY_ENCODER = encoders.DEFAULT_BACKEND
+QUERY_ENCODER_THREADS: int | None = None  # ONNX Runtime intra-op threads (None = runtime default)
 
-def get_reranker() -> CrossEncoder:
-    """Day 56: Lazy-load and cache the CrossEncoder reranker."""
-    global _reranker
-    if _reranker is None:
-        _reranker = CrossEncoder(RERANKER_MODEL_NAME)
-    return _reranker
+# Day 56: Reranker model
+RERANKER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Reranker backend (rerank_onnx.py): "torch", "onnx" or "onnx-int8".
+# Check score / top-k / gate-decision parity first: python eval/eval_reranker_parity.py
+RERANKER_BACKEND = rerank_onnx.DEFAULT_BACKEND
+RERANKER_THREADS: int | None = None  # ONNX Runtime intra-op threads (None = runtime default)
+
+# Cross-encoder score cache: in-memory LRU + optional SQLite tier
+# (namespaced by RERANKER_MODEL_NAME + INDEX_VERSION, keyed by query + chunk
+# id + chunk text hash, see rerank_cache.py)
+RERANK_CACHE_SIZE = rerank_cache.DEFAULT_MAX_SIZE  # 0 disables the memory tier
+RERANK_CACHE_PERSIST = True                         # data/rerank_cache.sqlite
+
+# Micro-batching of concurrent rerank calls (see rerank_batcher.py): pairs that
+# miss the score cache are pooled for up to RERANK_MAX_WAIT_MS / RERANK_MAX_BATCH
+# pairs and scored in one length-bucketed predict. A call with no other call
+# queued runs right away (serial callers pay no wait). False = predict per call.
+RERANK_BATCHING = True
+RERANK_MAX_WAIT_MS = rerank_batcher.DEFAULT_MAX_WAIT_MS
+RERANK_MAX_BATCH = rerank_batcher.DEFAULT_MAX_BATCH  # pairs per predict
+RERANK_MAX_QUEUE = rerank_batcher.DEFAULT_MAX_QUEUE  # waiting requests before callers block
+
+# Chunk token ids for the cross-encoder (see rerank_tokens.py), persisted as
+# data/rerank_tokens_<version>.npz and rebuilt when the corpus or reranker
+# changes; only the query is tokenized per request. False = raw text pairs.
+RERANK_PRETOKENIZED = True
+
+# Rerank cascade (hybrid_then_rerank_cascade): decide from the hybrid candidates
+# first and only run the cross-encoder in the ambiguous band.
+#   dominant   hybrid top1 - top2 >= CASCADE_SKIP_MARGIN and top1 dense cosine
+#              >= CASCADE_SKIP_MIN_DENSE -> keep the hybrid order, no rerank
+#   off_topic  best dense cosine < CASCADE_OFFTOPIC_MAX_DENSE -> no rerank
+#   ambiguous  everything else -> rerank as before
+# Off by default; compare accuracy / skip rate with eval/eval_cascade.py first.
+RERANK_CASCADE = False
+CASCADE_SKIP_MARGIN = 0.15         # hybrid scores are min-max fused, so in [0, 1]
+CASCADE_SKIP_MIN_DENSE = 0.50
+CASCADE_OFFTOPIC_MAX_DENSE = 0.20
+
+# Okapi BM25 knobs (term-frequency saturation / length normalization)
+BM25_K1 = DEFAULT_K1
+BM25_B = DEFAULT_B
 
 
 def l2_normalize(vectors: np.ndarray, eps: float = 1e-12) -> np.ndarray:
@@ -52,314 +127,1274 @@ def l2_normalize(vectors: np.ndarray, eps: float = 1e-12) -> np.ndarray:
     return vectors / (norms + eps)
 
 
-# Load corpus (list of {"id", "text"} dicts)
-CORPUS_PATH = ARTIFACT_DIR / "corpus_chunks.json"
-
-with CORPUS_PATH.open(encoding="utf-8") as f:
-    corpus = json.load(f)
-
-DOCUMENTS: List[str] = [item["text"] for item in corpus]
-
-
 def compute_corpus_hash(documents: List[str]) -> str:
     text = "\n".join(documents)
     return hashlib.md5(text.encode("utf-8")).hexdigest()
 
 
-CORPUS_HASH = compute_corpus_hash(DOCUMENTS)
-
-
 # ---------------------------------------------------------
-# 1.1 Build/load FAISS artifacts (Day 45 + 46)
+# 2. Utility: min–max normalization
 # ---------------------------------------------------------
 
-def _build_and_save_index():
-    """Build FAISS index + embeddings from scratch and save artifacts."""
-    print("[Day 45] Building embeddings and FAISS index from scratch...")
-
-    # 1. Compute embeddings
-    emb = model.encode(DOCUMENTS, convert_to_numpy=True)  # (N_docs, d)
-    emb = l2_normalize(emb).astype("float32")
-
-    # 2. Build index
-    dim = emb.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(emb)
-
-    # 3. Save artifacts
-    np.save(EMB_PATH, emb)
-    faiss.write_index(index, str(INDEX_PATH))
-
-    meta = {
-        "model_name": MODEL_NAME,
-        "dim": int(dim),
-        "n_docs": int(len(DOCUMENTS)),
-        "normalized": True,
-        "corpus_hash": CORPUS_HASH,
-        "index_version": INDEX_VERSION,
-    }
-    META_PATH.write_text(json.dumps(meta, indent=2), encoding="utf-8")
-
-    print("[Day 45] Saved embeddings, FAISS index, and metadata.")
-    return emb, index, meta
+def min_max_norm(x: np.ndarray) -> np.ndarray:
+    x_min = float(x.min())
+    x_max = float(x.max())
+    if x_max - x_min < 1e-8:
+        return np.zeros_like(x)
+    return (x - x_min) / (x_max - x_min)
 
 
-def _load_artifacts():
-    """Load FAISS index + embeddings if possible; otherwise build them."""
-    if not (EMB_PATH.exists() and INDEX_PATH.exists() and META_PATH.exists()):
-        return _build_and_save_index()
+DEFAULT_ALPHA = 0.1  # tuned weight for lexical score in hybrid (Day 55)
 
-    print("[Day 45] Loading FAISS artifacts from disk...")
 
-    try:
-        emb = np.load(EMB_PATH)
-        index = faiss.read_index(str(INDEX_PATH))
-        meta = json.loads(META_PATH.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"[ERROR][Day 46] Failed to load artifacts: {e}")
-        print("[Day 46] Rebuilding index...")
-        return _build_and_save_index()
+def compute_hybrid_vector(
+    dense_scores: np.ndarray,
+    lexical_scores: np.ndarray,
+    alpha: float,
+) -> np.ndarray:
+    dense_norm = min_max_norm(dense_scores)
+    lex_norm = min_max_norm(lexical_scores)
+    return alpha * lex_norm + (1.0 - alpha) * dense_norm
 
-    # Self-healing checks
-    if meta.get("index_version") != INDEX_VERSION:
-        print(f"[WARN][Day 46] Index version mismatch. Rebuilding...")
-        return _build_and_save_index()
 
-    if meta.get("model_name") != MODEL_NAME:
-        print(f"[WARN][Day 46] Model changed. Rebuilding...")
-        return _build_and_save_index()
+def _select_best_doc(hybrid_scores: np.ndarray) -> int:
+    mean = float(hybrid_scores.mean())
+    std = float(hybrid_scores.std())
+    thr = max(0.0, min(mean - std, 1.0))
 
-    if meta.get("corpus_hash") != CORPUS_HASH or meta.get("n_docs") != len(DOCUMENTS):
-        print("[WARN][Day 46] Corpus changed. Rebuilding index...")
-        return _build_and_save_index()
+    mask = hybrid_scores >= thr
+    candidate_indices = np.where(mask)[0]
 
-    if meta.get("dim") != emb.shape[1]:
-        print("[WARN][Day 46] Dimension mismatch. Rebuilding index...")
-        return _build_and_save_index()
+    if candidate_indices.size == 0:
+        return int(np.argmax(hybrid_scores))
 
-    return emb, index, meta
+    return int(candidate_indices[np.argmax(hybrid_scores[candidate_indices])])
 
 
-DOC_EMBEDDINGS, faiss_index, META = _load_artifacts()
+def fuse_hybrid_rows(
+    dense_rows: np.ndarray,
+    dense_scores: np.ndarray,
+    bm25_rows: np.ndarray,
+    bm25_scores: np.ndarray,
+    top_k: int,
+    alpha: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized hybrid fusion over corpus row ids.
 
-_dummy = model.encode(["hello world"], convert_to_numpy=True)
-MODEL_DIM = _dummy.shape[1]
+    Candidates are the union of both stages' rows; a row missing from one
+    stage gets 0.0 for that stage (same as the old dict merge). Returns
+    (rows, hybrid, dense, bm25) for the top_k rows, best first; all empty
+    when neither stage returned a row (empty corpus, everything filtered).
+    """
+    rows = np.union1d(dense_rows, bm25_rows)  # sorted, unique
+    if rows.size == 0 or top_k <= 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return rows.astype(np.int64), empty, empty, empty
+    dense = np.zeros(rows.size, dtype=np.float32)
+    bm25 = np.zeros(rows.size, dtype=np.float32)
+    dense[np.searchsorted(rows, dense_rows)] = dense_scores
+    bm25[np.searchsorted(rows, bm25_rows)] = bm25_scores
 
-print(f"[Day 44] Model embedding dimension: {MODEL_DIM}")
-print(f"[Day 44] Corpus embedding dimension: {DOC_EMBEDDINGS.shape[1]}")
-print(f"[Day 44] FAISS index dimension: {faiss_index.d}")
-print(f"[Day 45] Loaded meta: {META}")
+    hybrid = compute_hybrid_vector(dense_scores=dense, lexical_scores=bm25, alpha=alpha)
 
-assert MODEL_DIM == DOC_EMBEDDINGS.shape[1] == faiss_index.d == META["dim"], (
-    f"[ERROR][Day 44/45] Dimension mismatch: "
-    f"model={MODEL_DIM}, doc={DOC_EMBEDDINGS.shape[1]}, "
-    f"index={faiss_index.d}, meta={META['dim']}"
-)
+    top = np.argsort(-hybrid, kind="stable")[: min(top_k, rows.size)]
+    return rows[top], hybrid[top], dense[top], bm25[top]
 
-assert META["n_docs"] == len(DOCUMENTS), (
-    f"[ERROR][Day 45] Document count mismatch: meta={META['n_docs']}, corpus={len(DOCUMENTS)}"
-)
 
-_doc_norms = np.linalg.norm(DOC_EMBEDDINGS, axis=1)
-assert np.allclose(_doc_norms.mean(), 1.0, atol=1e-2), (
-    "[ERROR][Day 44] Corpus embeddings are not approximately L2-normalized."
-)
+def cascade_band(
+    candidates: List[Dict],
+    skip_margin: float = CASCADE_SKIP_MARGIN,
+    skip_min_dense: float = CASCADE_SKIP_MIN_DENSE,
+    offtopic_max_dense: float = CASCADE_OFFTOPIC_MAX_DENSE,
+) -> Dict[str, Any]:
+    """
+    Rerank cascade decision on hybrid candidates (best first):
+    {"band": "dominant" | "off_topic" | "ambiguous", "rerank_skipped", "reason",
+     "hybrid_margin", "top_dense", "max_dense"}.
+    """
+    top1 = float(candidates[0]["score_hybrid"]) if candidates else None
+    top2 = float(candidates[1]["score_hybrid"]) if len(candidates) > 1 else None
+    margin = top1 - top2 if top2 is not None else None
+    top_dense = float(candidates[0]["score_dense"]) if candidates else None
+    max_dense = max((float(c["score_dense"]) for c in candidates), default=None)
+
+    if max_dense is None or max_dense < offtopic_max_dense:
+        band, reason = "off_topic", f"max dense score < {offtopic_max_dense}"
+    elif margin is not None and margin >= skip_margin and top_dense >= skip_min_dense:
+        band, reason = "dominant", f"hybrid margin >= {skip_margin} and top dense score >= {skip_min_dense}"
+    else:
+        band, reason = "ambiguous", None
 
+    return {
+        "band": band,
+        "rerank_skipped": band != "ambiguous",
+        "reason": reason,
+        "hybrid_margin": margin,
+        "top_dense": top_dense,
+        "max_dense": max_dense,
+    }
 
-# ---------------------------------------------------------
-# 1.2 Lexical index
-# ---------------------------------------------------------
 
-BM25_VECTORIZER = TfidfVectorizer(ngram_range=(1, 2), lowercase=True)
-BM25_MATRIX = BM25_VECTORIZER.fit_transform(DOCUMENTS)  # (N_docs, V)
+def _per_query(value, n: int, name: str) -> List:
+    """Broadcast a scalar knob to N queries, or validate a per-query sequence."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        if len(value) != n:
+            raise ValueError(f"{name} has {len(value)} values for {n} queries")
+        return list(value)
+    return [value] * n
 
 
-# ---------------------------------------------------------
-# 2. Utility: min–max normalization
-# ---------------------------------------------------------
+def _attach_rerank_scores(candidates: List[Dict], scores, top_k: int) -> List[Dict]:
+    """
+    Attach:
+      - score_rerank
+      - score (universal) == score_rerank
+    """
+    for cand, s in zip(candidates, scores):
+        sr = float(s)
+        cand["score_rerank"] = sr
+        cand["score"] = sr  # ✅ universal key (rerank)
 
-def min_max_norm(x: np.ndarray) -> np.ndarray:
-    x_min = float(x.min())
-    x_max = float(x.max())
-    if x_max - x_min < 1e-8:
-        return np.zeros_like(x)
-    return (x - x_min) / (x_max - x_min)
+    candidates_sorted = sorted(candidates, key=lambda x: x["score_rerank"], reverse=True)
+    return candidates_sorted[:top_k]
 
 
 # ---------------------------------------------------------
-# 3. Dense helpers (FAISS)
+# 3. Retriever engine
 # ---------------------------------------------------------
 
-def _encode_query_dense(query: str) -> np.ndarray:
-    """Encode and normalize query for dense search."""
-    q_emb = model.encode([query], convert_to_numpy=True)
-    q_emb = l2_normalize(q_emb).astype("float32")
+class RetrieverEngine:
+    """
+    Owns every heavy resource of the retrieval pipeline: the dense model,
+    the corpus, the FAISS artifacts, the lexical index and the reranker.
 
-    q_norms = np.linalg.norm(q_emb, axis=1)
-    assert np.allclose(q_norms, 1.0, atol=1e-3), "[ERROR][Day 44] Query embedding not L2-normalized."
-    return q_emb
+    Nothing is loaded in __init__. Resources are built on first use, or
+    up front through warm() (e.g. at service startup).
+    """
 
+    def __init__(
+        self,
+        artifact_dir: Path = ARTIFACT_DIR,
+        index_version: str = INDEX_VERSION,
+        model_name: str = MODEL_NAME,
+        reranker_model_name: str = RERANKER_MODEL_NAME,
+        reranker_backend: str = RERANKER_BACKEND,
+        reranker_threads: int | None = RERANKER_THREADS,
+        bm25_k1: float = BM25_K1,
+        bm25_b: float = BM25_B,
+        index_factory: str = INDEX_FACTORY,
+        nprobe: int | None = FAISS_NPROBE,
+        ef_search: int | None = FAISS_EF_SEARCH,
+        emb_storage: str = EMB_STORAGE,
+        query_cache_size: int = QUERY_CACHE_SIZE,
+        query_encoder: str = QUERY_ENCODER,
+        query_encoder_threads: int | None = QUERY_ENCODER_THREADS,
+        embedding_cache_dir: Path | None = EMBEDDING_CACHE_DIR,
+        rerank_cache_size: int = RERANK_CACHE_SIZE,
+        rerank_cache_persist: bool = RERANK_CACHE_PERSIST,
+        rerank_batching: bool = RERANK_BATCHING,
+        rerank_max_wait_ms: float = RERANK_MAX_WAIT_MS,
+        rerank_max_batch: int = RERANK_MAX_BATCH,
+        rerank_max_queue: int = RERANK_MAX_QUEUE,
+        rerank_pretokenized: bool = RERANK_PRETOKENIZED,
+        rerank_cascade: bool = RERANK_CASCADE,
+        cascade_skip_margin: float = CASCADE_SKIP_MARGIN,
+        cascade_skip_min_dense: float = CASCADE_SKIP_MIN_DENSE,
+        cascade_offtopic_max_dense: float = CASCADE_OFFTOPIC_MAX_DENSE,
+    ) -> None:
+        self.artifact_dir = Path(artifact_dir)
+        self.index_version = index_version
+        self.model_name = model_name
+        self.reranker_model_name = reranker_model_name
+        if reranker_backend not in rerank_onnx.BACKENDS:
+            raise ValueError(f"Unknown reranker backend '{reranker_backend}' (expected one of {rerank_onnx.BACKENDS})")
+        self.reranker_backend = reranker_backend
+        self.reranker_threads = reranker_threads
+        self.bm25_k1 = float(bm25_k1)
+        self.bm25_b = float(bm25_b)
+        self.index_factory = index_factory
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.emb_storage = quantize.check_storage(emb_storage)
+        # factory actually built: index_factory with its vectors stored as emb_storage
+        self.faiss_factory = quantize.storage_factory(index_factory, self.emb_storage)
+        self.query_cache = query_cache.shared_cache(max_size=query_cache_size)
+        if query_encoder not in encoders.BACKENDS:
+            raise ValueError(f"Unknown query encoder '{query_encoder}' (expected one of {encoders.BACKENDS})")
+        self.query_encoder_backend = query_encoder
+        self.query_encoder_threads = query_encoder_threads
+        self.query_cache_key = encoders.cache_key(model_name, query_encoder)
+        self.embedding_cache_dir = embedding_cache_dir
+
+        self.corpus_path = self.artifact_dir / "corpus_chunks.json"
+        self.emb_path = self.artifact_dir / f"doc_embeddings_{index_version}.npy"
+        self.index_path = self.artifact_dir / f"faiss_index_{index_version}.bin"
+        self.meta_path = self.artifact_dir / f"index_meta_{index_version}.json"
+        self.hashes_path = self.artifact_dir / f"chunk_hashes_{index_version}.npy"
+        self.ids_path = self.artifact_dir / f"chunk_ids_{index_version}.npy"
+        self.bm25_path = self.artifact_dir / f"bm25_index_{index_version}.npz"
+        self.rerank_tokens_path = self.artifact_dir / f"rerank_tokens_{index_version}.npz"
+        self.rerank_cache = RerankScoreCache(
+            # ONNX scores differ slightly from torch: each backend caches its own
+            make_namespace(encoders.cache_key(reranker_model_name, reranker_backend), index_version),
+            max_size=rerank_cache_size,
+            db_path=self.artifact_dir / "rerank_cache.sqlite" if rerank_cache_persist else None,
+        )
+        self.rerank_batcher = (
+            RerankBatcher(
+                self._predict_direct,
+                max_wait_ms=rerank_max_wait_ms,
+                max_batch=rerank_max_batch,
+                max_queue=rerank_max_queue,
+            )
+            if rerank_batching
+            else None
+        )
+        self.rerank_pretokenized = bool(rerank_pretokenized)
+        self.rerank_cascade = bool(rerank_cascade)
+        self.cascade_skip_margin = float(cascade_skip_margin)
+        self.cascade_skip_min_dense = float(cascade_skip_min_dense)
+        self.cascade_offtopic_max_dense = float(cascade_offtopic_max_dense)
+
+        self.model: SentenceTransformer | None = None
+        self.query_encoder = None  # encoders.TorchQueryEncoder / OnnxQueryEncoder
+        self.corpus: List[Dict[str, Any]] = []
+        self.documents: List[str] = []
+        self.corpus_hash: str | None = None
+        self.doc_embeddings: np.ndarray | None = None
+        self.faiss_index: faiss.Index | None = None
+        self._row_of_id: np.ndarray | None = None  # FAISS id -> corpus row (incremental.id_to_row)
+        self.meta: Dict[str, Any] = {}
+        self.model_dim: int | None = None
+        self.bm25_index: BM25Index | None = None
+
+        self._reranker: CrossEncoder | None = None
+        self._pair_encoder: PairEncoder | None = None
+        self.rerank_tokens: RerankTokenCache | None = None
+        self._rerank_tokens_loaded = False
+        self._row_by_id: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_ms: Dict[str, float] = {}
+
+    # -----------------------------------------------------
+    # Lifecycle
+    # -----------------------------------------------------
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def warm(self, with_reranker: bool = False) -> "RetrieverEngine":
+        """Load model, corpus, FAISS and lexical index (idempotent, thread-safe)."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+        if with_reranker:
+            self.get_reranker()
+            self.rerank_token_cache()
+        return self
+
+    def _load(self) -> None:
+        from sentence_transformers import SentenceTransformer
 
-def dense_search(query: str, top_k: int = 5) -> List[Dict]:
-    """
-    Return top_k documents by dense similarity using FAISS.
-    Output format: list of {"id", "text", "score_dense", "score"} dicts.
-    """
-    q_emb = _encode_query_dense(query)
-    top_k = min(top_k, len(DOCUMENTS))
-    scores, indices = faiss_index.search(q_emb, top_k)
-
-    results: List[Dict] = []
-    for idx, score in zip(indices[0], scores[0]):
-        doc = corpus[idx]
-        s = float(score)
-        results.append(
-            {
-                "id": doc.get("id", str(idx)),
-                "text": doc["text"],
-                "score_dense": s,
-                "score": s,  # ✅ universal key
-            }
+        t0 = time.perf_counter()
+        self.model = SentenceTransformer(self.model_name)
+        self.load_ms["model"] = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        self.query_encoder = encoders.load_query_encoder(
+            self.query_encoder_backend, self.model_name, model=self.model, threads=self.query_encoder_threads
         )
-    return results
+        self.load_ms["query_encoder"] = (time.perf_counter() - t0) * 1000
 
+        t0 = time.perf_counter()
+        with self.corpus_path.open(encoding="utf-8") as f:
+            self.corpus = json.load(f)
+        self.documents = [item["text"] for item in self.corpus]
+        self.corpus_hash = compute_corpus_hash(self.documents)
+        self.load_ms["corpus"] = (time.perf_counter() - t0) * 1000
 
-# ---------------------------------------------------------
-# 3.1 Lexical retrieval
-# ---------------------------------------------------------
+        t0 = time.perf_counter()
+        self.doc_embeddings, self.faiss_index, self.meta = self._load_artifacts()
+        ids = incremental.load_ids(self.ids_path)
+        if ids is None or ids.size != len(self.documents):
+            ids = np.arange(len(self.documents))  # built before chunk ids were stored: id == row
+        self._row_of_id = incremental.id_to_row(ids)
+        self.load_ms["faiss"] = (time.perf_counter() - t0) * 1000
+
+        self.model_dim = int(self.model.get_sentence_embedding_dimension())
+
+        print(f"[Day 44] Model embedding dimension: {self.model_dim}")
+        print(f"[Day 44] Corpus embedding dimension: {self.doc_embeddings.shape[1]}")
+        print(f"[Day 44] FAISS index dimension: {self.faiss_index.d}")
+        print(f"[Day 45] Loaded meta: {self.meta}")
+
+        assert self.query_encoder.dim == self.model_dim, (
+            f"[ERROR] Query encoder '{self.query_encoder_backend}' dim {self.query_encoder.dim} != model dim {self.model_dim}"
+        )
+        assert self.model_dim == self.doc_embeddings.shape[1] == self.faiss_index.d == self.meta["dim"], (
+            f"[ERROR][Day 44/45] Dimension mismatch: "
+            f"model={self.model_dim}, doc={self.doc_embeddings.shape[1]}, "
+            f"index={self.faiss_index.d}, meta={self.meta['dim']}"
+        )
 
-def bm25_search(query: str, top_k: int = 5) -> List[Dict]:
-    """
-    Return top_k documents by BM25-like lexical similarity.
-    Output format: list of {"id", "text", "score_bm25", "score"} dicts.
-    """
-    q_vec = BM25_VECTORIZER.transform([query])  # (1, V)
-    scores = (BM25_MATRIX @ q_vec.T).toarray().ravel()  # (N_docs,)
+        assert self.meta["n_docs"] == len(self.documents), (
+            f"[ERROR][Day 45] Document count mismatch: meta={self.meta['n_docs']}, corpus={len(self.documents)}"
+        )
 
-    top_k = min(top_k, len(DOCUMENTS))
-    top_idx = np.argsort(-scores)[:top_k]
+        # Norm facts come from build time (index meta), not a scan of the matrix
+        assert self.meta.get("normalized") and np.isclose(self.meta["norm_mean"], 1.0, atol=1e-2), (
+            "[ERROR][Day 44] Corpus embeddings are not approximately L2-normalized."
+        )
 
-    results: List[Dict] = []
-    for idx in top_idx:
-        doc = corpus[idx]
-        s = float(scores[idx])
-        results.append(
-            {
-                "id": doc.get("id", str(idx)),
-                "text": doc["text"],
-                "score_bm25": s,
-                "score": s,  # ✅ universal key (lexical)
-            }
+        # 1.2 Lexical index
+        t0 = time.perf_counter()
+        self.bm25_index = self._load_bm25()
+        self.load_ms["lexical"] = (time.perf_counter() - t0) * 1000
+
+        # Drop persisted rerank scores of chunks that were edited or removed (this namespace only)
+        if self.rerank_cache.db_path is not None:
+            hashes = incremental.load_hashes(self.hashes_path)
+            if hashes is None or hashes.size != len(self.documents):
+                hashes = incremental.chunk_hashes(self.documents)
+            live = ((str(self._doc_id(i)), h.decode()) for i, h in enumerate(hashes))
+            n_pruned = self.rerank_cache.prune(live)
+            if n_pruned:
+                print(f"[Rerank] Pruned {n_pruned} cached scores of changed chunks.")
+
+    def get_reranker(self) -> CrossEncoder:
+        """Day 56: Lazy-load and cache the reranker (CrossEncoder, or its ONNX backend)."""
+        if self._reranker is None:
+            with self._lock:
+                if self._reranker is None:
+                    t0 = time.perf_counter()
+                    self._reranker = rerank_onnx.load_reranker(
+                        self.reranker_backend, self.reranker_model_name, threads=self.reranker_threads
+                    )
+                    self.load_ms["reranker"] = (time.perf_counter() - t0) * 1000
+        return self._reranker
+
+    def rerank_token_cache(self) -> Tuple[PairEncoder | None, RerankTokenCache | None]:
+        """
+        (PairEncoder, RerankTokenCache) for the reranker, loaded or built on
+        first use; (None, None) when disabled or the reranker is not a
+        tokenizer + transformers model (then raw text pairs are scored).
+        """
+        if self.rerank_pretokenized and not self._rerank_tokens_loaded:
+            reranker = self.get_reranker()
+            self.warm()
+            with self._lock:
+                if not self._rerank_tokens_loaded:
+                    t0 = time.perf_counter()
+                    self._pair_encoder, self.rerank_tokens = self._load_rerank_tokens(reranker)
+                    self.load_ms["rerank_tokens"] = (time.perf_counter() - t0) * 1000
+                    self._rerank_tokens_loaded = True
+        return self._pair_encoder, self.rerank_tokens
+
+    def _load_rerank_tokens(self, reranker) -> Tuple[PairEncoder | None, RerankTokenCache | None]:
+        """Load the persisted chunk tokens if they match corpus + reranker; otherwise rebuild them."""
+        tokenizer = getattr(reranker, "tokenizer", None)
+        scorable = getattr(reranker, "model", None) is not None or hasattr(reranker, "score_features")
+        if tokenizer is None or not scorable:
+            print("[WARN][Rerank] Reranker has no tokenizer/model to feed directly; scoring raw pairs.")
+            return None, None
+
+        encoder = PairEncoder(tokenizer, getattr(reranker, "max_length", None) or tokenizer.model_max_length)
+        self._row_by_id = {str(self._doc_id(i)): i for i in range(len(self.corpus))}
+
+        if self.rerank_tokens_path.exists():
+            try:
+                cache = RerankTokenCache.load(self.rerank_tokens_path)
+            except Exception as e:
+                print(f"[ERROR][Rerank] Failed to load {self.rerank_tokens_path}: {e}. Rebuilding...")
+            else:
+                if cache.matches(self.reranker_model_name, encoder.max_length, self.corpus_hash, len(self.documents)):
+                    return encoder, cache
+                print("[WARN][Rerank] Corpus or reranker changed. Rebuilding chunk tokens...")
+
+        print(f"[Rerank] Pre-tokenizing {len(self.documents)} chunks for {self.reranker_model_name}...")
+        cache = RerankTokenCache.build(encoder, self.documents, self.reranker_model_name, corpus_hash=self.corpus_hash)
+        cache.save(self.rerank_tokens_path)
+        print(f"[Rerank] Saved {cache.ids.size} tokens to {self.rerank_tokens_path}")
+        return encoder, cache
+
+    def chunk_row(self, cand: Dict) -> int | None:
+        """Corpus row of a candidate whose tokens are cached (None: tokenize its text)."""
+        row = self._row_by_id.get(str(cand["id"]))
+        return row if row is not None and self.documents[row] == cand["text"] else None
+
+    # -----------------------------------------------------
+    # 1.1 Build/load FAISS artifacts (Day 45 + 46)
+    # -----------------------------------------------------
+
+    def _build_and_save_index(self):
+        """Build FAISS index + embeddings from scratch and save artifacts."""
+        print("[Day 45] Building embeddings and FAISS index from scratch...")
+
+        # 1. Compute embeddings
+        emb = self._encode_documents(self.documents)  # (N_docs, d)
+
+        # 2. Build index (ID-mapped, id == row for now; later corpus edits keep the ids of unchanged chunks)
+        index = ann.build_index(emb, self.faiss_factory, id_map=True)
+
+        # 3. Save artifacts
+        ids = np.arange(len(self.documents))
+        return self._save_artifacts(emb, index, incremental.chunk_hashes(self.documents), ids)
+
+    def _encode_documents(self, texts: List[str]) -> np.ndarray:
+        """Normalized document vectors; texts already in the embedding cache are not re-encoded."""
+        def encode(batch: List[str]) -> np.ndarray:
+            return l2_normalize(self.model.encode(batch, convert_to_numpy=True)).astype("float32")
+
+        if self.embedding_cache_dir is None:
+            return encode(texts)
+        return embedding_cache.cached_encode(texts, self.model_name, encode, root=self.embedding_cache_dir)
+
+    def _save_artifacts(self, emb: np.ndarray, index: faiss.Index, hashes: np.ndarray, ids: np.ndarray):
+        dim = emb.shape[1]
+        self.artifact_dir.mkdir(parents=True, exist_ok=True)
+        quantize.save_embeddings(self.emb_path, emb, self.emb_storage)
+        faiss.write_index(index, str(self.index_path))
+        incremental.save_hashes(self.hashes_path, hashes)
+        incremental.save_ids(self.ids_path, ids)
+        # serve from the file (page cache) rather than keeping the build copy resident;
+        # norms are those of the stored (possibly quantized) vectors
+        del emb
+        emb = quantize.load_embeddings(self.emb_path, self.emb_storage)
+        emb_meta = ann.embedding_meta(emb)
+
+        meta = {
+            "model_name": self.model_name,
+            "dim": int(dim),
+            "n_docs": int(len(self.documents)),
+            "normalized": True,
+            "corpus_hash": self.corpus_hash,
+            "index_version": self.index_version,
+            **ann.index_meta(self.faiss_factory, index),
+            **quantize.storage_meta(self.emb_storage),
+            **emb_meta,
+        }
+        self.meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+        print("[Day 45] Saved embeddings, FAISS index, and metadata.")
+        return emb, index, meta
+
+    def _load_artifacts(self):
+        """Load FAISS index + embeddings if possible; otherwise build them."""
+        if not (self.emb_path.exists() and self.index_path.exists() and self.meta_path.exists()):
+            return self._build_and_save_index()
+
+        print("[Day 45] Loading FAISS artifacts from disk...")
+
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            # memory-mapped: only dense_scores_all touches it, FAISS holds its own vectors.
+            # The reader follows the storage the index was built with.
+            emb = quantize.load_embeddings(self.emb_path, meta.get("emb_storage", quantize.DEFAULT_STORAGE))
+            index = faiss.read_index(str(self.index_path))
+        except Exception as e:
+            print(f"[ERROR][Day 46] Failed to load artifacts: {e}")
+            print("[Day 46] Rebuilding index...")
+            return self._build_and_save_index()
+
+        # Self-healing checks
+        if meta.get("index_version") != self.index_version:
+            print(f"[WARN][Day 46] Index version mismatch. Rebuilding...")
+            return self._build_and_save_index()
+
+        if meta.get("model_name") != self.model_name:
+            print(f"[WARN][Day 46] Model changed. Rebuilding...")
+            return self._build_and_save_index()
+
+        if meta.get("index_factory", ann.DEFAULT_INDEX_FACTORY) != self.faiss_factory:
+            print(f"[WARN] Index factory changed to '{self.faiss_factory}'. Rebuilding index...")
+            return self._build_and_save_index()
+
+        if meta.get("emb_storage", quantize.DEFAULT_STORAGE) != self.emb_storage:
+            print(f"[WARN] Embedding storage changed to '{self.emb_storage}'. Rebuilding index...")
+            return self._build_and_save_index()
+
+        if meta.get("dim") != emb.shape[1] or emb.shape[0] != meta.get("n_docs"):
+            print("[WARN][Day 46] Dimension mismatch. Rebuilding index...")
+            return self._build_and_save_index()
+
+        if meta.get("corpus_hash") != self.corpus_hash or meta.get("n_docs") != len(self.documents):
+            old_hashes = incremental.load_hashes(self.hashes_path)
+            old_ids = incremental.load_ids(self.ids_path)
+            if old_hashes is None or old_hashes.size != emb.shape[0]:
+                print("[WARN][Day 46] Corpus changed (no chunk hashes). Rebuilding index...")
+                return self._build_and_save_index()
+            if old_ids is not None and old_ids.size != emb.shape[0]:
+                print("[WARN][Day 46] Corpus changed (chunk ids out of date). Rebuilding index...")
+                return self._build_and_save_index()
+            return self._update_index_incremental(emb, index, old_hashes, old_ids)
+
+        if "norm_mean" not in meta:
+            # meta written before norms were recorded: scan once, then persist
+            print("[Day 46] Recording embedding norms in index meta (one-time scan)...")
+            meta.update(ann.embedding_meta(emb))
+            self.meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+        return emb, index, meta
+
+    def _update_index_incremental(
+        self,
+        old_emb: np.ndarray,
+        index: faiss.Index,
+        old_hashes: np.ndarray,
+        old_ids: np.ndarray | None,
+    ):
+        """Corpus changed: encode only new/changed chunks and patch the ID-mapped index (unchanged chunks keep their ids)."""
+        new_hashes = incremental.chunk_hashes(self.documents)
+        diff = incremental.diff_chunks(old_hashes, new_hashes, old_ids)
+        print(f"[Index] Corpus changed, incremental update: {diff.summary()}")
+
+        emb = incremental.assemble_embeddings(diff, old_emb, self.documents, self._encode_documents)
+        index, mode = incremental.patch_index(index, emb, diff, self.faiss_factory)
+        print(f"[Index] FAISS index {mode} ({index.ntotal} vectors).")
+        return self._save_artifacts(emb, index, new_hashes, diff.ids)
+
+    # -----------------------------------------------------
+    # 1.2 Build/load BM25 inverted index (next to FAISS artifacts)
+    # -----------------------------------------------------
+
+    def _load_bm25(self) -> BM25Index:
+        """Load the persisted BM25 index if it matches corpus + knobs; otherwise rebuild it."""
+        if self.bm25_path.exists():
+            try:
+                index = BM25Index.load(self.bm25_path)
+            except Exception as e:
+                print(f"[ERROR][BM25] Failed to load {self.bm25_path}: {e}. Rebuilding...")
+            else:
+                if (
+                    index.corpus_hash == self.corpus_hash
+                    and index.n_docs == len(self.documents)
+                    and index.k1 == self.bm25_k1
+                    and index.b == self.bm25_b
+                ):
+                    return index
+                print("[WARN][BM25] Corpus or k1/b changed. Rebuilding BM25 index...")
+
+        print("[BM25] Building inverted index from scratch...")
+        index = BM25Index.build(self.documents, k1=self.bm25_k1, b=self.bm25_b, corpus_hash=self.corpus_hash)
+        index.save(self.bm25_path)
+        print(f"[BM25] Saved {len(index.terms)} terms / {index.doc_ids.size} postings to {self.bm25_path}")
+        return index
+
+    # -----------------------------------------------------
+    # 3. Dense helpers (FAISS)
+    # -----------------------------------------------------
+
+    def _encode_uncached(self, queries: List[str]) -> np.ndarray:
+        # normalized (N, d) float32 from the configured backend (torch / ONNX)
+        return self.query_encoder.encode(queries)
+
+    def _encode_query_dense(self, query: str) -> np.ndarray:
+        """Encode and normalize query for dense search (served from the query cache when seen before)."""
+        self.warm()
+        q_emb = self.query_cache.get_or_encode(self.query_cache_key, [query], self._encode_uncached)
+
+        q_norms = np.linalg.norm(q_emb, axis=1)
+        assert np.allclose(q_norms, 1.0, atol=1e-3), "[ERROR][Day 44] Query embedding not L2-normalized."
+        return q_emb
+
+    def _encode_queries_dense(self, queries: Sequence[str]) -> np.ndarray:
+        """Encode and normalize N queries -> (N, d) float32; only cache misses hit the model, in one call."""
+        self.warm()
+        return self.query_cache.get_or_encode(self.query_cache_key, list(queries), self._encode_uncached)
+
+    def query_cache_stats(self) -> Dict[str, float]:
+        return self.query_cache.stats()
+
+    def _faiss_search(
+        self,
+        q_emb: np.ndarray,
+        top_k: int,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ):
+        """FAISS search with per-call knobs falling back to the engine defaults."""
+        return ann.search(
+            self.faiss_index,
+            q_emb,
+            top_k,
+            nprobe=nprobe if nprobe is not None else self.nprobe,
+            ef_search=ef_search if ef_search is not None else self.ef_search,
         )
-    return results
 
+    def _dense_stage(
+        self,
+        q_emb: np.ndarray,
+        top_k: int,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Dense stage in index space: one (rows, scores) pair per query row of q_emb.
+        FAISS ids are stable chunk ids, mapped back to corpus rows here.
+        ANN indexes may return fewer than top_k hits (id -1); those are dropped.
+        """
+        top_k = min(top_k, len(self.documents))
+        scores, indices = self._faiss_search(q_emb, top_k, nprobe=nprobe, ef_search=ef_search)
+        out = []
+        for s_row, i_row in zip(scores, indices):
+            keep = i_row >= 0
+            out.append((self._row_of_id[i_row[keep]], s_row[keep]))
+        return out
+
+    def _doc_id(self, row: int) -> str:
+        return self.corpus[row].get("id", str(row))
+
+    def _dense_hits(self, rows: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        results: List[Dict] = []
+        for idx, score in zip(rows, scores):
+            s = float(score)
+            results.append(
+                {
+                    "id": self._doc_id(idx),
+                    "text": self.corpus[idx]["text"],
+                    "score_dense": s,
+                    "score": s,  # ✅ universal key
+                }
+            )
+        return results
+
+    def dense_search(
+        self,
+        query: str,
+        top_k: int = 5,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> List[Dict]:
+        """
+        Return top_k documents by dense similarity using FAISS.
+        nprobe / ef_search override the engine defaults for IVF / HNSW indexes.
+        Output format: list of {"id", "text", "score_dense", "score"} dicts.
+        """
+        q_emb = self._encode_query_dense(query)
+        rows, scores = self._dense_stage(q_emb, top_k, nprobe=nprobe, ef_search=ef_search)[0]
+        return self._dense_hits(rows, scores)
+
+    def dense_search_batch(
+        self,
+        queries: Sequence[str],
+        top_k: int = 5,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> List[List[Dict]]:
+        """
+        Batched dense_search: one encode call and one FAISS search on an (N, d) matrix.
+        Returns one result list per query, in input order.
+        """
+        if not queries:
+            return []
+        q_emb = self._encode_queries_dense(queries)
+        stages = self._dense_stage(q_emb, top_k, nprobe=nprobe, ef_search=ef_search)
+        return [self._dense_hits(rows, scores) for rows, scores in stages]
+
+    # -----------------------------------------------------
+    # 3.1 Lexical retrieval
+    # -----------------------------------------------------
+
+    def bm25_search(self, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        Return top_k documents by Okapi BM25 (pruned top-k over the inverted index).
+        Fewer matching documents are zero-filled up to top_k (see BM25Index.search).
+        Output format: list of {"id", "text", "score_bm25", "score"} dicts.
+        """
+        self.warm()
+        rows, scores = self.bm25_index.search(query, top_k=top_k)
+        return self._bm25_hits(rows, scores)
+
+    def bm25_search_batch(self, queries: Sequence[str], top_k: int = 5) -> List[List[Dict]]:
+        """
+        Batched bm25_search. Each query only touches the postings of its own
+        terms, so there is no shared product to amortize; this keeps the
+        batch API uniform with dense_search_batch.
+        Returns one result list per query, in input order.
+        """
+        if not queries:
+            return []
+        self.warm()
+        return [self._bm25_hits(rows, scores) for rows, scores in self.bm25_index.search_batch(queries, top_k=top_k)]
+
+    def _bm25_hits(self, rows: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        results: List[Dict] = []
+        for idx, score in zip(rows, scores):
+            s = float(score)
+            results.append(
+                {
+                    "id": self._doc_id(idx),
+                    "text": self.corpus[idx]["text"],
+                    "score_bm25": s,
+                    "score": s,  # ✅ universal key (lexical)
+                }
+            )
+        return results
+
+    # -----------------------------------------------------
+    # 3.2 Hybrid retrieval (dense + lexical)
+    # -----------------------------------------------------
+
+    def hybrid_search(
+        self,
+        query: str,
+        top_k: int = 5,
+        alpha: float = DEFAULT_ALPHA,
+    ) -> List[Dict]:
+        """
+        Output format: list of dicts with id/text and scores:
+          {"id","text","score_hybrid","score_dense","score_bm25","score"}
+
+        Both stages stay in index space (row ids + score arrays); text is
+        only looked up for the top_k rows that survive fusion.
+        """
+        return self._hybrid_stages(query, top_k=top_k, alpha=alpha)
+
+    def _hybrid_stages(
+        self,
+        query: str,
+        top_k: int,
+        alpha: float,
+        trace: Dict[str, Any] | None = None,
+    ) -> List[Dict]:
+        """
+        Single execution of dense -> BM25 -> fusion. When a trace is given,
+        stage timings and the top_k of each stage are recorded from the same
+        arrays fusion consumes (the top_k of a 3*top_k stage is its prefix),
+        so tracing never re-runs a stage.
+        """
+        t0 = time.perf_counter()
+        q_emb = self._encode_query_dense(query)
+        dense_rows, dense_scores = self._dense_stage(q_emb, top_k * 3)[0]
+        t1 = time.perf_counter()
+        bm25_rows, bm25_scores = self.bm25_index.search(query, top_k=top_k * 3)
+        t2 = time.perf_counter()
+        fused = fuse_hybrid_rows(dense_rows, dense_scores, bm25_rows, bm25_scores, top_k=top_k, alpha=alpha)
+        hits = self._hybrid_hits(*fused)
+        t3 = time.perf_counter()
+
+        if trace is not None:
+            add_timing(trace, "dense", (t1 - t0) * 1000)
+            add_timing(trace, "bm25", (t2 - t1) * 1000)
+            add_timing(trace, "hybrid", (t3 - t2) * 1000)
+
+            trace["stages"]["dense"] = [
+                {"rank": i + 1, "id": self._doc_id(idx), "score_dense": float(s), "text": clip_text(self.corpus[idx]["text"])}
+                for i, (idx, s) in enumerate(zip(dense_rows[:top_k], dense_scores[:top_k]))
+            ]
+            trace["stages"]["bm25"] = [
+                {"rank": i + 1, "id": self._doc_id(idx), "score_bm25": float(s), "text": clip_text(self.corpus[idx]["text"])}
+                for i, (idx, s) in enumerate(zip(bm25_rows[:top_k], bm25_scores[:top_k]))
+            ]
+
+        return hits
+
+    def hybrid_search_batch(
+        self,
+        queries: Sequence[str],
+        top_k: int = 5,
+        alpha: float | Sequence[float] = DEFAULT_ALPHA,
+    ) -> List[List[Dict]]:
+        """
+        Batched hybrid_search. `alpha` may be a single value or one value per query.
+        """
+        if not queries:
+            return []
+        alphas = _per_query(alpha, len(queries), "alpha")
+        q_emb = self._encode_queries_dense(queries)
+        dense_all = self._dense_stage(q_emb, top_k * 3)
+        bm25_all = self.bm25_index.search_batch(queries, top_k=top_k * 3)
+        return [
+            self._hybrid_hits(*fuse_hybrid_rows(d_rows, d_scores, b_rows, b_scores, top_k=top_k, alpha=a))
+            for (d_rows, d_scores), (b_rows, b_scores), a in zip(dense_all, bm25_all, alphas)
+        ]
 
-# ---------------------------------------------------------
-# 3.2 Hybrid retrieval (dense + lexical)
-# ---------------------------------------------------------
+    def _hybrid_hits(
+        self,
+        rows: np.ndarray,
+        hybrid: np.ndarray,
+        dense: np.ndarray,
+        bm25: np.ndarray,
+    ) -> List[Dict]:
+        results: List[Dict] = []
+        for idx, s_h, s_d, s_b in zip(rows, hybrid, dense, bm25):
+            s_h = float(s_h)
+            results.append(
+                {
+                    "id": self._doc_id(idx),
+                    "text": self.corpus[idx]["text"],
+                    "score_hybrid": s_h,
+                    "score_dense": float(s_d),
+                    "score_bm25": float(s_b),
+                    "score": s_h,  # ✅ universal key (hybrid)
+                }
+            )
+        return results
+
+    # -----------------------------------------------------
+    # 3.3 Reranker (Day 56)
+    # -----------------------------------------------------
+
+    def rerank_with_cross_encoder(
+        self,
+        query: str,
+        candidates: List[Dict],
+        top_k: int = 5,
+    ) -> List[Dict]:
+        """
+        Attach:
+          - score_rerank
+          - score (universal) == score_rerank
+        """
+        return self._rerank(query, candidates, top_k)[0]
+
+    def _rerank(self, query: str, candidates: List[Dict], top_k: int) -> Tuple[List[Dict], Dict[str, int]]:
+        """rerank_with_cross_encoder + this call's cache stats (for the trace)."""
+        if not candidates:
+            return [], {"pairs": 0, "hits": 0, "predicted": 0}
+        scores, stats = self._cached_scores([query] * len(candidates), candidates)
+        return _attach_rerank_scores(candidates, scores, top_k), stats
+
+    def _cached_scores(self, queries: Sequence[str], candidates: Sequence[Dict]) -> Tuple[List[float], Dict[str, int]]:
+        """
+        CrossEncoder scores for aligned (query, candidate) pairs. Cached pairs
+        come from the score cache; only the misses go through one predict call.
+        """
+        # chunk text hash in the key: an edited chunk (same id) never gets its old score
+        keys = [(q, str(c["id"]), incremental.content_hash(c["text"])) for q, c in zip(queries, candidates)]
+        scores = self.rerank_cache.get_many(keys)
+        miss = [i for i, s in enumerate(scores) if s is None]
+
+        if miss:
+            predicted = self._predict(
+                [[queries[i], candidates[i]["text"], self.chunk_row(candidates[i])] for i in miss]
+            )
+            for i, s in zip(miss, predicted):
+                scores[i] = s
+            self.rerank_cache.put_many([keys[i] for i in miss], predicted)
+
+        return scores, {"pairs": len(keys), "hits": len(keys) - len(miss), "predicted": len(miss)}
+
+    def _predict_direct(self, pairs: List[List], batch_size: int = 32) -> List[float]:
+        """Scores for [query, text, row] pairs: cached chunk tokens when available, else raw text."""
+        encoder, cache = self.rerank_token_cache()
+        if cache is not None:
+            return rerank_tokens.predict(self.get_reranker(), encoder, cache, pairs, batch_size=batch_size)
+        return [float(x) for x in self.get_reranker().predict([p[:2] for p in pairs], batch_size=batch_size)]
+
+    def _predict(self, pairs: List[List]) -> List[float]:
+        """CrossEncoder scores, pooled with concurrent callers when micro-batching is on."""
+        if self.rerank_batcher is None:
+            return self._predict_direct(pairs)
+        # load in the caller (errors surface here, not in the worker)
+        self.get_reranker()
+        self.rerank_token_cache()
+        return self.rerank_batcher.submit(pairs)
+
+    def rerank_cache_stats(self) -> Dict[str, float]:
+        return self.rerank_cache.stats()
+
+    def rerank_batcher_stats(self) -> Dict[str, float]:
+        """Micro-batching metrics (batch sizes, queue wait, predict time); {} when disabled."""
+        return self.rerank_batcher.stats() if self.rerank_batcher is not None else {}
+
+    def rerank_batch(
+        self,
+        queries: Sequence[str],
+        candidates_per_query: Sequence[List[Dict]],
+        top_k: int = 5,
+    ) -> List[List[Dict]]:
+        """
+        Batched rerank: all (query, candidate) pairs not in the score cache go
+        through one flattened CrossEncoder.predict call, then scores are split
+        back per query.
+        """
+        flat_q = [q for q, cands in zip(queries, candidates_per_query) for _ in cands]
+        flat_c = [c for cands in candidates_per_query for c in cands]
+        if not flat_c:
+            return [[] for _ in queries]
+
+        scores, _ = self._cached_scores(flat_q, flat_c)
+
+        out: List[List[Dict]] = []
+        start = 0
+        for cands in candidates_per_query:
+            end = start + len(cands)
+            out.append(_attach_rerank_scores(cands, scores[start:end], top_k) if cands else [])
+            start = end
+        return out
+
+    def hybrid_then_rerank(
+        self,
+        query: str,
+        retrieve_k: int = 20,
+        final_k: int = 5,
+        alpha: float = DEFAULT_ALPHA,
+        top_k: int | None = None,  # ✅ backward-compatible alias
+    ) -> List[Dict]:
+        """
+        Day 56: Full retrieval pipeline.
+
+        Backward compat:
+          If caller passes top_k=..., we treat that as final_k.
+        """
+        if top_k is not None:
+            final_k = int(top_k)
+
+        candidates = self.hybrid_search(query, top_k=retrieve_k, alpha=alpha)
+        reranked = self.rerank_with_cross_encoder(query, candidates, top_k=final_k)
+        return reranked
+
+    def cascade_decision(self, candidates: List[Dict], cascade: bool | None = None) -> Dict[str, Any]:
+        """cascade_band with this engine's thresholds; cascade off -> always "ambiguous" (rerank)."""
+        enabled = self.rerank_cascade if cascade is None else bool(cascade)
+        if not enabled:
+            return {"band": "ambiguous", "rerank_skipped": False, "reason": "cascade off"}
+        return cascade_band(
+            candidates,
+            skip_margin=self.cascade_skip_margin,
+            skip_min_dense=self.cascade_skip_min_dense,
+            offtopic_max_dense=self.cascade_offtopic_max_dense,
+        )
 
-DEFAULT_ALPHA = 0.1  # tuned weight for lexical score in hybrid (Day 55)
+    def hybrid_then_rerank_cascade(
+        self,
+        query: str,
+        retrieve_k: int = 20,
+        final_k: int = 5,
+        alpha: float = DEFAULT_ALPHA,
+        cascade: bool | None = None,
+    ) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        hybrid_then_rerank that skips the cross-encoder when the hybrid
+        candidates already decide (see cascade_band). Skipped results keep
+        the hybrid order and scores. Returns (results, cascade decision).
+        """
+        candidates = self.hybrid_search(query, top_k=retrieve_k, alpha=alpha)
+        decision = self.cascade_decision(candidates, cascade)
+        if decision["rerank_skipped"]:
+            return candidates[:final_k], decision
+        return self.rerank_with_cross_encoder(query, candidates, top_k=final_k), decision
+
+    def hybrid_then_rerank_batch(
+        self,
+        queries: Sequence[str],
+        retrieve_k: int = 20,
+        final_k: int = 5,
+        alpha: float | Sequence[float] = DEFAULT_ALPHA,
+    ) -> List[List[Dict]]:
+        """
+        Batched hybrid_then_rerank: one encode call, one FAISS search on the
+        (N, d) query matrix, BM25 top-k per query (MaxScore over the inverted
+        index, see bm25_index.py) and one CrossEncoder.predict for all pairs.
+        """
+        candidates = self.hybrid_search_batch(queries, top_k=retrieve_k, alpha=alpha)
+        return self.rerank_batch(queries, candidates, top_k=final_k)
+
+    def hybrid_then_rerank_cascade_batch(
+        self,
+        queries: Sequence[str],
+        retrieve_k: int = 20,
+        final_k: int | Sequence[int] = 5,
+        alpha: float | Sequence[float] = DEFAULT_ALPHA,
+        cascade: bool | None | Sequence[bool | None] = None,
+    ) -> List[Tuple[List[Dict], Dict[str, Any]]]:
+        """
+        Batched hybrid_then_rerank_cascade: one hybrid_search_batch, then one
+        rerank_batch over the queries the cascade does not skip. final_k,
+        alpha and cascade may be per query. Returns (results, decision) per query.
+        """
+        if not queries:
+            return []
+        final_ks = [int(k) for k in _per_query(final_k, len(queries), "final_k")]
+        cascades = _per_query(cascade, len(queries), "cascade")
+
+        candidates = self.hybrid_search_batch(queries, top_k=retrieve_k, alpha=alpha)
+        decisions = [self.cascade_decision(c, casc) for c, casc in zip(candidates, cascades)]
+
+        todo = [i for i, d in enumerate(decisions) if not d["rerank_skipped"] and candidates[i]]
+        reranked = self.rerank_batch(
+            [queries[i] for i in todo], [candidates[i] for i in todo], top_k=max(final_ks)
+        )
+        results = [cands[:k] for cands, k in zip(candidates, final_ks)]
+        for i, ranked in zip(todo, reranked):
+            results[i] = ranked[: final_ks[i]]
+        return list(zip(results, decisions))
+
+    # -----------------------------------------------------
+    # 4. Score computation helper (Day 54 debug path)
+    # -----------------------------------------------------
+
+    def dense_scores_all(self, query: str) -> np.ndarray:
+        # Exact scores for every doc (debug path); an ANN index would only
+        # return the probed subset, so score against the embeddings directly.
+        q_emb = self._encode_query_dense(query)
+        return (self.doc_embeddings @ q_emb[0]).astype(np.float32)
+
+    def compute_scores(self, query: str, alpha_override: float | None = None) -> Dict[str, np.ndarray]:
+        query = query.strip()
+        if not query:
+            raise ValueError("Query must be non-empty")
+
+        dense_raw = self.dense_scores_all(query)
+        dense_norm = min_max_norm(dense_raw)
+
+        bm25_raw = self.bm25_index.score_all(query)
+        bm25_norm = min_max_norm(bm25_raw)
+
+        if alpha_override is not None:
+            alpha = float(alpha_override)
+        else:
+            num_words = len(query.split())
+            alpha = 0.8 if num_words <= 3 else 0.2
+
+        hybrid_scores = compute_hybrid_vector(dense_scores=dense_raw, lexical_scores=bm25_raw, alpha=alpha)
+
+        print("\n[HYBRID DEBUG][Day 54]")
+        print("alpha:", alpha)
+        print("BM25 (raw)  :", bm25_raw[:5])
+        print("Dense (raw) :", dense_raw[:5])
+        print("Hybrid (top):", np.sort(hybrid_scores)[-5:])
+
+        return {
+            "query": query,
+            "alpha": alpha,
+            "dense_raw": dense_raw,
+            "dense_norm": dense_norm,
+            "bm25_raw": bm25_raw,
+            "bm25_norm": bm25_norm,
+            "hybrid_scores": hybrid_scores,
+        }
 
+    # -----------------------------------------------------
+    # 5. Main RAG-style helpers (older debug API)
+    # -----------------------------------------------------
 
-def compute_hybrid_vector(
-    dense_scores: np.ndarray,
-    lexical_scores: np.ndarray,
-    alpha: float,
-) -> np.ndarray:
-    dense_norm = min_max_norm(dense_scores)
-    lex_norm = min_max_norm(lexical_scores)
-    return alpha * lex_norm + (1.0 - alpha) * dense_norm
+    def answer_query(self, query: str) -> str:
+        txt = query.strip()
+        if not txt:
+            return "Please provide a non-empty query."
 
+        scores = self.compute_scores(txt)
+        dense_raw = scores["dense_raw"]
+        bm25_raw = scores["bm25_raw"]
+        hybrid_scores = scores["hybrid_scores"]
+        alpha = scores["alpha"]
 
-def hybrid_search(
-    query: str,
-    top_k: int = 5,
-    alpha: float = DEFAULT_ALPHA,
-) -> List[Dict]:
-    """
-    Output format: list of dicts with id/text and scores:
-      {"id","text","score_hybrid","score_dense","score_bm25","score"}
-    """
-    dense_results = dense_search(query, top_k=top_k * 3)
-    bm25_results = bm25_search(query, top_k=top_k * 3)
+        mean = float(hybrid_scores.mean())
+        std = float(hybrid_scores.std())
+        thr = max(0.0, min(mean - std, 1.0))
 
-    merged: Dict[str, Dict] = {}
+        best_idx = _select_best_doc(hybrid_scores)
 
-    for r in dense_results:
-        merged[r["id"]] = {
-            "id": r["id"],
-            "text": r["text"],
-            "score_dense": r["score_dense"],
-            "score_bm25": 0.0,
-        }
+        best_doc = self.documents[best_idx]
+        best_dense = float(dense_raw[best_idx])
+        best_bm25 = float(bm25_raw[best_idx])
+        best_hybrid = float(hybrid_scores[best_idx])
 
-    for r in bm25_results:
-        if r["id"] in merged:
-            merged[r["id"]]["score_bm25"] = r["score_bm25"]
-        else:
-            merged[r["id"]] = {
+        return (
+            f"Answer: {best_doc}\n\n"
+            f"[debug] alpha={alpha:.2f}, dense={best_dense:.3f}, bm25={best_bm25:.3f}, "
+            f"hybrid={best_hybrid:.3f}, threshold={thr:.3f}"
+        )
+
+    def retrieve_top_k(self, query: str, k: int = 3) -> Dict[str, object]:
+        scores = self.compute_scores(query)
+        dense_raw = scores["dense_raw"]
+        bm25_raw = scores["bm25_raw"]
+        hybrid_scores = scores["hybrid_scores"]
+        alpha = scores["alpha"]
+
+        n_docs = len(self.documents)
+        k = min(k, n_docs)
+        top_indices = np.argsort(hybrid_scores)[::-1][:k]
+
+        results = []
+        for rank, idx in enumerate(top_indices, start=1):
+            idx = int(idx)
+            results.append(
+                {
+                    "rank": rank,
+                    "doc_index": idx,
+                    "text": self.documents[idx],
+                    "dense": float(dense_raw[idx]),
+                    "bm25": float(bm25_raw[idx]),
+                    "hybrid": float(hybrid_scores[idx]),
+                }
+            )
+
+        return {"query": scores["query"], "alpha": float(alpha), "results": results}
+
+    def retrieve_with_trace(
+        self,
+        query: str,
+        *,
+        retrieve_k: int = 20,
+        final_k: int = 5,
+        alpha: float = DEFAULT_ALPHA,
+        use_reranker: bool = True,
+        cascade: bool | None = None,
+    ) -> Dict[str, object]:
+        """
+        Day 61: Observability wrapper around your existing pipeline (Day 56).
+        With the rerank cascade on, trace["cascade"] records the band and
+        whether the rerank stage was skipped.
+        """
+        q = query.strip()
+        if not q:
+            raise ValueError("Query must be non-empty")
+
+        trace = init_trace(q, meta={
+            "retrieve_k": retrieve_k,
+            "final_k": final_k,
+            "alpha": float(alpha),
+            "use_reranker": bool(use_reranker),
+            "index_version": self.index_version,
+            "model_name": self.model_name,
+            "reranker_model": self.reranker_model_name,
+            "reranker_backend": self.reranker_backend,
+        })
+
+        t_start = time.perf_counter()
+
+        # 1-3) Dense -> BM25 -> Hybrid in one pass (stages + timings recorded on the way)
+        hybrid_candidates = self._hybrid_stages(q, top_k=retrieve_k, alpha=alpha, trace=trace)
+
+        trace["stages"]["hybrid"] = [
+            {
+                "rank": i + 1,
                 "id": r["id"],
-                "text": r["text"],
-                "score_dense": 0.0,
-                "score_bm25": r["score_bm25"],
+                "score_hybrid": float(r["score_hybrid"]),
+                "score_dense": float(r["score_dense"]),
+                "score_bm25": float(r["score_bm25"]),
+                "text": clip_text(r["text"]),
             }
+            for i, r in enumerate(hybrid_candidates)
+        ]
 
-    ids = list(merged.keys())
-    dense_scores = np.array([merged[i]["score_dense"] for i in ids], dtype=np.float32)
-    bm25_scores = np.array([merged[i]["score_bm25"] for i in ids], dtype=np.float32)
-
-    hybrid_scores = compute_hybrid_vector(dense_scores=dense_scores, lexical_scores=bm25_scores, alpha=alpha)
-
-    top_k = min(top_k, len(ids))
-    top_idx = np.argsort(-hybrid_scores)[:top_k]
+        # 4) Rerank (optional; the cascade may skip it)
+        rerank_skipped = False
+        if use_reranker:
+            decision = self.cascade_decision(hybrid_candidates, cascade)
+            trace["cascade"] = decision
+            rerank_skipped = decision["rerank_skipped"]
+        trace["meta"]["rerank_skipped"] = rerank_skipped
+
+        if use_reranker and not rerank_skipped:
+            t0 = time.perf_counter()
+            reranked, cache_stats = self._rerank(q, hybrid_candidates, top_k=final_k)
+            add_timing(trace, "rerank", (time.perf_counter() - t0) * 1000)
+            trace["rerank_cache"] = cache_stats
+
+            trace["stages"]["rerank"] = [
+                {
+                    "rank": i + 1,
+                    "id": r["id"],
+                    "score_rerank": float(r.get("score_rerank", 0.0)),
+                    "score_hybrid": float(r.get("score_hybrid", 0.0)),
+                    "score_dense": float(r.get("score_dense", 0.0)),
+                    "score_bm25": float(r.get("score_bm25", 0.0)),
+                    "text": clip_text(r["text"]),
+                }
+                for i, r in enumerate(reranked)
+            ]
+            final_selected = reranked
+        else:
+            final_selected = hybrid_candidates[:final_k]
 
-    results: List[Dict] = []
-    for i in top_idx:
-        id_ = ids[i]
-        entry = merged[id_]
-        s_h = float(hybrid_scores[i])
-        results.append(
+        trace["final"]["selected"] = [
             {
-                "id": id_,
-                "text": entry["text"],
-                "score_hybrid": s_h,
-                "score_dense": float(entry["score_dense"]),
-                "score_bm25": float(entry["score_bm25"]),
-                "score": s_h,  # ✅ universal key (hybrid)
+                "rank": i + 1,
+                "id": r["id"],
+                "score_rerank": float(r.get("score_rerank", 0.0)),
+                "score_hybrid": float(r.get("score_hybrid", 0.0)),
+                "score_dense": float(r.get("score_dense", 0.0)),
+                "score_bm25": float(r.get("score_bm25", 0.0)),
+                "text": clip_text(r["text"], n=300),
             }
-        )
+            for i, r in enumerate(final_selected)
+        ]
+        add_timing(trace, "total", (time.perf_counter() - t_start) * 1000)
 
-    return results
+        path = save_trace(trace)
+        trace["meta"]["trace_path"] = str(path)
+
+        return {"final": final_selected, "trace": trace}
 
 
 # ---------------------------------------------------------
-# 3.3 Reranker (Day 56)
+# 6. Default engine + module-level API (thin wrappers)
 # ---------------------------------------------------------
 
-def rerank_with_cross_encoder(
+_default_engine: RetrieverEngine | None = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine() -> RetrieverEngine:
+    """Return the process-wide default engine (constructed cheaply, loaded on first use)."""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = RetrieverEngine()
+    return _default_engine
+
+
+def set_engine(engine: RetrieverEngine) -> None:
+    """Swap the default engine (e.g. a different artifact_dir or index_version)."""
+    global _default_engine
+    with _default_engine_lock:
+        _default_engine = engine
+
+
+def warm(with_reranker: bool = False) -> RetrieverEngine:
+    return get_engine().warm(with_reranker=with_reranker)
+
+
+def get_reranker() -> CrossEncoder:
+    return get_engine().get_reranker()
+
+
+def rerank_cache_stats() -> Dict[str, float]:
+    return get_engine().rerank_cache_stats()
+
+
+def rerank_batcher_stats() -> Dict[str, float]:
+    return get_engine().rerank_batcher_stats()
+
+
+def _encode_query_dense(query: str) -> np.ndarray:
+    return get_engine()._encode_query_dense(query)
+
+
+def query_cache_stats() -> Dict[str, float]:
+    return get_engine().query_cache_stats()
+
+
+def dense_search(
     query: str,
-    candidates: List[Dict],
     top_k: int = 5,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
 ) -> List[Dict]:
-    """
-    Attach:
-      - score_rerank
-      - score (universal) == score_rerank
-    """
-    if not candidates:
-        return []
+    return get_engine().dense_search(query, top_k=top_k, nprobe=nprobe, ef_search=ef_search)
 
-    reranker = get_reranker()
-    pairs = [[query, c["text"]] for c in candidates]
-    scores = reranker.predict(pairs)
 
-    for cand, s in zip(candidates, scores):
-        sr = float(s)
-        cand["score_rerank"] = sr
-        cand["score"] = sr  # ✅ universal key (rerank)
+def bm25_search(query: str, top_k: int = 5) -> List[Dict]:
+    return get_engine().bm25_search(query, top_k=top_k)
 
-    candidates_sorted = sorted(candidates, key=lambda x: x["score_rerank"], reverse=True)
-    return candidates_sorted[:top_k]
+
+def hybrid_search(query: str, top_k: int = 5, alpha: float = DEFAULT_ALPHA) -> List[Dict]:
+    return get_engine().hybrid_search(query, top_k=top_k, alpha=alpha)
+
+
+def rerank_with_cross_encoder(query: str, candidates: List[Dict], top_k: int = 5) -> List[Dict]:
+    return get_engine().rerank_with_cross_encoder(query, candidates, top_k=top_k)
 
 
 def hybrid_then_rerank(
@@ -367,144 +1402,83 @@ def hybrid_then_rerank(
     retrieve_k: int = 20,
     final_k: int = 5,
     alpha: float = DEFAULT_ALPHA,
-    top_k: int | None = None,  # ✅ backward-compatible alias
+    top_k: int | None = None,
 ) -> List[Dict]:
-    """
-    Day 56: Full retrieval pipeline.
+    return get_engine().hybrid_then_rerank(query, retrieve_k=retrieve_k, final_k=final_k, alpha=alpha, top_k=top_k)
 
-    Backward compat:
-      If caller passes top_k=..., we treat that as final_k.
-    """
-    if top_k is not None:
-        final_k = int(top_k)
-
-    candidates = hybrid_search(query, top_k=retrieve_k, alpha=alpha)
-    reranked = rerank_with_cross_encoder(query, candidates, top_k=final_k)
-    return reranked
 
+def hybrid_then_rerank_cascade(
+    query: str,
+    retrieve_k: int = 20,
+    final_k: int = 5,
+    alpha: float = DEFAULT_ALPHA,
+    cascade: bool | None = None,
+) -> Tuple[List[Dict], Dict[str, Any]]:
+    return get_engine().hybrid_then_rerank_cascade(
+        query, retrieve_k=retrieve_k, final_k=final_k, alpha=alpha, cascade=cascade
+    )
 
-# ---------------------------------------------------------
-# 4. Score computation helper (Day 54 debug path)
-# ---------------------------------------------------------
 
-def dense_scores_all(query: str) -> np.ndarray:
-    q_emb = _encode_query_dense(query)
-    scores, indices = faiss_index.search(q_emb, len(DOCUMENTS))
-    dense_vec = np.zeros(len(DOCUMENTS), dtype=np.float32)
-    dense_vec[indices[0]] = scores[0]
-    return dense_vec
+def dense_search_batch(
+    queries: Sequence[str],
+    top_k: int = 5,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+) -> List[List[Dict]]:
+    return get_engine().dense_search_batch(queries, top_k=top_k, nprobe=nprobe, ef_search=ef_search)
 
 
-def compute_scores(query: str, alpha_override: float | None = None) -> Dict[str, np.ndarray]:
-    query = query.strip()
-    if not query:
-        raise ValueError("Query must be non-empty")
+def bm25_search_batch(queries: Sequence[str], top_k: int = 5) -> List[List[Dict]]:
+    return get_engine().bm25_search_batch(queries, top_k=top_k)
 
-    dense_raw = dense_scores_all(query)
-    dense_norm = min_max_norm(dense_raw)
 
-    q_vec = BM25_VECTORIZER.transform([query])
-    bm25_raw = (BM25_MATRIX @ q_vec.T).toarray().ravel()
-    bm25_norm = min_max_norm(bm25_raw)
+def hybrid_search_batch(
+    queries: Sequence[str],
+    top_k: int = 5,
+    alpha: float | Sequence[float] = DEFAULT_ALPHA,
+) -> List[List[Dict]]:
+    return get_engine().hybrid_search_batch(queries, top_k=top_k, alpha=alpha)
 
-    if alpha_override is not None:
-        alpha = float(alpha_override)
-    else:
-        num_words = len(query.split())
-        alpha = 0.8 if num_words <= 3 else 0.2
 
-    hybrid_scores = compute_hybrid_vector(dense_scores=dense_raw, lexical_scores=bm25_raw, alpha=alpha)
+def rerank_batch(queries: Sequence[str], candidates_per_query: Sequence[List[Dict]], top_k: int = 5) -> List[List[Dict]]:
+    return get_engine().rerank_batch(queries, candidates_per_query, top_k=top_k)
 
-    print("\n[HYBRID DEBUG][Day 54]")
-    print("alpha:", alpha)
-    print("BM25 (raw)  :", bm25_raw[:5])
-    print("Dense (raw) :", dense_raw[:5])
-    print("Hybrid (top):", np.sort(hybrid_scores)[-5:])
 
-    return {
-        "query": query,
-        "alpha": alpha,
-        "dense_raw": dense_raw,
-        "dense_norm": dense_norm,
-        "bm25_raw": bm25_raw,
-        "bm25_norm": bm25_norm,
-        "hybrid_scores": hybrid_scores,
-    }
+def hybrid_then_rerank_batch(
+    queries: Sequence[str],
+    retrieve_k: int = 20,
+    final_k: int = 5,
+    alpha: float | Sequence[float] = DEFAULT_ALPHA,
+) -> List[List[Dict]]:
+    return get_engine().hybrid_then_rerank_batch(queries, retrieve_k=retrieve_k, final_k=final_k, alpha=alpha)
 
 
-# ---------------------------------------------------------
-# 5. Main RAG-style helpers (older debug API)
-# ---------------------------------------------------------
+def hybrid_then_rerank_cascade_batch(
+    queries: Sequence[str],
+    retrieve_k: int = 20,
+    final_k: int | Sequence[int] = 5,
+    alpha: float | Sequence[float] = DEFAULT_ALPHA,
+    cascade: bool | None | Sequence[bool | None] = None,
+) -> List[Tuple[List[Dict], Dict[str, Any]]]:
+    return get_engine().hybrid_then_rerank_cascade_batch(
+        queries, retrieve_k=retrieve_k, final_k=final_k, alpha=alpha, cascade=cascade
+    )
 
-def _select_best_doc(hybrid_scores: np.ndarray) -> int:
-    mean = float(hybrid_scores.mean())
-    std = float(hybrid_scores.std())
-    thr = max(0.0, min(mean - std, 1.0))
 
-    mask = hybrid_scores >= thr
-    candidate_indices = np.where(mask)[0]
+def dense_scores_all(query: str) -> np.ndarray:
+    return get_engine().dense_scores_all(query)
 
-    if candidate_indices.size == 0:
-        return int(np.argmax(hybrid_scores))
 
-    return int(candidate_indices[np.argmax(hybrid_scores[candidate_indices])])
+def compute_scores(query: str, alpha_override: float | None = None) -> Dict[str, np.ndarray]:
+    return get_engine().compute_scores(query, alpha_override=alpha_override)
 
 
 def answer_query(query: str) -> str:
-    txt = query.strip()
-    if not txt:
-        return "Please provide a non-empty query."
-
-    scores = compute_scores(txt)
-    dense_raw = scores["dense_raw"]
-    bm25_raw = scores["bm25_raw"]
-    hybrid_scores = scores["hybrid_scores"]
-    alpha = scores["alpha"]
-
-    mean = float(hybrid_scores.mean())
-    std = float(hybrid_scores.std())
-    thr = max(0.0, min(mean - std, 1.0))
-
-    best_idx = _select_best_doc(hybrid_scores)
-
-    best_doc = DOCUMENTS[best_idx]
-    best_dense = float(dense_raw[best_idx])
-    best_bm25 = float(bm25_raw[best_idx])
-    best_hybrid = float(hybrid_scores[best_idx])
-
-    return (
-        f"Answer: {best_doc}\n\n"
-        f"[debug] alpha={alpha:.2f}, dense={best_dense:.3f}, bm25={best_bm25:.3f}, "
-        f"hybrid={best_hybrid:.3f}, threshold={thr:.3f}"
-    )
+    return get_engine().answer_query(query)
 
 
 def retrieve_top_k(query: str, k: int = 3) -> Dict[str, object]:
-    scores = compute_scores(query)
-    dense_raw = scores["dense_raw"]
-    bm25_raw = scores["bm25_raw"]
-    hybrid_scores = scores["hybrid_scores"]
-    alpha = scores["alpha"]
-
-    n_docs = len(DOCUMENTS)
-    k = min(k, n_docs)
-    top_indices = np.argsort(hybrid_scores)[::-1][:k]
-
-    results = []
-    for rank, idx in enumerate(top_indices, start=1):
-        idx = int(idx)
-        results.append(
-            {
-                "rank": rank,
-                "doc_index": idx,
-                "text": DOCUMENTS[idx],
-                "dense": float(dense_raw[idx]),
-                "bm25": float(bm25_raw[idx]),
-                "hybrid": float(hybrid_scores[idx]),
-            }
-        )
-
-    return {"query": scores["query"], "alpha": float(alpha), "results": results}
+    return get_engine().retrieve_top_k(query, k=k)
 
 
 def retrieve_with_trace(
@@ -514,97 +1488,35 @@ def retrieve_with_trace(
     final_k: int = 5,
     alpha: float = DEFAULT_ALPHA,
     use_reranker: bool = True,
+    cascade: bool | None = None,
 ) -> Dict[str, object]:
-    """
-    Day 61: Observability wrapper around your existing pipeline (Day 56).
-    """
-    q = query.strip()
-    if not q:
-        raise ValueError("Query must be non-empty")
-
-    trace = init_trace(q, meta={
-        "retrieve_k": retrieve_k,
-        "final_k": final_k,
-        "alpha": float(alpha),
-        "use_reranker": bool(use_reranker),
-        "index_version": INDEX_VERSION,
-        "model_name": MODEL_NAME,
-        "reranker_model": RERANKER_MODEL_NAME,
-    })
-
-    # 1) Dense
-    t0 = time.perf_counter()
-    dense_results = dense_search(q, top_k=retrieve_k)
-    add_timing(trace, "dense", (time.perf_counter() - t0) * 1000)
-
-    trace["stages"]["dense"] = [
-        {"rank": i + 1, "id": r["id"], "score_dense": float(r["score_dense"]), "text": clip_text(r["text"])}
-        for i, r in enumerate(dense_results)
-    ]
-
-    # 2) BM25
-    t0 = time.perf_counter()
-    bm25_results = bm25_search(q, top_k=retrieve_k)
-    add_timing(trace, "bm25", (time.perf_counter() - t0) * 1000)
-
-    trace["stages"]["bm25"] = [
-        {"rank": i + 1, "id": r["id"], "score_bm25": float(r["score_bm25"]), "text": clip_text(r["text"])}
-        for i, r in enumerate(bm25_results)
-    ]
-
-    # 3) Hybrid
-    t0 = time.perf_counter()
-    hybrid_candidates = hybrid_search(q, top_k=retrieve_k, alpha=alpha)
-    add_timing(trace, "hybrid", (time.perf_counter() - t0) * 1000)
-
-    trace["stages"]["hybrid"] = [
-        {
-            "rank": i + 1,
-            "id": r["id"],
-            "score_hybrid": float(r["score_hybrid"]),
-            "score_dense": float(r["score_dense"]),
-            "score_bm25": float(r["score_bm25"]),
-            "text": clip_text(r["text"]),
-        }
-        for i, r in enumerate(hybrid_candidates)
-    ]
-
-    # 4) Rerank (optional)
-    if use_reranker:
-        t0 = time.perf_counter()
-        reranked = rerank_with_cross_encoder(q, hybrid_candidates, top_k=final_k)
-        add_timing(trace, "rerank", (time.perf_counter() - t0) * 1000)
-
-        trace["stages"]["rerank"] = [
-            {
-                "rank": i + 1,
-                "id": r["id"],
-                "score_rerank": float(r.get("score_rerank", 0.0)),
-                "score_hybrid": float(r.get("score_hybrid", 0.0)),
-                "score_dense": float(r.get("score_dense", 0.0)),
-                "score_bm25": float(r.get("score_bm25", 0.0)),
-                "text": clip_text(r["text"]),
-            }
-            for i, r in enumerate(reranked)
-        ]
-        final_selected = reranked
-    else:
-        final_selected = hybrid_candidates[:final_k]
-
-    trace["final"]["selected"] = [
-        {
-            "rank": i + 1,
-            "id": r["id"],
-            "score_rerank": float(r.get("score_rerank", 0.0)),
-            "score_hybrid": float(r.get("score_hybrid", 0.0)),
-            "score_dense": float(r.get("score_dense", 0.0)),
-            "score_bm25": float(r.get("score_bm25", 0.0)),
-            "text": clip_text(r["text"], n=300),
-        }
-        for i, r in enumerate(final_selected)
-    ]
+    return get_engine().retrieve_with_trace(
+        query,
+        retrieve_k=retrieve_k,
+        final_k=final_k,
+        alpha=alpha,
+        use_reranker=use_reranker,
+        cascade=cascade,
+    )
 
-    path = save_trace(trace)
-    trace["meta"]["trace_path"] = str(path)
 
-    return {"final": final_selected, "trace": trace}
+# Old module globals (DOCUMENTS, model, faiss_index, ...) are still importable,
+# but now resolve through the default engine and load it on first access.
+_LAZY_GLOBALS = {
+    "model": "model",
+    "corpus": "corpus",
+    "DOCUMENTS": "documents",
+    "CORPUS_HASH": "corpus_hash",
+    "DOC_EMBEDDINGS": "doc_embeddings",
+    "faiss_index": "faiss_index",
+    "META": "meta",
+    "MODEL_DIM": "model_dim",
+    "BM25_INDEX": "bm25_index",
+}
+
+
+def __getattr__(name: str):
+    attr = _LAZY_GLOBALS.get(name)
+    if attr is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(get_engine().warm(), attr)
@@ -1,6 +1,15 @@
 # run_query.py
 
-from retriever import dense_search, hybrid_search, hybrid_then_rerank
+from typing import Any, Dict, List, Sequence
+
+from retriever import (
+    dense_search,
+    dense_search_batch,
+    hybrid_search,
+    hybrid_search_batch,
+    hybrid_then_rerank_cascade,
+    hybrid_then_rerank_cascade_batch,
+)
 
 
 # ----------------------------
@@ -125,6 +134,9 @@ def _wrap(query: str, route_name: str, out, passed: bool, best_score, min_score)
         "reason": None,
         # Day 68 field
         "score_margin": None,
+        # Rerank cascade: True when the hybrid scores decided without the cross-encoder
+        "rerank_skipped": False,
+        "cascade": None,
     }
 
 
@@ -418,6 +430,62 @@ def _gate_if_low_confidence(query: str, result, min_score: float, debug: bool, r
     return env
 
 
+# ----------------------------
+# Day 65: Intent-aware knobs
+# ----------------------------
+def _route_alpha(q_type: str, alpha: float) -> float:
+    if q_type == "definition":
+        return 0.0  # dense only
+    if q_type == "policy":
+        return max(alpha, 0.35)  # bias hybrid toward lexical
+    return alpha  # general keeps passed alpha
+
+
+# ----------------------------
+# Rerank cascade: hybrid dominance / off-topic checks before the cross-encoder
+# ----------------------------
+def _run_rerank_route(query: str, q_type: str, top_k: int, alpha: float, min_score: float, debug: bool, cascade):
+    """
+    hybrid -> (cascade decision) -> rerank only in the ambiguous band.
+    Thresholds live on the retriever engine (CASCADE_* in retriever.py);
+    cascade=None uses the engine's RERANK_CASCADE setting.
+    """
+    out, decision = hybrid_then_rerank_cascade(query, retrieve_k=20, final_k=top_k, alpha=alpha, cascade=cascade)
+    return _rerank_route_envelope(query, q_type, out, decision, min_score, debug)
+
+
+def _rerank_route_envelope(query: str, q_type: str, out, decision, min_score: float, debug: bool):
+    """Envelope for the rerank route given its results + cascade decision."""
+    band = decision["band"]
+
+    if debug:
+        print(
+            f"[CASCADE][{q_type}] band={band} | rerank_skipped={decision['rerank_skipped']} "
+            f"| hybrid_margin={decision.get('hybrid_margin')} | top_dense={decision.get('top_dense')}"
+        )
+
+    if band == "off_topic":
+        route_name = f"{q_type}:hybrid_cascade"
+        env = _wrap(query, route_name, out, False, _extract_top_score(out), min_score)
+        env["decision"] = "ABSTAIN"
+        env["answer"] = ""
+        env["reason"] = "Not enough information found (off-topic candidates, rerank skipped)"
+        env["suggested_queries"] = _suggested_queries(query)
+        env["how_to_improve"] = HOW_TO_IMPROVE
+        env["evidence_preview"] = _extract_evidence_preview(out, n=1)
+    elif band == "dominant":
+        # hybrid order is final: gate it like the plain hybrid route
+        env = _gate_if_low_confidence(query, out, min_score=min_score, debug=debug, route_name=f"{q_type}:hybrid_cascade")
+    else:
+        env = _gate_if_low_confidence(
+            query, out, min_score=min_score, debug=debug, route_name=f"{q_type}:hybrid_then_rerank"
+        )
+
+    env["rerank_skipped"] = bool(decision["rerank_skipped"])
+    env["cascade"] = decision
+    return env
+
+
 def run_query(
     query: str,
     top_k: int = 5,
@@ -425,17 +493,10 @@ def run_query(
     use_reranker: bool = True,
     min_score: float = DEFAULT_MIN_SCORE,
     debug: bool = False,
+    cascade: bool | None = None,
 ):
     q_type = classify_query(query)
-
-    # ----------------------------
-    # Day 65: Intent-aware knobs
-    # ----------------------------
-    if q_type == "definition":
-        alpha = 0.0  # dense only
-    elif q_type == "policy":
-        alpha = max(alpha, 0.35)  # bias hybrid toward lexical
-    # general keeps passed alpha
+    alpha = _route_alpha(q_type, alpha)
 
     if debug:
         print("\n" + "=" * 60)
@@ -453,25 +514,98 @@ def run_query(
     # Route B: policy → hybrid (+ optional rerank)
     if q_type == "policy":
         if use_reranker:
-            out = hybrid_then_rerank(query, retrieve_k=20, final_k=top_k, alpha=alpha)
-            return _gate_if_low_confidence(
-                query, out, min_score=min_score, debug=debug, route_name="policy:hybrid_then_rerank"
-            )
+            return _run_rerank_route(query, q_type, top_k, alpha, min_score, debug, cascade)
 
         out = hybrid_search(query, top_k=top_k, alpha=alpha)
         return _gate_if_low_confidence(query, out, min_score=min_score, debug=debug, route_name="policy:hybrid")
 
     # Route C: general → hybrid (+ optional rerank)
     if use_reranker:
-        out = hybrid_then_rerank(query, retrieve_k=20, final_k=top_k, alpha=alpha)
-        return _gate_if_low_confidence(
-            query, out, min_score=min_score, debug=debug, route_name="general:hybrid_then_rerank"
-        )
+        return _run_rerank_route(query, q_type, top_k, alpha, min_score, debug, cascade)
 
     out = hybrid_search(query, top_k=top_k, alpha=alpha)
     return _gate_if_low_confidence(query, out, min_score=min_score, debug=debug, route_name="general:hybrid")
 
 
+# ----------------------------
+# Batch: same routes / gates / envelopes as run_query, batched retrieval
+# ----------------------------
+def run_query_batch(
+    requests: Sequence[Dict[str, Any]],
+    min_score: float = DEFAULT_MIN_SCORE,
+    debug: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    run_query for many queries. Each request is a dict with "query" and
+    optional top_k / alpha / use_reranker / cascade (run_query defaults).
+
+    Queries are grouped by route: one dense_search_batch per top_k for
+    definition queries, one hybrid_search_batch per top_k for hybrid routes,
+    and one hybrid_then_rerank_cascade_batch (one encode, one FAISS search,
+    BM25 top-k per query, one cross-encoder predict) for all rerank routes.
+    Returns one envelope per request, in input order, as run_query would.
+    """
+    jobs = []
+    for req in requests:
+        query = req["query"]
+        q_type = classify_query(query)
+        use_reranker = bool(req.get("use_reranker", True))
+        if q_type == "definition":
+            kind = "dense"
+        else:
+            kind = "rerank" if use_reranker else "hybrid"
+        jobs.append({
+            "query": query,
+            "q_type": q_type,
+            "kind": kind,
+            "top_k": int(req.get("top_k", 5)),
+            "alpha": _route_alpha(q_type, float(req.get("alpha", 0.2))),
+            "cascade": req.get("cascade"),
+        })
+
+    envelopes: List[Dict[str, Any]] = [None] * len(jobs)
+
+    def _by_top_k(kind: str) -> Dict[int, List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for i, job in enumerate(jobs):
+            if job["kind"] == kind:
+                groups.setdefault(job["top_k"], []).append(i)
+        return groups
+
+    # Route A: definition -> dense only
+    for top_k, idx in _by_top_k("dense").items():
+        outs = dense_search_batch([jobs[i]["query"] for i in idx], top_k=top_k)
+        for i, out in zip(idx, outs):
+            envelopes[i] = _gate_if_low_confidence(
+                jobs[i]["query"], out, min_score=min_score, debug=debug, route_name="definition:dense"
+            )
+
+    # Routes B/C without reranker -> hybrid
+    for top_k, idx in _by_top_k("hybrid").items():
+        outs = hybrid_search_batch([jobs[i]["query"] for i in idx], top_k=top_k, alpha=[jobs[i]["alpha"] for i in idx])
+        for i, out in zip(idx, outs):
+            envelopes[i] = _gate_if_low_confidence(
+                jobs[i]["query"], out, min_score=min_score, debug=debug, route_name=f"{jobs[i]['q_type']}:hybrid"
+            )
+
+    # Routes B/C with reranker -> hybrid -> cascade -> rerank
+    idx = [i for i, job in enumerate(jobs) if job["kind"] == "rerank"]
+    if idx:
+        outs = hybrid_then_rerank_cascade_batch(
+            [jobs[i]["query"] for i in idx],
+            retrieve_k=20,
+            final_k=[jobs[i]["top_k"] for i in idx],
+            alpha=[jobs[i]["alpha"] for i in idx],
+            cascade=[jobs[i]["cascade"] for i in idx],
+        )
+        for i, (out, decision) in zip(idx, outs):
+            envelopes[i] = _rerank_route_envelope(
+                jobs[i]["query"], jobs[i]["q_type"], out, decision, min_score, debug
+            )
+
+    return envelopes
+
+
 if __name__ == "__main__":
     tests = [
         "What is FAISS?",
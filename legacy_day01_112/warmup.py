@@ -0,0 +1,141 @@
+# warmup.py
+# ---------------------------------------------------------
+# Startup warm-up for the API (app.py).
+#
+# Without it the first requests after a deploy pay the bi-encoder /
+# CrossEncoder load (get_reranker() is lazy), FAISS / BM25 / chunk-token
+# loads and the first transformer forward passes (graph + allocator
+# warm-up): several seconds of latency on live traffic.
+#
+# Warmup.run():
+#   1. engine.warm(with_reranker=True)         model, corpus, FAISS, BM25,
+#                                              reranker, chunk tokens
+#   2. every WARMUP_QUERIES entry through every WARMUP_ROUTES option set of
+#      run_query (definition:dense, *:hybrid, *:hybrid_then_rerank,
+#      *:hybrid_cascade) and through answer_query (POST /query)
+#   3. one cross-encoder forward per query on its hybrid candidates, through
+#      engine._predict_direct (cached chunk token ids, no score cache): the
+#      persisted rerank score cache (rerank_cache.sqlite) can answer step 2
+#      after a restart without running the model
+#
+# Status (GET /ready) carries the engine's load_ms and per-step ms.
+# Add queries to warm up more batch shapes.
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+
+from retriever import get_engine
+from run_query import classify_query, run_query
+
+WARMUP_ON_STARTUP = True
+
+# One query per classify_query() type: definition / policy / general
+WARMUP_QUERIES = [
+    "What is the notice period?",
+    "annual leave policy for new employees",
+    "how do I request time off",
+]
+
+# run_query options per query; definition queries take the dense route for all of them
+WARMUP_ROUTES: List[Dict[str, Any]] = [
+    {"use_reranker": False},
+    {"use_reranker": True, "cascade": False},  # always reaches the cross-encoder
+    {"use_reranker": True, "cascade": True},
+]
+
+
+class Warmup:
+    """Runs the warm-up once (thread-safe) and reports readiness + timings."""
+
+    def __init__(
+        self,
+        queries: Sequence[str] = WARMUP_QUERIES,
+        routes: Sequence[Dict[str, Any]] = WARMUP_ROUTES,
+    ) -> None:
+        self.queries = list(queries)
+        self.routes = [dict(r) for r in routes]
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.state = "pending"  # pending -> running -> ready | failed
+        self.error: str | None = None
+        self.steps: List[Dict[str, Any]] = []
+        self.load_ms: Dict[str, float] = {}
+        self.warm_ms: float | None = None
+        self.queries_ms: float | None = None
+        self.total_ms: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self) -> threading.Thread:
+        """Run in a background thread (the app serves /health meanwhile)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def run(self) -> None:
+        with self._lock:
+            if self.state != "pending":
+                return
+            self.state = "running"
+
+        engine = get_engine()  # run_query goes through the default engine too
+        t_start = time.perf_counter()
+        try:
+            engine.warm(with_reranker=True)
+            self.load_ms = {k: round(v, 2) for k, v in engine.load_ms.items()}
+            self.warm_ms = round((time.perf_counter() - t_start) * 1000, 2)
+
+            t0 = time.perf_counter()
+            for query in self.queries:
+                for options in self.routes:
+                    self._step(query, options, lambda: run_query(query, **options))
+                self._step(query, {}, lambda: engine.answer_query(query), route="answer_query")
+                pairs = [[query, c["text"], engine.chunk_row(c)] for c in engine.hybrid_search(query, top_k=20)]
+                self._step(query, {}, lambda: engine._predict_direct(pairs), route="rerank_forward")
+            self.queries_ms = round((time.perf_counter() - t0) * 1000, 2)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+            print(f"[WARN][Warmup] Failed: {self.error}")
+            return
+        finally:
+            self.total_ms = round((time.perf_counter() - t_start) * 1000, 2)
+
+        self.state = "ready"
+        routes = sorted({s["route"] for s in self.steps})
+        print(
+            f"[Warmup] Ready in {self.total_ms:.0f} ms (load {self.warm_ms:.0f} ms, "
+            f"{len(self.steps)} steps {self.queries_ms:.0f} ms) | routes={routes}"
+        )
+
+    def _step(self, query: str, options: Dict[str, Any], call, route: str | None = None) -> None:
+        t0 = time.perf_counter()
+        out = call()
+        self.steps.append({
+            "query": query,
+            "q_type": classify_query(query),
+            "options": options,
+            "route": route or out["route"],
+            "ms": round((time.perf_counter() - t0) * 1000, 2),
+        })
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "error": self.error,
+            "total_ms": self.total_ms,
+            "load_ms": self.load_ms,
+            "warm_ms": self.warm_ms,
+            "queries_ms": self.queries_ms,
+            "routes": sorted({s["route"] for s in self.steps}),
+            "steps": list(self.steps),
+        }
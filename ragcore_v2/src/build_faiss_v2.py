@@ -1,10 +1,21 @@
 from pathlib import Path
 import json
 import hashlib
+import sys
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 
+# Ensure repo root is on sys.path so the shared indexing package is importable
+# when running this file directly (python ragcore_v2/src/build_faiss_v2.py)
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from indexing import ann, incremental, quantize  # noqa: E402
+from indexing.embedding_cache import cached_encode  # noqa: E402
+from indexing.docstore import write_docstore  # noqa: E402
+
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 CORPUS_FILE = Path("ragcore_v2/data/processed/corpus.jsonl")
@@ -12,6 +23,22 @@ OUT_DIR = Path("ragcore_v2/data/indexes")
 
 BATCH_SIZE = 64
 
+# FAISS index type (factory string); see indexing/ann.py for options
+INDEX_FACTORY = ann.DEFAULT_INDEX_FACTORY  # e.g. "IVF1024,Flat", "IVF1024,PQ32", "HNSW32"
+
+# Vector storage for FAISS codes + embeddings.npy: "float32", "float16" (SQfp16) or "int8" (SQ8)
+EMB_STORAGE = quantize.DEFAULT_STORAGE
+FAISS_FACTORY = quantize.storage_factory(INDEX_FACTORY, EMB_STORAGE)  # what actually gets built
+
+# Re-embed only new/changed chunks when a previous build with the same model + factory exists
+INCREMENTAL = True
+
+INDEX_PATH = OUT_DIR / "faiss.index"
+META_PATH = OUT_DIR / "faiss_meta.json"
+EMB_PATH = OUT_DIR / "embeddings.npy"         # kept so unchanged chunks can be reused
+HASHES_PATH = OUT_DIR / "chunk_hashes.npy"    # per-chunk sha256, row order
+IDS_PATH = OUT_DIR / "chunk_ids.npy"          # per-chunk FAISS id, row order (absent: id == row)
+
 
 def file_hash(path: Path) -> str:
     h = hashlib.sha256()
@@ -21,6 +48,29 @@ def file_hash(path: Path) -> str:
     return h.hexdigest()
 
 
+def load_previous_build():
+    """(embeddings mmap, index, chunk hashes, chunk ids) of the last build, or None if it cannot be reused."""
+    if not (INCREMENTAL and INDEX_PATH.exists() and META_PATH.exists() and EMB_PATH.exists()):
+        return None
+    old_hashes = incremental.load_hashes(HASHES_PATH)
+    meta = json.loads(META_PATH.read_text(encoding="utf-8"))
+    if (
+        old_hashes is None
+        or meta.get("model") != MODEL_NAME
+        or meta.get("index_factory") != FAISS_FACTORY
+        or meta.get("emb_storage", quantize.DEFAULT_STORAGE) != EMB_STORAGE
+    ):
+        return None
+    emb = quantize.load_embeddings(EMB_PATH, EMB_STORAGE)
+    index = faiss.read_index(str(INDEX_PATH))
+    old_ids = incremental.load_ids(IDS_PATH)
+    if not (emb.shape[0] == old_hashes.size == index.ntotal):
+        return None
+    if old_ids is not None and old_ids.size != old_hashes.size:
+        return None
+    return emb, index, old_hashes, old_ids
+
+
 def main():
     if not CORPUS_FILE.exists():
         raise FileNotFoundError(
@@ -40,33 +90,50 @@ def main():
 
     print(f"Loaded {len(texts)} chunks from {CORPUS_FILE}")
 
-    # Embed
     model = SentenceTransformer(MODEL_NAME)
-    X = model.encode(
-        texts,
-        batch_size=BATCH_SIZE,
-        normalize_embeddings=True,
-        show_progress_bar=True,
-    )
-    X = np.asarray(X, dtype="float32")
-    dim = X.shape[1]
 
-    # Build FAISS (cosine via inner product)
-    index = faiss.IndexFlatIP(dim)
-    index.add(X)
+    def encode_uncached(batch):
+        return model.encode(
+            batch,
+            batch_size=BATCH_SIZE,
+            normalize_embeddings=True,
+            show_progress_bar=True,
+        )
+
+    def encode(batch):
+        # texts seen by any builder before come from the shared embedding cache
+        return cached_encode(batch, MODEL_NAME, encode_uncached, normalized=True)
+
+    hashes = incremental.chunk_hashes(texts)
+    previous = load_previous_build()
+
+    if previous is not None:
+        # Incremental: embed only new/changed chunks, patch the ID-mapped index (unchanged chunks keep their ids)
+        old_emb, index, old_hashes, old_ids = previous
+        diff = incremental.diff_chunks(old_hashes, hashes, old_ids)
+        print(f"Incremental update: {diff.summary()}")
+        X = incremental.assemble_embeddings(diff, old_emb, texts, encode)
+        index, mode = incremental.patch_index(index, X, diff, FAISS_FACTORY)
+        print(f"FAISS index {mode}")
+        ids = diff.ids
+        del old_emb
+    else:
+        # Embed everything, build FAISS (cosine via inner product), ID-mapped by row
+        X = np.asarray(encode(texts), dtype="float32")
+        index = ann.build_index(X, FAISS_FACTORY, id_map=True)
+        ids = np.arange(len(texts))
+    dim = X.shape[1]
 
-    # Save index
-    index_path = OUT_DIR / "faiss.index"
-    faiss.write_index(index, str(index_path))
+    # Save index + embeddings + chunk hashes
+    faiss.write_index(index, str(INDEX_PATH))
+    quantize.save_embeddings(EMB_PATH, X, EMB_STORAGE)
+    incremental.save_hashes(HASHES_PATH, hashes)
+    incremental.save_ids(IDS_PATH, ids)
 
-    # Save docstore (same rows)
-    docstore_path = OUT_DIR / "docstore.jsonl"
-    with docstore_path.open("w", encoding="utf-8") as f:
-        for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    # Save docstore (same rows; FAISS id -> row via chunk_ids.npy): text blob + offsets + source/chunk_i columns
+    docstore_path = write_docstore(OUT_DIR / "docstore", rows)
 
     # Save metadata
-    meta_path = OUT_DIR / "faiss_meta.json"
     meta = {
         "model": MODEL_NAME,
         "dim": dim,
@@ -74,13 +141,17 @@ def main():
         "batch_size": BATCH_SIZE,
         "corpus_file": str(CORPUS_FILE),
         "corpus_hash": file_hash(CORPUS_FILE),
+        "docstore": docstore_path.name,
+        **ann.index_meta(FAISS_FACTORY, index),
+        **quantize.storage_meta(EMB_STORAGE),
+        **ann.embedding_meta(quantize.load_embeddings(EMB_PATH, EMB_STORAGE)),
     }
-    meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    META_PATH.write_text(json.dumps(meta, indent=2), encoding="utf-8")
 
     print("✅ FAISS index built")
-    print(f"- {index_path}")
+    print(f"- {INDEX_PATH}")
     print(f"- {docstore_path}")
-    print(f"- {meta_path}")
+    print(f"- {META_PATH}")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,18 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import argparse
 import json
-import re
+import sys
+import time
+
+# Ensure repo root is on sys.path so the shared indexing package is importable
+# when running this file directly (python ragcore_v2/src/prepare_corpus_v2.py)
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from indexing import token_chunker  # noqa: E402
 
 # =========================
 # Config (Day 114)
@@ -8,17 +20,24 @@ import re
 RAW_DIR = Path("ragcore_v2/data/raw")
 OUT_FILE = Path("ragcore_v2/data/processed/corpus.jsonl")
 
+CHUNK_MODE = "chars"  # "chars" (CHUNK_SIZE / OVERLAP) or "tokens" (MAX_TOKENS / TOKEN_OVERLAP)
+
 CHUNK_SIZE = 500     # characters
 OVERLAP = 80         # characters
 
+MAX_TOKENS = 250     # tokens (CHUNK_MODE = "tokens")
+TOKEN_OVERLAP = 80   # tokens
+
+WORKERS = 1          # processes for read + normalize + chunk (1 = in-process)
+FILES_PER_TASK = 8   # files per worker task (batched into one tokenizer call in "tokens" mode)
+
 
 # =========================
 # Helpers
 # =========================
 def normalize(text: str) -> str:
-    text = text.replace("\n", " ")
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    # same result as re.sub(r"\s+", " ", text).strip(), without the regex pass
+    return " ".join(text.split())
 
 
 def chunk_text(text: str):
@@ -35,36 +54,108 @@ def chunk_text(text: str):
     return chunks
 
 
+def _chunk_files(paths, mode: str = CHUNK_MODE):
+    """
+    Worker task: read + normalize + chunk a group of files.
+    Returns [(file name, bytes read, chunks)] in the order given.
+    """
+    names, sizes, texts = [], [], []
+    for path in paths:
+        raw = Path(path).read_bytes()
+        names.append(Path(path).name)
+        sizes.append(len(raw))
+        texts.append(normalize(raw.decode("utf-8", errors="ignore")))
+
+    if mode == "tokens":
+        chunked = token_chunker.chunk_batch(texts, MAX_TOKENS, TOKEN_OVERLAP)
+    else:
+        chunked = [chunk_text(t) for t in texts]
+    return list(zip(names, sizes, chunked))
+
+
+def _groups(files, size: int):
+    for i in range(0, len(files), size):
+        yield [str(f) for f in files[i : i + size]]
+
+
+def _iter_chunked_files(files, mode: str, workers: int):
+    """(name, bytes, chunks) per file, always in `files` order (whatever finishes first)."""
+    tasks = _groups(files, FILES_PER_TASK)
+    if workers <= 1:
+        for group in tasks:
+            yield from _chunk_files(group, mode)
+        return
+
+    # bounded in-flight tasks: memory stays ~ 2 * workers groups of files
+    with ProcessPoolExecutor(max_workers=workers, initializer=token_chunker.init_worker) as pool:
+        pending = deque()
+        for group in tasks:
+            pending.append(pool.submit(_chunk_files, group, mode))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_chunks(raw_dir: Path = RAW_DIR, mode: str = CHUNK_MODE, workers: int = WORKERS, stats: dict | None = None):
+    """
+    Yield corpus rows one by one (only a few raw files in memory at a time).
+    Files are processed in sorted path order - also with workers > 1 - and ids
+    come from one counter over that order, so ids are stable across runs,
+    which resumable streaming and incremental builds rely on.
+
+    Pass a dict as stats to get files / bytes / chunks counters filled in.
+    """
+    if mode not in ("chars", "tokens"):
+        raise ValueError(f"Unknown CHUNK_MODE '{mode}' (expected 'chars' or 'tokens')")
+
+    files = sorted(f for f in raw_dir.glob("*") if f.is_file())
+    if stats is not None:
+        stats.update({"files": 0, "bytes": 0, "chunks": 0})
+
+    chunk_id = 0
+
+    for name, n_bytes, chunks in _iter_chunked_files(files, mode, workers):
+        if stats is not None:
+            stats["files"] += 1
+            stats["bytes"] += n_bytes
+            stats["chunks"] += len(chunks)
+        for i, chunk in enumerate(chunks):
+            yield {
+                "id": f"c_{chunk_id:06d}",
+                "text": chunk,
+                "source": name,
+                "chunk_i": i,
+            }
+            chunk_id += 1
+
+
 # =========================
 # Main
 # =========================
 def main():
+    ap = argparse.ArgumentParser(description="Raw files -> corpus.jsonl")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="file-processing processes (1 = in-process)")
+    ap.add_argument("--chunk-mode", choices=["chars", "tokens"], default=CHUNK_MODE)
+    args = ap.parse_args()
+
     OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    chunk_id = 0
     written = 0
+    stats = {}
+    t0 = time.perf_counter()
 
     with OUT_FILE.open("w", encoding="utf-8") as fout:
-        for file in RAW_DIR.glob("*"):
-            if not file.is_file():
-                continue
-
-            text = file.read_text(encoding="utf-8", errors="ignore")
-            text = normalize(text)
-
-            chunks = chunk_text(text)
-
-            for i, chunk in enumerate(chunks):
-                row = {
-                    "id": f"c_{chunk_id:06d}",
-                    "text": chunk,
-                    "source": file.name,
-                    "chunk_i": i,
-                }
-                fout.write(json.dumps(row, ensure_ascii=False) + "\n")
-                chunk_id += 1
-                written += 1
-
+        for row in iter_chunks(mode=args.chunk_mode, workers=args.workers, stats=stats):
+            fout.write(json.dumps(row, ensure_ascii=False) + "\n")
+            written += 1
+
+    secs = max(time.perf_counter() - t0, 1e-9)
+    print(
+        f"[Prep] {stats['files']} files, {stats['bytes'] / 1e6:.1f} MB in {secs:.2f}s "
+        f"(workers={args.workers}) | {stats['files'] / secs:.1f} files/s, "
+        f"{stats['bytes'] / 1e6 / secs:.2f} MB/s, {written / secs:.0f} chunks/s"
+    )
     print(f"✅ Wrote {written} chunks to {OUT_FILE}")
 
 
@@ -2,42 +2,35 @@
 
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, List
 
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
-from indexing.load_index import load_faiss_bundle
+from indexing import ann
+from indexing import encoders, query_cache
+from indexing.load_index import load_faiss_bundle, load_row_of_id
 
 # ---------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 DEFAULT_TOP_K = 5
+QUERY_CACHE_SIZE = query_cache.DEFAULT_MAX_SIZE  # shared query-embedding LRU; 0 disables it
+QUERY_ENCODER = encoders.DEFAULT_BACKEND  # "torch", "onnx" or "onnx-int8" (indexing/encoders.py)
 
 # ---------------------------------------------------------------------
 # Load FAISS bundle ONCE (module-level)
 # ---------------------------------------------------------------------
-_FAISS_INDEX, _FAISS_META, _DOCSTORE_PATH = load_faiss_bundle()
-
-
-def _load_docstore() -> List[Dict[str, Any]]:
-    docs: List[Dict[str, Any]] = []
-    with open(_DOCSTORE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            docs.append(json.loads(line))
-    return docs
-
-
-_DOCSTORE = _load_docstore()
+# Docstore is memory-mapped (indexing/docstore.py): rows are decoded per hit
+_FAISS_INDEX, _FAISS_META, _DOCSTORE = load_faiss_bundle()
+_ROW_OF_ID = load_row_of_id(len(_DOCSTORE))  # FAISS id -> docstore row
 
 # Load embedding model ONCE (module-level)
 _MODEL = SentenceTransformer(MODEL_NAME)
+_ENCODER = encoders.load_query_encoder(QUERY_ENCODER, MODEL_NAME, model=_MODEL)
+_QUERY_CACHE = query_cache.shared_cache(max_size=QUERY_CACHE_SIZE)
 
 
 # ---------------------------------------------------------------------
@@ -46,34 +39,48 @@ _MODEL = SentenceTransformer(MODEL_NAME)
 def embed_query(query: str) -> np.ndarray:
     """
     Returns a (1, d) float32 numpy array normalized for cosine similarity.
+    Repeated queries are served from the shared query-embedding cache.
     """
-    vec = _MODEL.encode([query], normalize_embeddings=True)
-    return np.asarray(vec, dtype="float32")
+    return _QUERY_CACHE.get_or_encode(
+        encoders.cache_key(MODEL_NAME, QUERY_ENCODER),
+        [query],
+        _ENCODER.encode,
+    )
+
+
+def query_cache_stats() -> Dict[str, Any]:
+    return _QUERY_CACHE.stats()
 
 
 # ---------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------
-def dense_search(query: str, top_k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+def dense_search(
+    query: str,
+    top_k: int = DEFAULT_TOP_K,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+) -> List[Dict[str, Any]]:
     """
     Dense retrieval over FAISS (inner product with L2-normalized vectors).
-    Uses docstore.jsonl alignment: FAISS id == docstore row index.
+    FAISS ids are stable chunk ids (kept across incremental builds), mapped to docstore rows.
+    nprobe / ef_search are per-call knobs for IVF / HNSW indexes (see faiss_meta.json "index_factory").
     """
     query_vec = embed_query(query)
 
     # (Safety) normalize again; harmless if already normalized
     faiss.normalize_L2(query_vec)
 
-    scores, ids = _FAISS_INDEX.search(query_vec, top_k)
+    scores, ids = ann.search(_FAISS_INDEX, query_vec, top_k, nprobe=nprobe, ef_search=ef_search)
 
     results: List[Dict[str, Any]] = []
     for score, idx in zip(scores[0], ids[0]):
         if idx < 0:
             continue
-        doc = _DOCSTORE[int(idx)]
+        doc = _DOCSTORE[int(_ROW_OF_ID[idx])]
         results.append(
             {
-                "id": int(idx),  # stable: FAISS id == docstore row
+                "id": int(idx),  # stable chunk id (FAISS id)
                 "score": float(score),
                 "text": doc.get("text"),
                 "source": doc.get("source"),
@@ -93,6 +100,9 @@ def index_info() -> Dict[str, Any]:
         "dim": int(_FAISS_INDEX.d),
         "docstore_rows": len(_DOCSTORE),
         "corpus_hash": _FAISS_META.get("corpus_hash"),
-        "docstore_path": str(_DOCSTORE_PATH),
+        "docstore_path": str(_DOCSTORE.path),
         "model": MODEL_NAME,
+        "query_encoder": QUERY_ENCODER,
+        "index_factory": _FAISS_META.get("index_factory", ann.DEFAULT_INDEX_FACTORY),
+        "query_cache": _QUERY_CACHE.stats(),
     }
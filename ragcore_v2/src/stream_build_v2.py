@@ -0,0 +1,352 @@
+# ragcore_v2/src/stream_build_v2.py
+# ---------------------------------------------------------
+# Streaming, resumable raw files -> FAISS build (bounded memory).
+#
+#   chunks (prepare_corpus_v2.iter_chunks or corpus.jsonl, one row at a time)
+#     -> fixed-size batches -> embed (through the shared embedding cache)
+#     -> append to: embeddings.npy (memory-mappable), chunk_hashes.npy,
+#                   docstore/, FAISS index (ID-mapped by row)
+#
+# Python memory holds one batch (+ the training sample for IVF/PQ), not
+# the corpus; only the FAISS index itself grows with corpus size.
+#
+# Everything is written to <indexes>/_stream_build/ and checkpointed every
+# CHECKPOINT_EVERY batches. Rerunning after a crash resumes from the last
+# checkpoint (the index is re-filled from embeddings.npy, nothing is
+# re-encoded). On success the artifacts replace the ones build_faiss_v2.py
+# writes, in the same layout, so load_faiss_bundle and incremental builds
+# work unchanged.
+#
+# Publishing is crash-safe: the old faiss_meta.json is removed first, the
+# staged docstore / index / embeddings are swapped in by rename, and the new
+# faiss_meta.json is renamed in LAST (the commit point). Until then
+# load_faiss_bundle refuses the half-published bundle; rerunning finishes
+# the publish (state.json "publishing").
+#
+# Usage (from repo root):
+#   python -m ragcore_v2.src.stream_build_v2                 # from corpus.jsonl
+#   python -m ragcore_v2.src.stream_build_v2 --source raw    # straight from raw/
+#   python -m ragcore_v2.src.stream_build_v2 --fresh         # ignore a checkpoint
+# ---------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from itertools import islice
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from indexing import ann, incremental, quantize
+from indexing.docstore import DocstoreWriter
+from indexing.embedding_cache import EmbeddingCache
+from indexing.npy_append import NpyAppender
+from indexing.token_chunker import TOKENIZER_NAME
+from ragcore_v2.src.build_faiss_v2 import (
+    CORPUS_FILE,
+    EMB_PATH,
+    EMB_STORAGE,
+    FAISS_FACTORY,
+    HASHES_PATH,
+    IDS_PATH,
+    INDEX_PATH,
+    META_PATH,
+    MODEL_NAME,
+    OUT_DIR,
+    file_hash,
+)
+from ragcore_v2.src.prepare_corpus_v2 import (
+    CHUNK_MODE,
+    CHUNK_SIZE,
+    MAX_TOKENS,
+    OVERLAP,
+    RAW_DIR,
+    TOKEN_OVERLAP,
+    iter_chunks,
+)
+
+BATCH_SIZE = 256          # chunks embedded + appended per step
+CHECKPOINT_EVERY = 20     # batches between checkpoints
+TRAIN_SIZE = 50_000       # IVF / PQ: train on the first chunks, then start adding
+
+STAGING_DIR = OUT_DIR / "_stream_build"
+STATE_PATH = STAGING_DIR / "state.json"
+TRAINED_PATH = STAGING_DIR / "trained.index"
+DOCSTORE_DIR = OUT_DIR / "docstore"
+
+
+def iter_rows(source: str):
+    if source == "raw":
+        yield from iter_chunks(RAW_DIR)
+        return
+    if not CORPUS_FILE.exists():
+        raise FileNotFoundError(f"Missing {CORPUS_FILE}. Run prepare_corpus_v2.py first (or use --source raw).")
+    with CORPUS_FILE.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def batched(rows, n: int):
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+
+def build_config(source: str) -> dict:
+    """Anything that changes the output; a checkpoint is only resumed if it matches."""
+    cfg = {"model": MODEL_NAME, "index_factory": FAISS_FACTORY, "emb_storage": EMB_STORAGE, "source": source}
+    if source == "raw":
+        if CHUNK_MODE == "tokens":
+            cfg.update({"chunk_mode": CHUNK_MODE, "tokenizer": TOKENIZER_NAME, "max_tokens": MAX_TOKENS, "overlap": TOKEN_OVERLAP})
+        else:
+            cfg.update({"chunk_size": CHUNK_SIZE, "overlap": OVERLAP})
+    else:
+        cfg["corpus_hash"] = file_hash(CORPUS_FILE)
+    return cfg
+
+
+def write_json_atomic(path: Path, obj: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def publish_pending() -> bool:
+    """True if a finished build was interrupted while publishing."""
+    if not STATE_PATH.exists():
+        return False
+    return bool(json.loads(STATE_PATH.read_text(encoding="utf-8")).get("publishing"))
+
+
+def publish() -> None:
+    """
+    Swap the staged artifacts into OUT_DIR, faiss_meta.json last. Idempotent:
+    after a crash, calling it again moves whatever is still staged.
+    """
+    META_PATH.unlink(missing_ok=True)  # uncommit the old bundle before touching it
+
+    staged_docs = STAGING_DIR / DOCSTORE_DIR.name
+    if staged_docs.exists():
+        old = DOCSTORE_DIR.with_name(DOCSTORE_DIR.name + ".old")
+        if DOCSTORE_DIR.exists():
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(DOCSTORE_DIR, old)
+        os.replace(staged_docs, DOCSTORE_DIR)
+        shutil.rmtree(old, ignore_errors=True)
+
+    staged_scale = quantize.scale_path(STAGING_DIR / EMB_PATH.name)
+    if staged_scale.exists():
+        os.replace(staged_scale, quantize.scale_path(EMB_PATH))
+    elif EMB_STORAGE != "int8":
+        quantize.scale_path(EMB_PATH).unlink(missing_ok=True)
+    for path in (INDEX_PATH, EMB_PATH, HASHES_PATH):
+        if (STAGING_DIR / path.name).exists():
+            os.replace(STAGING_DIR / path.name, path)
+    IDS_PATH.unlink(missing_ok=True)  # streamed rows are indexed under id == row
+
+    os.replace(STAGING_DIR / META_PATH.name, META_PATH)  # commit point
+    shutil.rmtree(STAGING_DIR, ignore_errors=True)
+
+
+class StreamBuild:
+    def __init__(self, source: str, fresh: bool = False) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self.config = build_config(source)
+        self.source = source
+        self.model = SentenceTransformer(MODEL_NAME)
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.cache = EmbeddingCache(MODEL_NAME, normalized=True, autoflush=False)
+
+        state = None
+        if not fresh and STATE_PATH.exists():
+            state = json.loads(STATE_PATH.read_text(encoding="utf-8"))
+            if state.get("config") != self.config:
+                print("[Stream] Checkpoint is for a different corpus/config, starting over.")
+                state = None
+        if state is None:
+            shutil.rmtree(STAGING_DIR, ignore_errors=True)
+            STAGING_DIR.mkdir(parents=True, exist_ok=True)
+
+        resume = None if state is None else state["rows"]
+        self.rows = 0 if state is None else int(state["rows"])
+        self.last_hash = None if state is None else state.get("last_hash")
+
+        self.emb = NpyAppender(STAGING_DIR / EMB_PATH.name, np.float32, (self.dim,), resume_rows=resume)
+        self.hashes = NpyAppender(STAGING_DIR / HASHES_PATH.name, incremental.HASH_DTYPE, resume_rows=resume)
+        self.docs = DocstoreWriter(STAGING_DIR / "docstore", resume=None if state is None else state["docstore"])
+
+        self.index = self._open_index()
+        if resume:
+            print(f"[Stream] Resuming after {self.rows} chunks (index refilled: {self.index.ntotal} vectors)")
+
+    # -----------------------------------------------------
+    # FAISS: trained template on disk, vectors re-added from embeddings.npy
+    # -----------------------------------------------------
+
+    def _open_index(self) -> faiss.Index:
+        if TRAINED_PATH.exists():
+            index = faiss.read_index(str(TRAINED_PATH))
+            self._add_from_disk(index, 0, self.rows)
+            return index
+        index = ann.new_index(self.dim, FAISS_FACTORY, id_map=True)
+        if index.is_trained:
+            self._add_from_disk(index, 0, self.rows)
+        return index
+
+    def _add_from_disk(self, index: faiss.Index, start: int, stop: int) -> None:
+        if stop <= start:
+            return
+        self.emb.flush()
+        vecs = np.load(self.emb.path, mmap_mode="r")
+        for lo in range(start, stop, BATCH_SIZE * 16):
+            hi = min(stop, lo + BATCH_SIZE * 16)
+            index.add_with_ids(np.ascontiguousarray(vecs[lo:hi]), np.arange(lo, hi, dtype=np.int64))
+
+    def _train(self) -> None:
+        """Train IVF / PQ on (up to TRAIN_SIZE of) the vectors written so far, then add them."""
+        need = ann.min_train_points(FAISS_FACTORY)
+        if self.rows < need:
+            raise ValueError(
+                f"Index factory '{FAISS_FACTORY}' needs at least {need} vectors to train, got {self.rows}."
+            )
+        self.emb.flush()
+        vecs = np.load(self.emb.path, mmap_mode="r")
+        n = min(self.rows, TRAIN_SIZE)
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(self.rows, size=n, replace=False))
+        print(f"[Stream] Training {FAISS_FACTORY} on {n} vectors...")
+        self.index.train(np.ascontiguousarray(vecs[sample]))
+        faiss.write_index(self.index, str(TRAINED_PATH))
+        self._add_from_disk(self.index, 0, self.rows)
+
+    # -----------------------------------------------------
+    # Streaming loop
+    # -----------------------------------------------------
+
+    def _encode(self, texts):
+        return self.model.encode(texts, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+
+    def _skip_done(self, rows):
+        """Drop the rows a previous run already wrote (and check they are the same rows)."""
+        it = iter(rows)
+        if self.rows == 0:
+            return it
+        for _ in islice(it, self.rows - 1):
+            pass
+        last = next(it, None)
+        if last is None or incremental.content_hash(last["text"]) != self.last_hash:
+            raise RuntimeError("Input differs from the checkpointed build. Rerun with --fresh.")
+        return it
+
+    def checkpoint(self) -> None:
+        self.emb.flush()
+        self.hashes.flush()
+        doc_state = self.docs.checkpoint()
+        self.cache.flush()
+        write_json_atomic(
+            STATE_PATH,
+            {"config": self.config, "rows": self.rows, "last_hash": self.last_hash, "docstore": doc_state},
+        )
+
+    def run(self) -> None:
+        n_batches = 0
+        for batch in batched(self._skip_done(iter_rows(self.source)), BATCH_SIZE):
+            texts = [row["text"] for row in batch]
+            vecs = self.cache.encode(texts, self._encode)
+
+            start = self.rows
+            self.emb.append(vecs)
+            self.hashes.append(incremental.chunk_hashes(texts))
+            for row in batch:
+                self.docs.add(row)
+            self.rows += len(batch)
+            self.last_hash = incremental.content_hash(texts[-1])
+
+            if self.index.is_trained:
+                self.index.add_with_ids(vecs, np.arange(start, self.rows, dtype=np.int64))
+            elif self.rows >= TRAIN_SIZE:
+                self._train()
+
+            n_batches += 1
+            if n_batches % CHECKPOINT_EVERY == 0:
+                self.checkpoint()
+                print(f"[Stream] {self.rows} chunks | index={self.index.ntotal} | emb cache hits={self.cache.hits}")
+
+        if not self.index.is_trained:
+            self._train()
+        self.checkpoint()
+        self.finish()
+
+    def finish(self) -> None:
+        self.emb.close()
+        self.hashes.close()
+        docstore_dir = self.docs.close()
+        faiss.write_index(self.index, str(STAGING_DIR / INDEX_PATH.name))
+
+        if EMB_STORAGE != quantize.DEFAULT_STORAGE:
+            # staged rows are float32 (appendable); store the final file in its quantized format
+            staged = np.load(self.emb.path, mmap_mode="r")
+            quantize.save_embeddings(self.emb.path, staged, EMB_STORAGE)
+            del staged
+        emb = quantize.load_embeddings(self.emb.path, EMB_STORAGE)
+        if self.source == "raw":
+            h = hashlib.sha256()
+            hashes = np.load(self.hashes.path, mmap_mode="r")
+            for lo in range(0, hashes.shape[0], 65536):
+                h.update(hashes[lo : lo + 65536].tobytes())
+            corpus_hash = h.hexdigest()
+            del hashes
+        else:
+            corpus_hash = self.config["corpus_hash"]
+        meta = {
+            "model": MODEL_NAME,
+            "dim": self.dim,
+            "chunks": self.rows,
+            "batch_size": BATCH_SIZE,
+            "corpus_file": str(RAW_DIR if self.source == "raw" else CORPUS_FILE),
+            "corpus_hash": corpus_hash,
+            "docstore": docstore_dir.name,
+            "build": "stream",
+            **ann.index_meta(FAISS_FACTORY, self.index),
+            **quantize.storage_meta(EMB_STORAGE),
+            **ann.embedding_meta(emb),
+        }
+        del emb
+        write_json_atomic(STAGING_DIR / META_PATH.name, meta)
+
+        # everything is staged: from here a rerun publishes instead of resuming
+        state = json.loads(STATE_PATH.read_text(encoding="utf-8"))
+        write_json_atomic(STATE_PATH, {**state, "publishing": True})
+        publish()
+
+        print(f"✅ Streamed {self.rows} chunks into {OUT_DIR} ({FAISS_FACTORY}, {self.index.ntotal} vectors)")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Streaming, resumable FAISS build for ragcore_v2.")
+    ap.add_argument("--source", choices=["jsonl", "raw"], default="jsonl")
+    ap.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    args = ap.parse_args()
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    if not args.fresh and publish_pending():
+        print("[Stream] Finishing an interrupted publish...")
+        publish()
+        print(f"✅ Published the staged build into {OUT_DIR}")
+        return
+    StreamBuild(args.source, fresh=args.fresh).run()
+
+
+if __name__ == "__main__":
+    main()
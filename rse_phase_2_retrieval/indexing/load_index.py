@@ -1,12 +1,40 @@
 # rse_phase_2_retrieval/indexing/load_index.py
 from __future__ import annotations
 
+import importlib
+import importlib.util
 import json
+import sys
 from pathlib import Path
 from typing import Any, Dict, Tuple
 
 import faiss
 
+# The docstore lives in the repo-root `indexing` package. This package is
+# also named `indexing`, so `from indexing.docstore import ...` resolves to
+# whichever one was imported first. Load the root package by path under its
+# own name instead.
+_SHARED_INDEXING = "_repo_indexing"
+_SHARED_INDEXING_DIR = Path(__file__).resolve().parents[2] / "indexing"
+
+
+def shared_indexing(module: str):
+    """Submodule of the repo-root `indexing` package (e.g. "ann"), whatever `indexing` resolves to."""
+    if _SHARED_INDEXING not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            _SHARED_INDEXING,
+            _SHARED_INDEXING_DIR / "__init__.py",
+            submodule_search_locations=[str(_SHARED_INDEXING_DIR)],
+        )
+        pkg = importlib.util.module_from_spec(spec)
+        sys.modules[_SHARED_INDEXING] = pkg
+        spec.loader.exec_module(pkg)
+    return importlib.import_module(f"{_SHARED_INDEXING}.{module}")
+
+
+_docstore = shared_indexing("docstore")
+Docstore, docstore_exists = _docstore.Docstore, _docstore.exists
+
 # Reuse Phase-1 index for now (fastest path to "Phase-2 alive")
 DEFAULT_INDEX_DIR = Path("rse_phase_2_retrieval/data/indexes")
 
@@ -15,7 +43,8 @@ def load_faiss_bundle(index_dir: Path = DEFAULT_INDEX_DIR) -> Tuple[faiss.Index,
     """
     Loads:
       - faiss.index
-      - faiss_meta.json (must contain: 'ids', 'texts')
+      - docstore/ (binary, memory-mapped; 'ids' / 'texts' become lazy columns)
+        or faiss_meta.json (must contain: 'ids', 'texts')
     Returns:
       (faiss_index, meta_dict)
     """
@@ -23,9 +52,21 @@ def load_faiss_bundle(index_dir: Path = DEFAULT_INDEX_DIR) -> Tuple[faiss.Index,
 
     index_path = index_dir / "faiss.index"
     meta_path = index_dir / "faiss_meta.json"
+    docstore_dir = index_dir / "docstore"
 
     if not index_path.exists():
         raise FileNotFoundError(f"Missing FAISS index file: {index_path}")
+
+    if docstore_exists(docstore_dir):
+        index = faiss.read_index(str(index_path))
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        docstore = Docstore.open(docstore_dir)
+        meta["ids"] = docstore.column("id")
+        meta["texts"] = docstore.column("text")
+        if len(docstore) != index.ntotal:
+            raise ValueError(f"Docstore rows ({len(docstore)}) != FAISS vectors ({index.ntotal})")
+        return index, meta
+
     if not meta_path.exists():
         raise FileNotFoundError(f"Missing FAISS meta file: {meta_path}")
 
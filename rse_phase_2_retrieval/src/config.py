@@ -11,5 +11,11 @@ FAISS_DIR.mkdir(parents=True, exist_ok=True)
 # Model
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# FAISS index type (factory string, see indexing/ann.py) + search knobs
+INDEX_FACTORY = "Flat"  # e.g. "IVF1024,Flat", "IVF1024,PQ32", "HNSW32"
+FAISS_NPROBE = None
+FAISS_EF_SEARCH = None
+EMB_STORAGE = "float32"  # "float16" / "int8": scalar-quantized FAISS codes (indexing/quantize.py)
+
 # Retrieval
 TOP_K = 5
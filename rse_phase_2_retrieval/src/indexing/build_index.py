@@ -1,9 +1,19 @@
 import json
+import sys
+from pathlib import Path
+
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 
-from src.config import DATA_DIR, FAISS_DIR, EMBEDDING_MODEL
+# Ensure repo root is on sys.path so the shared indexing package is importable
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT))
+
+from indexing import ann, quantize  # noqa: E402
+from indexing.embedding_cache import cached_encode  # noqa: E402
+from indexing.docstore import write_docstore  # noqa: E402
+from src.config import DATA_DIR, FAISS_DIR, EMBEDDING_MODEL, EMB_STORAGE, INDEX_FACTORY  # noqa: E402
 
 
 def load_corpus():
@@ -22,17 +32,35 @@ def build_index():
     texts = [d["text"] for d in docs]
 
     model = SentenceTransformer(EMBEDDING_MODEL)
-    embeddings = model.encode(texts, normalize_embeddings=True)
+    embeddings = cached_encode(
+        texts,
+        EMBEDDING_MODEL,
+        lambda batch: model.encode(batch, normalize_embeddings=True),
+        normalized=True,
+    )
 
     dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(np.asarray(embeddings, dtype="float32"))
+    factory = quantize.storage_factory(INDEX_FACTORY, EMB_STORAGE)
+    index = ann.build_index(np.asarray(embeddings, dtype="float32"), factory)
 
     faiss.write_index(index, str(FAISS_DIR / "index.faiss"))
 
     with open(FAISS_DIR / "metadata.json", "w", encoding="utf-8") as f:
         json.dump(docs, f, indent=2, ensure_ascii=False)
 
+    # Memory-mapped ids/texts for the retriever (row id == FAISS id)
+    write_docstore(FAISS_DIR / "docstore", docs, columns={"id": "str"})
+
+    index_meta = {
+        "model": EMBEDDING_MODEL,
+        "dim": int(dim),
+        "n_docs": len(docs),
+        **ann.index_meta(factory, index),
+        **quantize.storage_meta(EMB_STORAGE),
+    }
+    with open(FAISS_DIR / "index_meta.json", "w", encoding="utf-8") as f:
+        json.dump(index_meta, f, indent=2)
+
     print(f"Indexed {len(docs)} documents → {FAISS_DIR}")
 
 
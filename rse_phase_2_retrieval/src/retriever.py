@@ -1,6 +1,11 @@
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from ragcore_v2.indexing.load_index import load_faiss_bundle
+from rse_phase_2_retrieval.indexing.load_index import load_faiss_bundle, shared_indexing
+from rse_phase_2_retrieval.src.config import FAISS_EF_SEARCH, FAISS_NPROBE
+
+# repo-root indexing/ann.py, loaded by path: a plain `from indexing import ann`
+# may resolve to rse_phase_2_retrieval/indexing instead (see load_index.py)
+ann = shared_indexing("ann")
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 TOP_K = 3
@@ -14,12 +19,19 @@ def embed_query(query: str) -> np.ndarray:
     return np.asarray(vec, dtype="float32")
 
 
-def dense_search(query: str, top_k: int = TOP_K):
+def dense_search(
+    query: str,
+    top_k: int = TOP_K,
+    nprobe: int | None = FAISS_NPROBE,
+    ef_search: int | None = FAISS_EF_SEARCH,
+):
     qvec = embed_query(query)
-    scores, indices = _index.search(qvec, top_k)
+    scores, indices = ann.search(_index, qvec, top_k, nprobe=nprobe, ef_search=ef_search)
 
     results = []
     for score, idx in zip(scores[0], indices[0]):
+        if idx < 0:
+            continue
         results.append({
             "id": _meta["ids"][idx],
             "score": float(score),
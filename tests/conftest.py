@@ -0,0 +1,73 @@
+# conftest.py
+# ---------------------------------------------------------
+# Import paths for the unit tests: the shared `indexing` package lives at
+# the repo root, the legacy engine modules are flat files in
+# legacy_day01_112/ (same layout the scripts see at runtime).
+# ---------------------------------------------------------
+
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+for path in (REPO_ROOT, REPO_ROOT / "legacy_day01_112"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+# words the tiny test vocab knows (anything else becomes [UNK])
+TINY_WORDS = (
+    "what is the notice period annual leave policy remote work how long do employees get paid "
+    "every year days approval request time off interns need for a of to"
+).split()
+TINY_PUNCT = [".", ",", "?", "!"]
+
+
+def tiny_vocab_tokenizer(vocab_path: Path, words):
+    """BertTokenizerFast over [specials] + words (vocab passed positionally: `vocab_file` in transformers 4, `vocab` in 5)."""
+    import transformers
+
+    vocab_path.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(words)) + "\n", encoding="utf-8")
+    tokenizer = transformers.BertTokenizerFast(str(vocab_path))
+    assert tokenizer.vocab_size == 5 + len(words), "test vocab was not loaded"
+    return tokenizer
+
+
+@pytest.fixture(scope="session")
+def tiny_bert_dir(tmp_path_factory):
+    """
+    Offline, randomly initialised 1-layer BERT + fast WordPiece tokenizer
+    (HF format), so encoder tests need no model download.
+    """
+    transformers = pytest.importorskip("transformers")
+    torch = pytest.importorskip("torch")
+
+    out = tmp_path_factory.mktemp("tiny_bert")
+    tokenizer = tiny_vocab_tokenizer(out / "vocab.txt", TINY_WORDS + TINY_PUNCT)
+    config = transformers.BertConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=32,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64,
+    )
+    torch.manual_seed(0)
+    transformers.BertModel(config).eval().save_pretrained(out)
+    tokenizer.save_pretrained(out)
+    return out
+
+
+@pytest.fixture(scope="session")
+def tiny_sentence_model(tiny_bert_dir, tmp_path_factory):
+    """tiny_bert_dir as a mean-pooled SentenceTransformer (all-MiniLM layout); returns its path."""
+    pytest.importorskip("sentence_transformers")
+    from sentence_transformers import SentenceTransformer, models
+
+    transformer = models.Transformer(str(tiny_bert_dir), max_seq_length=32)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), "mean")
+    out = tmp_path_factory.mktemp("tiny_st")
+    SentenceTransformer(modules=[transformer, pooling]).save(str(out))
+    return str(out)
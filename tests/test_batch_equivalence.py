@@ -0,0 +1,72 @@
+import json
+import random
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+from conftest import TINY_WORDS  # noqa: E402
+from retriever import RetrieverEngine  # noqa: E402
+
+QUERIES = [
+    "what is the notice period",
+    "annual leave policy",
+    "how do interns request time off",
+    "remote work approval",
+    "zzz",  # no known term: dense-only candidates, zero-filled BM25
+]
+
+
+class StubCrossEncoder:
+    """Deterministic pair scores; records every predict call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, **kwargs):
+        self.calls.append(len(pairs))
+        return [float(len(set(q.split()) & set(t.split())) - 0.01 * len(t)) for q, t, *_ in pairs]
+
+
+@pytest.fixture()
+def engine(tiny_sentence_model, tmp_path):
+    rng = random.Random(0)
+    corpus = [{"id": f"c{i}", "text": " ".join(rng.choices(TINY_WORDS, k=rng.randint(3, 12)))} for i in range(40)]
+    (tmp_path / "corpus_chunks.json").write_text(json.dumps(corpus), encoding="utf-8")
+    engine = RetrieverEngine(
+        artifact_dir=tmp_path,
+        model_name=tiny_sentence_model,
+        embedding_cache_dir=None,
+        query_cache_size=0,
+        rerank_cache_size=0,
+        rerank_cache_persist=False,
+        rerank_batching=False,
+        rerank_pretokenized=False,
+    )
+    engine._reranker = StubCrossEncoder()
+    return engine
+
+
+def _same(batch, singles, score_keys):
+    assert len(batch) == len(singles)
+    for b, s in zip(batch, singles):
+        assert [r["id"] for r in b] == [r["id"] for r in s]
+        for rb, rs in zip(b, s):
+            assert rb["text"] == rs["text"]
+            for key in score_keys:
+                assert rb[key] == pytest.approx(rs[key], abs=1e-5), key
+
+
+def test_hybrid_search_batch_equals_single_calls(engine):
+    alphas = [0.0, 0.1, 0.5, 0.9, 1.0]
+    batch = engine.hybrid_search_batch(QUERIES, top_k=7, alpha=alphas)
+    singles = [engine.hybrid_search(q, top_k=7, alpha=a) for q, a in zip(QUERIES, alphas)]
+    _same(batch, singles, ("score_hybrid", "score_dense", "score_bm25", "score"))
+
+
+def test_hybrid_then_rerank_batch_equals_single_calls(engine):
+    batch = engine.hybrid_then_rerank_batch(QUERIES, retrieve_k=10, final_k=4, alpha=0.3)
+    assert engine._reranker.calls == [len(QUERIES) * 10]  # one predict for every pair
+    singles = [engine.hybrid_then_rerank(q, retrieve_k=10, final_k=4, alpha=0.3) for q in QUERIES]
+    _same(batch, singles, ("score_rerank", "score_hybrid", "score"))
@@ -0,0 +1,93 @@
+import math
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from bm25_index import BM25Index, tokenize
+
+
+def _okapi_scores(documents, query, k1, b):
+    """Textbook Okapi BM25 (Lucene idf) over every document."""
+    docs = [Counter(tokenize(d)) for d in documents]
+    lens = [sum(c.values()) for c in docs]
+    avgdl = sum(lens) / len(lens)
+    n = len(docs)
+    scores = []
+    for c, dl in zip(docs, lens):
+        s = 0.0
+        for term in dict.fromkeys(tokenize(query)):
+            df = sum(1 for d in docs if term in d)
+            if not df or term not in c:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            tf = c[term]
+            s += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        scores.append(s)
+    return np.asarray(scores)
+
+
+def _corpus(seed=0, n_docs=300):
+    rng = random.Random(seed)
+    # skewed vocabulary: long lists for common terms, short for rare ones
+    vocab = [f"w{i:03d}" for i in range(120)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]
+    return [" ".join(rng.choices(vocab, weights, k=rng.randint(3, 60))) for _ in range(n_docs)], vocab
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 20])
+def test_top_k_matches_exhaustive_okapi(top_k):
+    documents, vocab = _corpus()
+    index = BM25Index.build(documents)
+    rng = random.Random(1)
+
+    for _ in range(50):
+        query = " ".join(rng.sample(vocab, rng.randint(1, 6)))
+        ref = _okapi_scores(documents, query, index.k1, index.b)
+        rows, scores = index.search(query, top_k=top_k)
+
+        expected = np.sort(ref)[::-1][:top_k]  # zero-filled when fewer docs match
+        np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-5)
+        assert np.unique(rows).size == rows.size
+        # returned rows carry their own exhaustive score (ties may pick any row)
+        np.testing.assert_allclose(ref[rows], scores, rtol=1e-5, atol=1e-5)
+        assert np.all(np.diff(scores) <= 1e-6)
+
+
+def test_score_all_matches_okapi():
+    documents, _ = _corpus(seed=2, n_docs=80)
+    index = BM25Index.build(documents)
+    query = "w000 w007 w055 w119"
+    np.testing.assert_allclose(index.score_all(query), _okapi_scores(documents, query, index.k1, index.b), rtol=1e-5)
+
+
+def test_unknown_terms_and_round_trip(tmp_path):
+    documents, _ = _corpus(seed=3, n_docs=50)
+    index = BM25Index.build(documents, corpus_hash="abc")
+    rows, scores = index.search("nothing matches here", top_k=5)
+    np.testing.assert_array_equal(rows, np.arange(5))
+    np.testing.assert_array_equal(scores, np.zeros(5))
+
+    path = tmp_path / "bm25.npz"
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.corpus_hash == "abc"
+    for query in ("w000 w001", "w010 w020 w030"):
+        a, b = index.search(query, top_k=10), loaded.search(query, top_k=10)
+        np.testing.assert_array_equal(a[0], b[0])
+        np.testing.assert_allclose(a[1], b[1])
+
+
+def test_few_matches_are_zero_filled_like_the_dense_scorer():
+    documents = ["leave policy", "remote work", "leave days", "notice period", "payroll"]
+    index = BM25Index.build(documents)
+    rows, scores = index.search("leave", top_k=4)
+    assert rows.size == 4 and sorted(rows[:2].tolist()) == [0, 2]
+    assert np.all(scores[:2] > 0)
+    # non-matching rows, lowest first (stable argsort of the old all-docs scores)
+    assert rows[2:].tolist() == [1, 3] and np.all(scores[2:] == 0)
+
+    rows, scores = index.search("leave", top_k=50)
+    assert sorted(rows.tolist()) == list(range(5))
+    assert index.search("leave", top_k=0)[0].size == 0
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+from experiments import chunk_pdf  # noqa: E402
+from experiments.chunk_pdf import StreamingChunker, clean_text  # noqa: E402
+
+
+def eager_chunks(pages, chunk_size):
+    """The original chunk_pdf.main(): whole document in one string, cut every chunk_size chars."""
+    all_text = clean_text("".join(p + "\n" for p in pages))
+    chunks = []
+    for i in range(0, len(all_text), chunk_size):
+        text = all_text[i : i + chunk_size].strip()
+        if text:
+            chunks.append(text)
+    return chunks
+
+
+def streamed_chunks(pages, chunk_size):
+    chunker = StreamingChunker(chunk_size)
+    out = []
+    for page_no, text in enumerate(pages, start=1):
+        out.extend(chunker.feed(text, page_no))
+    out.extend(chunker.flush())
+    return out
+
+
+def _random_pages(rng, n_pages):
+    words = ["leave", "notice", "policy", "days", "  ", "\n", " ", "\r\n", "a", "employee."]
+    pages = []
+    for _ in range(n_pages):
+        n = rng.choice([0, 0, 1, 5, 40, 200])
+        pages.append("".join(rng.choice(words) + rng.choice([" ", "", "\n"]) for _ in range(n)))
+    return pages
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("chunk_size", [1, 7, 100])
+def test_streaming_matches_eager(seed, chunk_size):
+    pages = _random_pages(random.Random(seed), n_pages=12)
+    streamed = streamed_chunks(pages, chunk_size)
+    assert [c["text"] for c in streamed] == eager_chunks(pages, chunk_size)
+    for c in streamed:
+        assert 1 <= c["page"] <= c["page_end"] <= len(pages)
+
+
+def test_chunk_pages_point_at_their_text():
+    pages = ["alpha " * 30, "", "  \n ", "beta " * 30]
+    streamed = streamed_chunks(pages, 50)
+    assert streamed[0]["page"] == 1
+    assert any(c["page"] == 1 and c["page_end"] == 4 for c in streamed)
+    assert streamed[-1]["page"] == streamed[-1]["page_end"] == 4
+
+
+def test_iter_pages_pool_keeps_document_order(tmp_path, monkeypatch):
+    from pypdf import PdfWriter
+
+    pdfs = []
+    for name, n_pages in (("a.pdf", 37), ("b.pdf", 5)):
+        writer = PdfWriter()
+        for _ in range(n_pages):
+            writer.add_blank_page(width=72, height=72)
+        writer.write(tmp_path / name)
+        pdfs.append(tmp_path / name)
+
+    monkeypatch.setattr(chunk_pdf, "PAGES_PER_TASK", 4)  # 12 tasks, more than 2 * workers in flight
+    serial = [(p.name, n) for p, n, _ in chunk_pdf.iter_pages(pdfs, workers=1)]
+    pooled = [(p.name, n) for p, n, _ in chunk_pdf.iter_pages(pdfs, workers=2)]
+    assert serial == pooled == [("a.pdf", i) for i in range(1, 38)] + [("b.pdf", i) for i in range(1, 6)]
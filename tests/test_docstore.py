@@ -0,0 +1,53 @@
+import inspect
+
+import pytest
+
+from indexing.docstore import Docstore, exists, write_docstore
+
+ROWS = [
+    {"text": "Notice period is 30 days.", "source": "hr.pdf", "chunk_i": 0},
+    {"text": "", "source": "hr.pdf", "chunk_i": 1},
+    {"text": "Urlaub: 25 Tage – ünïcödé ✓", "source": None, "chunk_i": None},
+    {"text": "x" * 5000, "source": "big.txt", "chunk_i": 7},
+]
+
+
+def test_write_read_round_trip(tmp_path):
+    out = tmp_path / "docstore"
+    write_docstore(out, ROWS)
+    assert exists(out)
+
+    store = Docstore.open(out)
+    assert len(store) == len(ROWS)
+    for i, row in enumerate(ROWS):
+        assert store.text(i) == row["text"]
+        assert store.value(i, "chunk_i") == row["chunk_i"]
+        # str columns store None as ""
+        assert store.value(i, "source") == (row["source"] or "")
+    assert store.get_many([3, 0]) == [store.get(3), store.get(0)]
+    assert list(store.column("text")) == [r["text"] for r in ROWS]
+    store.close()
+
+
+def test_custom_columns_and_bounds(tmp_path):
+    out = tmp_path / "docstore"
+    rows = [{"text": f"chunk {i}", "id": f"doc-{i}", "page": i * 2} for i in range(3)]
+    write_docstore(out, rows, columns={"id": "str", "page": "int"})
+
+    store = Docstore.open(out)
+    assert store.get(2) == {"text": "chunk 2", "id": "doc-2", "page": 4}
+    assert store.column("id")[1] == "doc-1"
+    with pytest.raises(IndexError):
+        store.get(3)
+    with pytest.raises(KeyError):
+        store.column("source")
+    store.close()
+
+
+def test_rse_load_index_uses_shared_docstore():
+    pytest.importorskip("faiss")
+    from indexing import docstore
+    from rse_phase_2_retrieval.indexing import load_index
+
+    # rse has its own `indexing` package; load_index must still get the repo-root docstore
+    assert inspect.getfile(load_index.Docstore) == docstore.__file__
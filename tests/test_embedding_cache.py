@@ -0,0 +1,56 @@
+import hashlib
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")  # indexing.incremental (hash helpers) imports faiss
+
+from indexing.embedding_cache import EmbeddingCache  # noqa: E402
+from indexing.incremental import chunk_hashes  # noqa: E402
+
+
+def _vec(text, d=4):
+    return np.frombuffer(hashlib.sha256(text.encode()).digest()[:d], dtype=np.uint8).astype("float32")
+
+
+def _encode(batch):
+    return np.stack([_vec(t) for t in batch])
+
+
+def test_reopened_cache_serves_stored_vectors(tmp_path):
+    first = EmbeddingCache("m", root=tmp_path)
+    first.encode(["a", "b"], _encode)
+    assert first.misses == 2
+
+    second = EmbeddingCache("m", root=tmp_path)
+    out = second.encode(["b", "c", "a"], _encode)
+    assert (second.hits, second.misses) == (2, 1)
+    np.testing.assert_array_equal(out, _encode(["b", "c", "a"]))
+
+
+def test_concurrent_builders_never_share_a_shard(tmp_path):
+    n = 8
+    caches = [EmbeddingCache("m", root=tmp_path) for _ in range(n)]  # all opened before any shard exists
+    barrier = threading.Barrier(n)
+
+    def build(i):
+        barrier.wait()
+        caches[i].encode([f"text-{i}-{j}" for j in range(3)], _encode)
+
+    threads = [threading.Thread(target=build, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    cache_dir = caches[0].dir
+    assert len(list(cache_dir.glob("shard_*.npy"))) == n
+    assert not list(cache_dir.glob("*.tmp.npz"))
+
+    # the last index write may drop entries of a concurrent one, but never maps a key to another text's vector
+    fresh = EmbeddingCache("m", root=tmp_path)
+    texts = [f"text-{i}-{j}" for i in range(n) for j in range(3)]
+    found, locs = fresh.lookup(chunk_hashes(texts))
+    assert found.any()
+    np.testing.assert_array_equal(fresh.vectors(locs[found]), _encode([t for t, f in zip(texts, found) if f]))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("faiss")  # indexing.bench_encoders imports faiss
+st = pytest.importorskip("sentence_transformers")
+
+from indexing import encoders  # noqa: E402
+from indexing.bench_encoders import MIN_COSINE  # noqa: E402
+
+QUERIES = [
+    "what is the notice period",
+    "how long is annual leave",
+    "do interns need approval for remote work",
+    "time off",
+    "what is the policy for paid days off every year and how do employees request them",
+    "zzz unknown words only",
+]
+
+
+@pytest.fixture(scope="module")
+def torch_encoder(tiny_sentence_model):
+    return encoders.TorchQueryEncoder(st.SentenceTransformer(tiny_sentence_model))
+
+
+@pytest.mark.parametrize("int8", [False, True])
+def test_onnx_encoder_matches_torch(tiny_sentence_model, torch_encoder, tmp_path, int8):
+    onnx = encoders.OnnxQueryEncoder(tiny_sentence_model, int8=int8, root=tmp_path)
+    assert encoders.onnx_model_path(tiny_sentence_model, int8=int8, root=tmp_path).exists()
+    assert onnx.dim == torch_encoder.dim
+
+    ref = torch_encoder.encode(QUERIES)
+    batched = onnx.encode(QUERIES)  # padded batch
+    single = np.vstack([onnx.encode([q]) for q in QUERIES])
+    np.testing.assert_allclose(np.linalg.norm(batched, axis=1), 1.0, rtol=1e-5)
+    for vecs in (batched, single):
+        cos = np.sum(vecs * ref, axis=1)
+        assert cos.min() >= MIN_COSINE, cos
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")  # retriever imports faiss at module level
+
+from retriever import fuse_hybrid_rows  # noqa: E402
+
+
+def test_empty_union_returns_no_rows():
+    empty_rows = np.zeros(0, dtype=np.int64)
+    empty_scores = np.zeros(0, dtype=np.float32)
+    rows, hybrid, dense, bm25 = fuse_hybrid_rows(empty_rows, empty_scores, empty_rows, empty_scores, top_k=5, alpha=0.3)
+    assert rows.size == hybrid.size == dense.size == bm25.size == 0
+
+
+def test_missing_stage_scores_count_as_zero():
+    rows, hybrid, dense, bm25 = fuse_hybrid_rows(
+        np.array([3, 1]), np.array([0.9, 0.5], dtype=np.float32),
+        np.array([7]), np.array([2.0], dtype=np.float32),
+        top_k=3, alpha=0.5,
+    )
+    assert sorted(rows.tolist()) == [1, 3, 7]
+    by_row = dict(zip(rows.tolist(), zip(dense.tolist(), bm25.tolist())))
+    assert by_row[7][0] == 0.0 and by_row[3][1] == 0.0
+    assert np.all(np.diff(hybrid) <= 0)
+
+
+def test_zero_filled_bm25_rows_anchor_dense_normalization():
+    # a zero-filled BM25 row outside the dense top-k gives both stages a 0.0 floor,
+    # so min-max maps dense scores against 0 (not against the weakest dense hit)
+    dense_rows, dense_scores = np.array([0, 1]), np.array([0.8, 0.4], dtype=np.float32)
+    rows, hybrid, dense, bm25 = fuse_hybrid_rows(
+        dense_rows, dense_scores, np.array([1, 5]), np.array([2.0, 0.0], dtype=np.float32), top_k=3, alpha=0.5,
+    )
+    by_row = dict(zip(rows.tolist(), hybrid.tolist()))
+    assert by_row == pytest.approx({0: 0.5, 1: 0.75, 5: 0.0})
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from indexing import ann, incremental, quantize  # noqa: E402
+
+
+def _diff(old_texts, new_texts, old_ids=None):
+    return incremental.diff_chunks(
+        incremental.chunk_hashes(old_texts), incremental.chunk_hashes(new_texts), old_ids
+    )
+
+
+def test_insert_keeps_ids_of_every_unchanged_chunk():
+    old = ["a", "b", "c", "d"]
+    diff = _diff(old, ["new", "a", "b", "c", "d"])
+    assert diff.ids.tolist() == [4, 0, 1, 2, 3]
+    assert diff.patch_rows.tolist() == [0]
+    assert diff.remove_ids.size == 0
+    assert diff.encode_rows.tolist() == [0]
+    assert diff.reuse_from.tolist() == [-1, 0, 1, 2, 3]
+
+
+def test_edit_and_delete():
+    diff = _diff(["a", "b", "c", "d"], ["a", "B", "d"])
+    assert diff.ids.tolist() == [0, 4, 3]
+    assert diff.patch_rows.tolist() == [1]
+    assert sorted(diff.remove_ids.tolist()) == [1, 2]
+
+
+def test_unchanged_corpus_is_noop():
+    diff = _diff(["a", "b"], ["a", "b"])
+    assert diff.is_noop
+    assert diff.ids.tolist() == [0, 1]
+
+
+def test_duplicates_pair_up_in_row_order():
+    diff = _diff(["x", "y", "x"], ["x", "x", "x", "y"])
+    # two old copies of "x" keep ids 0 and 2, the third copy is new but reuses the vector
+    assert diff.ids.tolist() == [0, 2, 3, 1]
+    assert diff.patch_rows.tolist() == [2]
+    assert diff.encode_rows.size == 0
+    assert diff.remove_ids.size == 0
+
+    diff = _diff(["x", "x"], ["x"])
+    assert diff.ids.tolist() == [0]
+    assert diff.remove_ids.tolist() == [1]
+
+
+def test_ids_carry_over_between_updates():
+    first = _diff(["a", "b"], ["z", "a", "b"])
+    second = _diff(["z", "a", "b"], ["b", "q"], old_ids=first.ids)
+    assert second.ids.tolist() == [1, 3]
+    assert sorted(second.remove_ids.tolist()) == [0, 2]
+
+    with pytest.raises(ValueError):
+        _diff(["a", "b"], ["a"], old_ids=np.arange(3))
+
+
+def test_id_to_row():
+    lookup = incremental.id_to_row(np.asarray([4, 0, 2]))
+    assert lookup.tolist() == [1, -1, 2, -1, 0]
+    assert incremental.id_to_row(np.zeros(0, dtype=np.int64)).size == 0
+
+
+def _unit(n, d=8, seed=0):
+    x = np.random.default_rng(seed).standard_normal((n, d)).astype("float32")
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_assemble_reuses_float32_rows_and_reencodes_quantized_ones(tmp_path):
+    old_texts = [f"t{i}" for i in range(4)]
+    new_texts = ["new"] + old_texts
+    vecs = dict(zip(new_texts, _unit(5)))
+    encoded = []
+
+    def encode(batch):
+        encoded.append(list(batch))
+        return np.stack([vecs[t] for t in batch])
+
+    diff = _diff(old_texts, new_texts)
+    old_emb = np.stack([vecs[t] for t in old_texts])
+
+    emb = incremental.assemble_embeddings(diff, old_emb, new_texts, encode)
+    assert encoded == [["new"]]
+    np.testing.assert_array_equal(emb, np.stack([vecs[t] for t in new_texts]))
+
+    # int8 storage: reused rows come from encode() at full precision, not the dequantized file
+    quantize.save_embeddings(tmp_path / "emb.npy", old_emb, "int8")
+    lossy = quantize.load_embeddings(tmp_path / "emb.npy", "int8")
+    encoded.clear()
+    emb = incremental.assemble_embeddings(diff, lossy, new_texts, encode)
+    assert encoded == [new_texts]
+    np.testing.assert_array_equal(emb, np.stack([vecs[t] for t in new_texts]))
+
+
+def test_patched_index_maps_ids_back_to_rows():
+    old_texts = [f"t{i}" for i in range(6)]
+    new_texts = ["new", "t0", "t1", "T2", "t3", "t5"]
+    vecs = dict(zip(old_texts + ["new", "T2"], _unit(8, seed=1)))
+    old_emb = np.stack([vecs[t] for t in old_texts])
+    index = ann.build_index(old_emb, "Flat", id_map=True)
+
+    diff = _diff(old_texts, new_texts)
+    emb = incremental.assemble_embeddings(diff, old_emb, new_texts, lambda b: np.stack([vecs[t] for t in b]))
+    index, mode = incremental.patch_index(index, emb, diff, "Flat")
+    assert mode == "patched"
+    assert index.ntotal == len(new_texts)
+
+    lookup = incremental.id_to_row(diff.ids)
+    _, ids = index.search(emb, 1)
+    assert lookup[ids[:, 0]].tolist() == list(range(len(new_texts)))
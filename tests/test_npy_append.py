@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from indexing.docstore import Docstore, DocstoreWriter, exists
+from indexing.npy_append import NpyAppender
+
+
+def test_resume_drops_rows_after_checkpoint(tmp_path):
+    path = tmp_path / "emb.npy"
+    rows = np.arange(40, dtype=np.float32).reshape(10, 4)
+
+    a = NpyAppender(path, np.float32, (4,))
+    a.append(rows[:6])
+    a.flush()  # checkpoint at 6 rows
+    a.append(rows[6:9])  # lost on "crash": never checkpointed
+    a._f.write(b"\x00" * 7)  # torn partial row at the tail
+    a._f.flush()
+    a._f.close()
+
+    # file is still a valid .npy at the checkpointed shape
+    assert np.load(path, mmap_mode="r").shape == (6, 4)
+
+    b = NpyAppender(path, np.float32, (4,), resume_rows=6)
+    b.append(rows[6:])
+    b.close()
+    np.testing.assert_array_equal(np.load(path), rows)
+
+
+def test_resume_rejects_other_row_shape(tmp_path):
+    path = tmp_path / "emb.npy"
+    NpyAppender(path, np.float32, (4,)).close()
+    with pytest.raises(ValueError):
+        NpyAppender(path, np.float32, (8,), resume_rows=0)
+
+
+def test_docstore_writer_aborts_on_exception_and_resumes(tmp_path):
+    out = tmp_path / "docstore"
+    with pytest.raises(RuntimeError):
+        with DocstoreWriter(out) as w:
+            w.add({"text": "a", "source": "s", "chunk_i": 0})
+            state = w.checkpoint()
+            w.add({"text": "lost", "source": "s", "chunk_i": 1})
+            raise RuntimeError("crash")
+
+    # every file was closed, no header written
+    assert all(f.closed for f in w._blobs.values())
+    assert all(a._f.closed for a in list(w._offsets.values()) + list(w._ints.values()))
+    assert not exists(out)
+
+    with DocstoreWriter(out, resume=state) as w:
+        w.add({"text": "b", "source": "t", "chunk_i": 1})
+    store = Docstore.open(out)
+    assert store.get_many([0, 1]) == [
+        {"text": "a", "source": "s", "chunk_i": 0},
+        {"text": "b", "source": "t", "chunk_i": 1},
+    ]
+    store.close()
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from indexing import quantize
+
+
+def _vectors(n=200, d=16, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((n, d)).astype("float32")
+    x[:, 3] = 0.0  # an all-zero dimension (scale falls back to 1)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("storage", quantize.STORAGE_TYPES)
+def test_save_load_round_trip(tmp_path, storage):
+    x = _vectors()
+    path = tmp_path / "emb.npy"
+    quantize.save_embeddings(path, x, storage)
+    emb = quantize.load_embeddings(path, storage)
+
+    assert emb.shape == x.shape and len(emb) == len(x)
+    assert np.asarray(emb[5:9]).dtype == ("float16" if storage == "float16" else "float32")  # int8 reads dequantized
+    if storage == "int8":
+        scale = np.load(quantize.scale_path(path))
+        assert np.all(np.abs(emb[:] - x) <= scale / 2 + 1e-7)  # at most half a quantization step
+        assert np.all(emb[:][:, 3] == 0.0)
+    else:
+        np.testing.assert_allclose(np.asarray(emb[:], dtype="float32"), x, atol=1e-3 if storage == "float16" else 0)
+    assert quantize.scale_path(path).exists() == (storage == "int8")
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_wrong_storage_is_refused(tmp_path):
+    path = tmp_path / "emb.npy"
+    quantize.save_embeddings(path, _vectors(), "float16")
+    with pytest.raises(ValueError):
+        quantize.load_embeddings(path, "float32")
+
+
+@pytest.mark.parametrize("query_shape", [(16,), (16, 3)])
+def test_int8_matmul_matches_float32(tmp_path, monkeypatch, query_shape):
+    x = _vectors(n=300)
+    path = tmp_path / "emb.npy"
+    quantize.save_embeddings(path, x, "int8")
+    monkeypatch.setattr(quantize, "_CHUNK_ROWS", 64)  # exercise the chunked loop
+    emb = quantize.load_embeddings(path, "int8")
+
+    q = np.random.default_rng(1).standard_normal(query_shape).astype("float32")
+    scores = emb @ q
+    assert scores.shape == (300,) + query_shape[1:] and scores.dtype == np.float32
+    np.testing.assert_allclose(scores, emb[:] @ q, rtol=1e-5, atol=1e-5)  # same as dequantize-then-matmul
+    np.testing.assert_allclose(scores, x @ q, atol=0.05)  # close to the float32 scores
+    if q.ndim == 1:
+        assert np.argmax(scores) == np.argmax(x @ q)
+
+
+def test_int8_rewrite_swaps_scale_before_codes(tmp_path, monkeypatch):
+    path = tmp_path / "emb.npy"
+    quantize.save_embeddings(path, _vectors(seed=0), "int8")
+    renamed = []
+    real = os.replace
+    monkeypatch.setattr(quantize.os, "replace", lambda a, b: (renamed.append(os.path.basename(b)), real(a, b)))
+
+    x = _vectors(seed=1) * 0.5
+    quantize.save_embeddings(path, x, "int8")
+    assert renamed == [quantize.scale_path(path).name, path.name]  # both temps ready, codes rename last
+    emb = quantize.load_embeddings(path, "int8")
+    np.testing.assert_allclose(emb[:], x, atol=float(np.load(quantize.scale_path(path)).max()))
+
+    quantize.save_embeddings(path, x, "float32")  # switching back drops the stale scale
+    assert not quantize.scale_path(path).exists()
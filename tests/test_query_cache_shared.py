@@ -0,0 +1,66 @@
+import importlib
+import json
+import sys
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+st = pytest.importorskip("sentence_transformers")
+
+from indexing import ann, query_cache  # noqa: E402
+from indexing.docstore import write_docstore  # noqa: E402
+
+DOCS = [
+    "annual leave policy employees get paid days every year",
+    "remote work needs approval",
+    "the notice period is days",
+    "interns request time off",
+]
+
+
+def test_legacy_engine_and_v2_share_query_cache_entries(tiny_sentence_model, tmp_path, monkeypatch):
+    import retriever
+
+    # both sides ask for the same model name; load the tiny offline model instead
+    real = st.SentenceTransformer
+    monkeypatch.setattr(st, "SentenceTransformer", lambda name, *a, **kw: real(tiny_sentence_model))
+    monkeypatch.chdir(tmp_path)
+
+    # ragcore_v2 bundle at its default relative location
+    out = tmp_path / "ragcore_v2/data/indexes"
+    out.mkdir(parents=True)
+    emb = real(tiny_sentence_model).encode(DOCS, normalize_embeddings=True).astype("float32")
+    faiss.write_index(ann.build_index(emb, id_map=True), str(out / "faiss.index"))
+    (out / "faiss_meta.json").write_text(json.dumps({"model": "tiny"}), encoding="utf-8")
+    write_docstore(out / "docstore", ({"text": t, "source": "doc.txt", "chunk_i": i} for i, t in enumerate(DOCS)))
+
+    # legacy engine artifacts
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "corpus_chunks.json").write_text(json.dumps([{"text": t} for t in DOCS]), encoding="utf-8")
+
+    cache = query_cache.shared_cache()
+    cache.clear()
+
+    monkeypatch.delitem(sys.modules, "ragcore_v2.src.retriever_v2", raising=False)
+    v2 = importlib.import_module("ragcore_v2.src.retriever_v2")
+    engine = retriever.RetrieverEngine(
+        artifact_dir=data,
+        model_name=v2.MODEL_NAME,
+        embedding_cache_dir=None,
+        rerank_cache_persist=False,
+        rerank_batching=False,
+    )
+    engine.warm()
+    assert engine.query_cache is v2._QUERY_CACHE is cache
+
+    query = "what is the notice period"
+    vec = v2.embed_query(query).copy()
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 1)
+
+    engine.dense_search(query)
+    engine.dense_scores_all(query)
+    assert v2.dense_search(query)
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (3, 1)
+    np.testing.assert_allclose(engine._encode_query_dense(query), vec, rtol=1e-6)
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+from fastapi import HTTPException  # noqa: E402
+
+from app import QueryPool  # noqa: E402
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_cancelled_request_keeps_its_slot_until_the_thread_finishes():
+    pool = QueryPool(workers=1, max_inflight=1)
+    started, release = threading.Event(), threading.Event()
+
+    def pipeline():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def scenario():
+        task = asyncio.ensure_future(pool.run(pipeline))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # the pipeline thread is still running: its slot is not free yet
+        assert pool.stats()["inflight"] == 1
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(pipeline)
+        assert exc.value.status_code == 503
+
+    try:
+        asyncio.run(scenario())
+        release.set()
+        _wait_for(lambda: pool.stats()["inflight"] == 0)
+        assert pool.stats()["completed"] == 1
+        assert pool.stats()["rejected"] == 1
+        assert asyncio.run(pool.run(lambda x: x * 2, 21)) == 42
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_failures_release_the_slot():
+    pool = QueryPool(workers=1, max_inflight=1)
+
+    def boom():
+        raise ValueError("pipeline failed")
+
+    try:
+        with pytest.raises(ValueError):
+            asyncio.run(pool.run(boom))
+        _wait_for(lambda: pool.stats()["inflight"] == 0)
+        assert asyncio.run(pool.run(lambda: "ok")) == "ok"
+    finally:
+        pool.shutdown()
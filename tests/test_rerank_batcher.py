@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from rerank_batcher import RerankBatcher, RerankTimeout
+
+
+def _score(pair):
+    # depends only on the pair, not on its position in the predict batch
+    return float(sum(map(ord, pair[0] + "|" + pair[1])) % 997)
+
+
+def _predict(pairs, batch_size=32):
+    return [_score(p) for p in pairs]
+
+
+def test_scores_scatter_back_in_caller_order():
+    batcher = RerankBatcher(_predict, max_wait_ms=50, max_batch=1000)
+    n_callers = 8
+    barrier = threading.Barrier(n_callers)
+    results = {}
+
+    def caller(i):
+        # lengths vary within and across callers, so the length sort reorders everything
+        pairs = [(f"q{i}", "x" * ((i * 7 + j * 13) % 40) + str(j)) for j in range(10)]
+        barrier.wait()
+        results[i] = (pairs, batcher.submit(pairs))
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(n_callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for pairs, scores in results.values():
+        assert scores == [_score(p) for p in pairs]
+    assert batcher.stats()["requests"] == n_callers
+    assert batcher.stats()["batches"] < n_callers  # some requests actually shared a batch
+
+
+def test_lone_caller_is_not_held_for_max_wait():
+    batcher = RerankBatcher(_predict, max_wait_ms=2000)
+    t0 = time.perf_counter()
+    assert batcher.submit([("q", "doc")]) == [_score(("q", "doc"))]
+    assert time.perf_counter() - t0 < 1.0
+
+
+def test_predict_failure_reaches_every_caller_and_worker_survives():
+    calls = []
+
+    def predict(pairs, batch_size=32):
+        calls.append(len(pairs))
+        if len(calls) == 1:
+            raise ValueError("model blew up")
+        return _predict(pairs)
+
+    batcher = RerankBatcher(predict, result_timeout_s=5)
+    with pytest.raises(ValueError, match="blew up"):
+        batcher.submit([("q", "a"), ("q", "b")])
+    assert batcher.submit([("q", "a")]) == [_score(("q", "a"))]
+
+
+def test_failure_before_predict_does_not_hang_callers():
+    batcher = RerankBatcher(_predict, result_timeout_s=5)
+    with pytest.raises(IndexError):
+        batcher.submit([("query only",)])  # malformed pair: fails while sorting by length
+    assert batcher.submit([("q", "a")]) == [_score(("q", "a"))]
+
+
+def test_wrong_score_count_is_an_error_not_a_hang():
+    batcher = RerankBatcher(lambda pairs, batch_size=32: [0.0], result_timeout_s=5)
+    with pytest.raises(ValueError):
+        batcher.submit([("q", "a"), ("q", "b")])
+
+
+def test_result_timeout():
+    release = threading.Event()
+
+    def slow_predict(pairs, batch_size=32):
+        release.wait(5)
+        return _predict(pairs)
+
+    batcher = RerankBatcher(slow_predict, result_timeout_s=0.2)
+    with pytest.raises(RerankTimeout):
+        batcher.submit([("q", "a")])
+    release.set()
+    assert batcher.stats()["timeouts"] == 1
+
+
+def test_timed_out_request_is_cancelled_not_predicted():
+    started, release = threading.Event(), threading.Event()
+    predicted = []
+
+    def slow_predict(pairs, batch_size=32):
+        predicted.extend(p[1] for p in pairs)
+        started.set()
+        release.wait(5)
+        return _predict(pairs)
+
+    batcher = RerankBatcher(slow_predict, result_timeout_s=0.3)
+    busy = threading.Thread(target=lambda: pytest.raises(RerankTimeout, batcher.submit, [("q", "running")]))
+    busy.start()
+    assert started.wait(5)  # the worker is stuck in the first batch
+
+    with pytest.raises(RerankTimeout):
+        batcher.submit([("q", "abandoned")])  # still queued when its caller gives up
+    release.set()
+    busy.join()
+
+    batcher.result_timeout_s = 5
+    assert batcher.submit([("q", "next")]) == [_score(("q", "next"))]
+    assert predicted == ["running", "next"]
+    assert batcher.stats()["cancelled"] == 1
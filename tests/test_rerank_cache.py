@@ -0,0 +1,104 @@
+import sqlite3
+
+from rerank_cache import RerankScoreCache, make_namespace
+
+
+def _cache(db_path, model="ce-a", max_size=0):
+    # max_size=0: memory tier off, every lookup goes to SQLite
+    return RerankScoreCache(make_namespace(model, "v1"), max_size=max_size, db_path=db_path)
+
+
+def test_edited_chunk_text_is_a_miss(tmp_path):
+    db = tmp_path / "rerank.sqlite"
+    cache = _cache(db)
+    cache.put_many([("q", "doc-1", "hash-old")], [1.5])
+    assert cache.get_many([("q", "doc-1", "hash-old"), ("q", "doc-1", "hash-new")]) == [1.5, None]
+    cache.close()
+
+    reopened = _cache(db)
+    assert reopened.get_many([("q", "doc-1", "hash-new")]) == [None]
+    assert reopened.get_many([("q", "doc-1", "hash-old")]) == [1.5]
+
+
+def test_other_namespaces_survive_open_and_prune(tmp_path):
+    db = tmp_path / "rerank.sqlite"
+    a, b = _cache(db, "ce-a"), _cache(db, "ce-b")
+    a.put_many([("q", "doc-1", "h1"), ("q", "doc-2", "h2")], [1.0, 2.0])
+    b.put_many([("q", "doc-1", "h1"), ("q", "doc-2", "h2")], [3.0, 4.0])
+    a.close()
+    b.close()
+
+    a = _cache(db, "ce-a")  # opening must not touch ce-b's rows
+    assert a.prune([("doc-1", "h1")]) == 1  # doc-2 edited / removed
+    assert a.get_many([("q", "doc-1", "h1"), ("q", "doc-2", "h2")]) == [1.0, None]
+
+    b = _cache(db, "ce-b")
+    assert b.get_many([("q", "doc-1", "h1"), ("q", "doc-2", "h2")]) == [3.0, 4.0]
+
+
+def test_unhashed_legacy_table_is_dropped(tmp_path):
+    db = tmp_path / "rerank.sqlite"
+    con = sqlite3.connect(db)
+    con.execute("CREATE TABLE rerank_scores (ns TEXT, query TEXT, doc_id TEXT, score REAL)")
+    con.execute("INSERT INTO rerank_scores VALUES ('ce-a|v1', 'q', 'doc-1', 9.0)")
+    con.commit()
+    con.close()
+
+    cache = _cache(db)
+    assert cache.get_many([("q", "doc-1", "h1")]) == [None]
+    cache.close()
+    tables = {r[0] for r in sqlite3.connect(db).execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == {"rerank_scores_v2"}
+
+
+def test_memory_tier_keys_include_text_hash(tmp_path):
+    cache = _cache(None, max_size=10)
+    cache.put_many([("q", "doc-1", "h1")], [0.5])
+    assert cache.get_many([("q", "doc-1", "h1"), ("q", "doc-1", "h2")]) == [0.5, None]
+
+
+def _rows(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute("SELECT COUNT(*) FROM rerank_scores_v2").fetchone()[0]
+    finally:
+        con.close()
+
+
+def test_lookup_is_one_select_per_call(tmp_path):
+    cache = _cache(tmp_path / "rerank.sqlite")
+    keys = [("q", f"doc-{i}", f"h{i}") for i in range(50)]
+    cache.put_many(keys[::2], [float(i) for i in range(25)])
+    cache.flush()
+
+    statements = []
+    cache._conn().set_trace_callback(statements.append)
+    assert cache.get_many(keys) == [float(i // 2) if i % 2 == 0 else None for i in range(50)]
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+    assert cache.stats()["hits_disk"] == 25 and cache.stats()["misses"] == 25
+    cache.close()
+
+
+def test_db_is_wal_with_normal_sync(tmp_path):
+    cache = _cache(tmp_path / "rerank.sqlite")
+    cache.get_many([("q", "doc-1", "h1")])
+    db = cache._conn()
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    cache.close()
+
+
+def test_writes_are_batched_and_flushed_on_close(tmp_path):
+    db = tmp_path / "rerank.sqlite"
+    cache = RerankScoreCache(make_namespace("ce-a", "v1"), max_size=0, db_path=db, flush_rows=3, flush_interval_s=3600)
+    assert cache.get_many([("q", "doc-0", "h0")]) == [None]  # opens the db
+    cache.put_many([("q", "doc-1", "h1"), ("q", "doc-2", "h2")], [1.0, 2.0])
+    assert _rows(db) == 0  # buffered, no transaction yet
+    assert cache.get_many([("q", "doc-1", "h1")]) == [1.0]  # but already served
+
+    cache.put_many([("q", "doc-3", "h3")], [3.0])
+    assert _rows(db) == 3  # one flush for all three
+
+    cache.put_many([("q", "doc-4", "h4")], [4.0])
+    cache.close()
+    assert _rows(db) == 4
@@ -0,0 +1,52 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("transformers")
+
+from conftest import tiny_vocab_tokenizer  # noqa: E402
+from rerank_tokens import PairEncoder, truncate_pair  # noqa: E402
+
+N_WORDS = 50
+
+
+@pytest.fixture(scope="module")
+def tokenizer(tmp_path_factory):
+    # tiny offline BERT vocab: every "w<i>" is one token, so token counts are exact
+    return tiny_vocab_tokenizer(tmp_path_factory.mktemp("tok") / "vocab.txt", [f"w{i}" for i in range(N_WORDS)])
+
+
+def _words(n, offset=0):
+    return " ".join(f"w{(offset + i) % N_WORDS}" for i in range(n))
+
+
+@pytest.mark.parametrize("budget", [1, 2, 3, 5, 8, 13])
+def test_truncate_pair_matches_longest_first(tokenizer, budget):
+    # [CLS] q [SEP] t [SEP]: 3 special tokens around the pair
+    for n_q in range(0, 18):
+        for n_t in range(1, 18):  # chunk texts are never empty
+            enc = tokenizer(_words(n_q), _words(n_t), truncation="longest_first", max_length=budget + 3)
+            types = enc["token_type_ids"]
+            kept = (types.count(0) - 2, types.count(1) - 1)
+            assert truncate_pair(n_q, n_t, budget) == kept, (n_q, n_t, budget)
+
+
+def test_pair_encoder_features_match_tokenizer(tokenizer):
+    rng = random.Random(0)
+    encoder = PairEncoder(tokenizer, max_length=16)
+    assert encoder.budget == 13
+
+    queries = [_words(rng.randint(0, 20), offset=rng.randint(0, 49)) for _ in range(40)]
+    texts = [_words(rng.randint(1, 30), offset=rng.randint(0, 49)) for _ in range(40)]
+
+    q_ids = encoder.tokenize(queries)
+    t_ids = encoder.tokenize(texts)
+    # the token cache stores text ids pre-truncated to the budget, plus the full length
+    features = encoder.features(q_ids, [t[: encoder.budget] for t in t_ids], [len(t) for t in t_ids])
+
+    expected = tokenizer(
+        queries, texts, padding=True, truncation="longest_first", max_length=16, return_tensors="np"
+    )
+    for key in ("input_ids", "token_type_ids", "attention_mask"):
+        np.testing.assert_array_equal(features[key], expected[key], err_msg=key)
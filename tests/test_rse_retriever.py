@@ -0,0 +1,42 @@
+import importlib
+import inspect
+import sys
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+st = pytest.importorskip("sentence_transformers")
+
+from indexing import ann  # noqa: E402
+from indexing.docstore import write_docstore  # noqa: E402
+
+DOCS = ["annual leave policy", "remote work needs approval", "the notice period is days"]
+
+
+def test_rse_retriever_uses_shared_ann_and_config_knobs(tiny_sentence_model, tmp_path, monkeypatch):
+    real = st.SentenceTransformer
+    monkeypatch.setattr(st, "SentenceTransformer", lambda name, *a, **kw: real(tiny_sentence_model))
+    monkeypatch.chdir(tmp_path)
+
+    out = tmp_path / "rse_phase_2_retrieval/data/indexes"
+    out.mkdir(parents=True)
+    emb = real(tiny_sentence_model).encode(DOCS, normalize_embeddings=True).astype("float32")
+    faiss.write_index(ann.build_index(emb), str(out / "faiss.index"))
+    write_docstore(out / "docstore", ({"id": f"d{i}", "text": t} for i, t in enumerate(DOCS)), columns={"id": "str"})
+
+    monkeypatch.delitem(sys.modules, "rse_phase_2_retrieval.src.retriever", raising=False)
+    from rse_phase_2_retrieval.src import config
+
+    monkeypatch.setattr(config, "FAISS_NPROBE", 4)
+    monkeypatch.setattr(config, "FAISS_EF_SEARCH", 32)
+    retriever = importlib.import_module("rse_phase_2_retrieval.src.retriever")
+
+    # repo-root indexing/ann.py, not whatever `indexing` package is first on sys.path
+    assert retriever.ann.__file__ == ann.__file__
+    params = inspect.signature(retriever.dense_search).parameters
+    assert (params["nprobe"].default, params["ef_search"].default) == (4, 32)
+
+    hits = retriever.dense_search("annual leave policy", top_k=3)
+    assert sorted(h["id"] for h in hits) == ["d0", "d1", "d2"]
+    assert np.all(np.diff([h["score"] for h in hits]) <= 1e-6)
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+from ragcore_v2.src import stream_build_v2 as sb  # noqa: E402
+
+ARTIFACTS = [sb.INDEX_PATH, sb.EMB_PATH, sb.HASHES_PATH]
+
+
+def _bundle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sb.OUT_DIR.mkdir(parents=True)
+    for path in ARTIFACTS + [sb.IDS_PATH]:
+        path.write_text("old")
+    sb.META_PATH.write_text(json.dumps({"build": "old"}))
+    sb.DOCSTORE_DIR.mkdir()
+    (sb.DOCSTORE_DIR / "text.bin").write_text("old")
+
+    (sb.STAGING_DIR / "docstore").mkdir(parents=True)
+    (sb.STAGING_DIR / "docstore" / "text.bin").write_text("new")
+    for path in ARTIFACTS:
+        (sb.STAGING_DIR / path.name).write_text("new")
+    (sb.STAGING_DIR / sb.META_PATH.name).write_text(json.dumps({"build": "new"}))
+    sb.write_json_atomic(sb.STATE_PATH, {"rows": 1, "publishing": True})
+
+
+def _assert_published():
+    assert json.loads(sb.META_PATH.read_text()) == {"build": "new"}
+    assert all(p.read_text() == "new" for p in ARTIFACTS)
+    assert (sb.DOCSTORE_DIR / "text.bin").read_text() == "new"
+    assert not sb.IDS_PATH.exists()
+    assert not sb.STAGING_DIR.exists()
+    assert sorted(p.name for p in sb.OUT_DIR.iterdir()) == sorted(
+        [p.name for p in ARTIFACTS] + [sb.META_PATH.name, sb.DOCSTORE_DIR.name]
+    )
+
+
+def test_publish_moves_everything_meta_last(tmp_path, monkeypatch):
+    _bundle(tmp_path, monkeypatch)
+    order = []
+    real = os.replace
+    monkeypatch.setattr(sb.os, "replace", lambda a, b: (order.append(os.path.basename(b)), real(a, b)))
+    sb.publish()
+    _assert_published()
+    assert order[0] == sb.DOCSTORE_DIR.name + ".old"  # old docstore set aside, then the new one swapped in
+    assert order[-1] == sb.META_PATH.name
+
+
+@pytest.mark.parametrize("crash_at", range(6))
+def test_crash_mid_publish_never_commits_a_mixed_bundle(tmp_path, monkeypatch, crash_at):
+    _bundle(tmp_path, monkeypatch)
+    calls = []
+    real = os.replace
+
+    def flaky_replace(a, b):
+        if len(calls) == crash_at:
+            raise OSError("crash")
+        calls.append(b)
+        real(a, b)
+
+    monkeypatch.setattr(sb.os, "replace", flaky_replace)
+    with pytest.raises(OSError):
+        sb.publish()
+    # interrupted: no meta at all, so load_faiss_bundle refuses the bundle
+    assert not sb.META_PATH.exists()
+    assert sb.publish_pending()
+
+    monkeypatch.setattr(sb.os, "replace", real)
+    sb.publish()
+    _assert_published()
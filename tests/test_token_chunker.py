@@ -0,0 +1,70 @@
+import random
+import sys
+
+import pytest
+
+pytest.importorskip("transformers")
+
+from conftest import TINY_PUNCT, TINY_WORDS  # noqa: E402
+from indexing import token_chunker  # noqa: E402
+
+WINDOWS = [(8, 3), (5, 0), (12, 11), (250, 80)]
+
+
+def _texts(n=12, seed=0):
+    rng = random.Random(seed)
+    vocab = list(TINY_WORDS) + TINY_PUNCT + ["Zorblax", "qux"]
+    out = []
+    for _ in range(n):
+        words = [rng.choice(vocab) for _ in range(rng.randint(0, 60))]
+        words = [w.upper() if rng.random() < 0.2 else w for w in words]
+        out.append("".join(w + rng.choice([" ", "  ", "\n", "\t "]) for w in words))
+    return out
+
+
+@pytest.fixture
+def chunker(tiny_bert_dir, monkeypatch):
+    monkeypatch.setattr(token_chunker, "TOKENIZER_NAME", str(tiny_bert_dir))
+    monkeypatch.delitem(sys.modules, "experiments.chunker", raising=False)
+    from experiments import chunker
+
+    return chunker
+
+
+@pytest.mark.parametrize("max_tokens,overlap", WINDOWS)
+def test_windows_match_decoded_chunker(chunker, max_tokens, overlap):
+    step = max_tokens - overlap
+    for text in _texts():
+        ids = chunker.tokenize(text)
+        chunks = chunker.sliding_window_chunk(text, max_tokens, overlap)
+        decoded = chunker.sliding_window_chunk_decoded(text, max_tokens, overlap)
+        assert len(chunks) == len(decoded)
+        for k, (chunk, old) in enumerate(zip(chunks, decoded)):
+            assert chunker.tokenize(chunk) == ids[k * step : k * step + max_tokens]
+            assert chunker.tokenize(chunk) == chunker.tokenize(old)
+
+
+@pytest.mark.parametrize("max_tokens,overlap", WINDOWS)
+def test_chunks_are_slices_of_the_original_text(tiny_bert_dir, max_tokens, overlap):
+    texts = _texts(seed=1)
+    tok = token_chunker.get_tokenizer(str(tiny_bert_dir))
+    out = token_chunker.chunk_batch(texts, max_tokens, overlap, str(tiny_bert_dir))
+    assert len(out) == len(texts)
+    for text, chunks in zip(texts, out):
+        offsets = tok(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        spans = token_chunker.token_spans(offsets, max_tokens, overlap)
+        assert chunks == [text[lo:hi].strip() for lo, hi in spans]
+        assert all(c and c in text for c in chunks)  # casing and inner whitespace kept
+
+
+def test_overlap_must_be_smaller_than_window():
+    with pytest.raises(ValueError):
+        token_chunker.token_spans([(0, 1)], max_tokens=4, overlap=4)
+
+
+def test_pooled_chunking_keeps_input_order(tiny_bert_dir):
+    texts = _texts(n=20, seed=2)
+    serial = token_chunker.chunk_texts(texts, 8, 3, str(tiny_bert_dir), workers=1, batch_size=3)
+    pooled = token_chunker.chunk_texts(texts, 8, 3, str(tiny_bert_dir), workers=2, batch_size=3)
+    assert pooled == serial
+    assert serial == [token_chunker.chunk_batch([t], 8, 3, str(tiny_bert_dir))[0] for t in texts]
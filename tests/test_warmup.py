@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+import warmup  # noqa: E402
+
+
+class _StubEngine:
+    load_ms = {"model": 1.0}
+
+    def __init__(self):
+        self.direct = []
+
+    def warm(self, with_reranker=False):
+        return self
+
+    def answer_query(self, query):
+        return {"route": "answer_query"}
+
+    def hybrid_search(self, query, top_k=5):
+        return [{"id": f"c{i}", "text": f"chunk {i}"} for i in range(3)]
+
+    def chunk_row(self, cand):
+        return int(cand["id"][1:])
+
+    def _predict_direct(self, pairs, batch_size=32):
+        self.direct.append(pairs)
+        return [0.0] * len(pairs)
+
+    def get_reranker(self):
+        raise AssertionError("warm-up must not call the reranker outside _predict_direct")
+
+    def _cached_scores(self, queries, candidates):
+        raise AssertionError("warm-up forward must bypass the rerank score cache")
+
+
+def test_rerank_forward_uses_pretokenized_direct_predict(monkeypatch):
+    engine = _StubEngine()
+    monkeypatch.setattr(warmup, "get_engine", lambda: engine)
+    monkeypatch.setattr(warmup, "run_query", lambda query, **options: {"route": "stub"})
+
+    w = warmup.Warmup(queries=["q1", "q2"], routes=[{}])
+    w.run()
+
+    assert w.ready, w.error
+    assert engine.direct == [[[q, f"chunk {i}", i] for i in range(3)] for q in ("q1", "q2")]
+    assert [s["route"] for s in w.steps].count("rerank_forward") == 2